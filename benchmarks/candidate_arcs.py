@@ -0,0 +1,116 @@
+"""Measure how candidate-list arc pruning changes search speed and results.
+
+Solves the same generated delivery day with different neighbor counts,
+starting from the regret insertion routes as the app does, and reports
+solutions found per second, the final objective and how many packages were
+delivered. Run from the repository root:
+
+    python benchmarks/candidate_arcs.py --packages 150 --vehicles 6 --seconds 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from delivery_route_planner.construction import construction  # noqa: E402
+from delivery_route_planner.models import models  # noqa: E402
+from delivery_route_planner.routing import routing  # noqa: E402
+
+
+def build_data(package_count: int, vehicle_count: int) -> models.DataModel:
+    data = models.DataModel.with_defaults()
+    generator = np.random.default_rng(0)
+    streets = [street for street in data.addresses if street != models.DEPOT_ADDRESS]
+    data.vehicles = models.Vehicle.with_shared_attributes(
+        vehicle_count,
+        data.scenario.vehicle_speed_mph,
+        data.scenario.vehicle_capacity,
+        next(iter(data.vehicles.values())).duration_map,
+    )
+    data.packages = {}
+    for package_id in range(1, package_count + 1):
+        deadline = None
+        if generator.random() < 0.3:
+            deadline = models.RoutingTime.from_seconds(
+                int(generator.integers(10, 17)) * models.SECONDS_PER_HOUR,
+            )
+        data.packages[package_id] = models.Package(
+            id=package_id,
+            address=data.addresses[streets[generator.integers(len(streets))]],
+            delivery_deadline=deadline,
+        )
+    data.nodes = models.Node.from_packages(data.packages)
+    return data
+
+
+def run(data: models.DataModel, neighbor_count: int | None, seconds: int) -> None:
+    data.settings.candidate_neighbor_count = neighbor_count
+    data.settings.solver_time_limit_seconds = seconds
+    data.settings.solver_solution_limit = None
+    initial_solution = construction.build_initial_solution(data)
+    started = time.perf_counter()
+    manager, router = routing.create_routing_model(data, initial_solution)
+    build_seconds = time.perf_counter() - started
+    solution_count = 0
+
+    def count_solution() -> None:
+        nonlocal solution_count
+        solution_count += 1
+
+    router.AddAtSolutionCallback(count_solution)
+    started = time.perf_counter()
+    assignment = routing.solve_from_routes(
+        router,
+        routing.create_search_parameters(data.settings),
+        routing.solution_routes(manager, initial_solution),
+    )
+    search_seconds = time.perf_counter() - started
+    arc_count = sum(
+        router.NextVar(index).Size() for index in range(manager.GetNumberOfIndices())
+        if not router.IsEnd(index)
+    )
+    objective = assignment.ObjectiveValue() if assignment else None
+    delivered_count = (
+        models.Solution.save_solution(
+            data,
+            manager,
+            router,
+            assignment,
+        ).delivered_packages_count
+        if assignment
+        else 0
+    )
+    print(
+        f"neighbors={neighbor_count!s:>4}  arcs={arc_count:>7}  "
+        f"build={build_seconds:5.2f} s  "
+        f"solutions/s={solution_count / search_seconds:8.1f}  "
+        f"objective={objective}  "
+        f"delivered={delivered_count}/{len(data.packages)}",
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--packages", type=int, default=150)
+    parser.add_argument("--vehicles", type=int, default=6)
+    parser.add_argument("--seconds", type=int, default=10)
+    parser.add_argument("--neighbors", type=int, nargs="*", default=[0, 10, 5])
+    arguments = parser.parse_args()
+
+    for neighbor_count in arguments.neighbors:
+        run(
+            build_data(arguments.packages, arguments.vehicles),
+            neighbor_count or None,
+            arguments.seconds,
+        )
+
+
+if __name__ == "__main__":
+    main()
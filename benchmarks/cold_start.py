@@ -0,0 +1,87 @@
+"""Measure application cold-start costs in fresh interpreter processes.
+
+Run from the repository root:
+
+    python benchmarks/cold_start.py --runs 7
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parents[1] / "src"
+
+STAGES = {
+    "first frame imports": """
+import flet
+from delivery_route_planner import components
+from delivery_route_planner.models import models
+""",
+    "eager imports (previous startup)": """
+import flet
+from delivery_route_planner import components, views
+from delivery_route_planner.models import models
+from delivery_route_planner.routing import routing
+""",
+    "background data load": """
+from delivery_route_planner.models import models
+start = time.perf_counter()
+models.DataModel.with_defaults()
+""",
+    "deferred OR-Tools import": """
+from delivery_route_planner.models import models
+start = time.perf_counter()
+from ortools.constraint_solver import pywrapcp
+""",
+    "lottie encode (once)": """
+from delivery_route_planner.components import navigation_manager
+start = time.perf_counter()
+navigation_manager.load_lottie_base64()
+""",
+}
+
+RUNNER = """
+import sys, time
+sys.path.insert(0, {src!r})
+start = time.perf_counter()
+{body}
+print(time.perf_counter() - start)
+"""
+
+
+def measure(body: str, runs: int) -> list[float]:
+    script = RUNNER.format(src=str(SRC_DIR), body=body)
+    return [
+        float(
+            subprocess.run(
+                [sys.executable, "-c", script],
+                capture_output=True,
+                check=True,
+                text=True,
+            ).stdout.strip(),
+        )
+        for _ in range(runs)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'stage':<36}{'median ms':>12}{'min ms':>10}")
+    for name, body in STAGES.items():
+        timings = measure(body, args.runs)
+        print(
+            f"{name:<36}"
+            f"{statistics.median(timings) * 1000:>12.1f}"
+            f"{min(timings) * 1000:>10.1f}",
+        )
+
+
+if __name__ == "__main__":
+    main()
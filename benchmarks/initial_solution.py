@@ -0,0 +1,64 @@
+"""Time the regret insertion preview and its use as the search's starting point.
+
+Builds the preview for a generated delivery day, then searches it with and
+without the preview as initial routes. Run from the repository root:
+
+    python benchmarks/initial_solution.py --packages 150 --seconds 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from candidate_arcs import build_data  # noqa: E402
+
+from delivery_route_planner.construction import construction  # noqa: E402
+from delivery_route_planner.routing import routing  # noqa: E402
+from delivery_route_planner.validation import validation  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--packages", type=int, default=150)
+    parser.add_argument("--vehicles", type=int, default=6)
+    parser.add_argument("--seconds", type=int, default=10)
+    arguments = parser.parse_args()
+
+    data = build_data(arguments.packages, arguments.vehicles)
+    data.settings.solver_time_limit_seconds = arguments.seconds
+    data.settings.solver_solution_limit = None
+
+    started = time.perf_counter()
+    preview = construction.build_initial_solution(data)
+    seconds = time.perf_counter() - started
+    report = validation.validate_solution(preview)
+    print(
+        f"preview            time={seconds * 1000:7.0f} ms  "
+        f"delivered={preview.delivered_packages_count}  "
+        f"violations={len(report.violations)}  "
+        f"mileage={preview.mileage:.1f}",
+    )
+
+    for initial_solution in (None, preview):
+        started = time.perf_counter()
+        solution = routing.solve_vehicle_routing_problem(data, initial_solution)
+        seconds = time.perf_counter() - started
+        result = (
+            f"delivered={solution.delivered_packages_count}  "
+            f"mileage={solution.mileage:.1f}"
+            if solution
+            else "no solution"
+        )
+        print(
+            f"search from {'preview' if initial_solution else 'scratch'}  "
+            f"time={seconds:7.1f} s   {result}",
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Time the mileage lower bound and report the gap of a short search to it.
+
+Computes the bound for generated delivery days of several sizes, then
+solves each day within a time limit while the bound runs in its worker
+process. Run from the repository root:
+
+    python benchmarks/lower_bound.py --packages 50 150 300 --seconds 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from candidate_arcs import build_data  # noqa: E402
+
+from delivery_route_planner.bounds import bounds  # noqa: E402
+from delivery_route_planner.construction import construction  # noqa: E402
+from delivery_route_planner.routing import routing  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--packages", type=int, nargs="+", default=[50, 150, 300])
+    parser.add_argument("--vehicles", type=int, default=6)
+    parser.add_argument("--seconds", type=int, default=10)
+    arguments = parser.parse_args()
+
+    for package_count in arguments.packages:
+        data = build_data(package_count, arguments.vehicles)
+        data.settings.solver_time_limit_seconds = arguments.seconds
+        data.settings.solver_solution_limit = None
+        started = time.perf_counter()
+        mileage_bound = bounds.compute_mileage_bound(data)
+        bound_seconds = time.perf_counter() - started
+        solution = routing.solve_vehicle_routing_problem(
+            data,
+            construction.build_initial_solution(data),
+        )
+        gap = solution.optimality_gap
+        print(
+            f"packages={package_count:4}  "
+            f"bound={mileage_bound.miles:6.1f} mi in {bound_seconds:4.2f} s  "
+            f"mileage={solution.mileage:6.1f}  "
+            f"gap={'unknown' if gap is None else f'{gap:.1%}'}",
+        )
+
+
+if __name__ == "__main__":
+    main()
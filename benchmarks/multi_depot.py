@@ -0,0 +1,77 @@
+"""Compare one search over all depots with solving each depot on its own.
+
+Spreads the vehicles and packages of a generated delivery day over several
+depots and solves it both ways within the same time limit. Run from the
+repository root:
+
+    python benchmarks/multi_depot.py --packages 150 --depots 3 --seconds 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from candidate_arcs import build_data  # noqa: E402
+
+from delivery_route_planner.models import models  # noqa: E402
+from delivery_route_planner.routing import routing  # noqa: E402
+
+
+def build_depot_data(
+    package_count: int,
+    vehicle_count: int,
+    depot_count: int,
+) -> models.DataModel:
+    data = build_data(package_count, vehicle_count)
+    generator = np.random.default_rng(3)
+    streets = [street for street in data.addresses if street != models.DEPOT_ADDRESS]
+    depots = [models.DEPOT_ADDRESS] + [
+        str(street)
+        for street in generator.choice(streets, depot_count - 1, replace=False)
+    ]
+    data.vehicles = models.Vehicle.with_shared_attributes(
+        vehicle_count,
+        data.scenario.vehicle_speed_mph,
+        data.scenario.vehicle_capacity,
+        next(iter(data.vehicles.values())).duration_map,
+        depots,
+    )
+    for package in data.packages.values():
+        package.origin_depot = depots[generator.integers(depot_count)]
+    data.nodes = models.Node.from_packages(data.packages, data.vehicles)
+    return data
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--packages", type=int, default=150)
+    parser.add_argument("--vehicles", type=int, default=6)
+    parser.add_argument("--depots", type=int, default=3)
+    parser.add_argument("--seconds", type=int, default=20)
+    arguments = parser.parse_args()
+
+    for solve_depots_separately in (False, True):
+        data = build_depot_data(arguments.packages, arguments.vehicles, arguments.depots)
+        data.settings.solve_depots_separately = solve_depots_separately
+        data.settings.solver_time_limit_seconds = arguments.seconds
+        data.settings.solver_solution_limit = None
+        started = time.perf_counter()
+        solution = routing.solve_vehicle_routing_problem(data)
+        seconds = time.perf_counter() - started
+        print(
+            f"separately={solve_depots_separately!s:>5}  "
+            f"time={seconds:5.1f} s  "
+            f"delivered={solution.delivered_packages_count}  "
+            f"mileage={solution.mileage:.1f}",
+        )
+
+
+if __name__ == "__main__":
+    main()
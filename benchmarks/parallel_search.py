@@ -0,0 +1,58 @@
+"""Compare one search with cooperative ruin and recreate rounds in a process pool.
+
+Both start from the same regret insertion routes and share the time limit.
+Run from the repository root:
+
+    python benchmarks/parallel_search.py --packages 400 --vehicles 12 --seconds 60
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from candidate_arcs import build_data  # noqa: E402
+
+from delivery_route_planner.construction import construction  # noqa: E402
+from delivery_route_planner.lns import lns  # noqa: E402
+from delivery_route_planner.routing import routing  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--packages", type=int, default=400)
+    parser.add_argument("--vehicles", type=int, default=12)
+    parser.add_argument("--seconds", type=int, default=60)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    arguments = parser.parse_args()
+
+    data = build_data(arguments.packages, arguments.vehicles)
+    data.settings.solver_time_limit_seconds = arguments.seconds
+    data.settings.solver_solution_limit = None
+    preview = construction.build_initial_solution(data)
+    print(f"start               mileage={preview.mileage:.1f}")
+
+    for workers in (None, arguments.workers):
+        started = time.perf_counter()
+        if workers is None:
+            solution = routing.solve_vehicle_routing_problem(data, preview)
+        else:
+            solution, _ = lns.solve_cooperatively(data, preview, workers)
+        seconds = time.perf_counter() - started
+        result = (
+            f"delivered={solution.delivered_packages_count}  "
+            f"mileage={solution.mileage:.1f}"
+            if solution
+            else "no solution"
+        )
+        label = "one search" if workers is None else f"{workers} workers"
+        print(f"{label:<18}  time={seconds:6.1f} s  {result}")
+
+
+if __name__ == "__main__":
+    main()
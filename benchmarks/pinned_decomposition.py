@@ -0,0 +1,73 @@
+"""Compare solving pinned vehicles first with one global search.
+
+Pins a share of a generated delivery day to a few vehicles and solves it
+both ways within the same total time limit. Run from the repository root:
+
+    python benchmarks/pinned_decomposition.py --packages 150 --pinned-share 0.6
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from candidate_arcs import build_data  # noqa: E402
+
+from delivery_route_planner.models import models  # noqa: E402
+from delivery_route_planner.routing import routing  # noqa: E402
+
+
+def build_pinned_data(
+    package_count: int,
+    vehicle_count: int,
+    pinned_vehicle_count: int,
+    pinned_share: float,
+) -> models.DataModel:
+    data = build_data(package_count, vehicle_count)
+    generator = np.random.default_rng(2)
+    for package in data.packages.values():
+        if generator.random() < pinned_share:
+            package.vehicle_requirement = data.vehicles[
+                int(generator.integers(1, pinned_vehicle_count + 1))
+            ]
+    return data
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--packages", type=int, default=150)
+    parser.add_argument("--vehicles", type=int, default=6)
+    parser.add_argument("--pinned-vehicles", type=int, default=4)
+    parser.add_argument("--pinned-share", type=float, default=0.6)
+    parser.add_argument("--seconds", type=int, default=20)
+    arguments = parser.parse_args()
+
+    for solve_pinned_vehicles_first in (False, True):
+        data = build_pinned_data(
+            arguments.packages,
+            arguments.vehicles,
+            arguments.pinned_vehicles,
+            arguments.pinned_share,
+        )
+        data.settings.solve_pinned_vehicles_first = solve_pinned_vehicles_first
+        data.settings.solver_time_limit_seconds = arguments.seconds
+        data.settings.solver_solution_limit = None
+        started = time.perf_counter()
+        solution = routing.solve_vehicle_routing_problem(data)
+        seconds = time.perf_counter() - started
+        print(
+            f"pinned first={solve_pinned_vehicles_first!s:>5}  "
+            f"time={seconds:5.1f} s  "
+            f"delivered={solution.delivered_packages_count}  "
+            f"mileage={solution.mileage:.1f}",
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Time the road graph distance matrix builder on a synthetic street grid.
+
+Blocks are split into several segments, like the shape points of an
+OpenStreetMap extract. Run from the repository root:
+
+    python benchmarks/road_matrix.py --grid 300 --addresses 1000
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from delivery_route_planner.road_network import road_network  # noqa: E402
+
+
+def build_grid(size: int, segments: int, seed: int) -> road_network.RoadGraph:
+    generator = np.random.default_rng(seed)
+    graph = road_network.RoadGraph()
+    next_node = size * size
+    for node in range(size * size):
+        row, column = divmod(node, size)
+        for neighbor in (
+            node + 1 if column + 1 < size else None,
+            node + size if row + 1 < size else None,
+        ):
+            if neighbor is None:
+                continue
+            previous = node
+            for _ in range(segments - 1):
+                graph.add_edge(previous, next_node, generator.uniform(0.01, 0.05))
+                previous = next_node
+                next_node += 1
+            graph.add_edge(previous, neighbor, generator.uniform(0.01, 0.05))
+    return graph
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--grid", type=int, default=150)
+    parser.add_argument("--segments", type=int, default=4)
+    parser.add_argument("--addresses", type=int, default=500)
+    parser.add_argument("--workers", type=int)
+    arguments = parser.parse_args()
+
+    graph = build_grid(arguments.grid, arguments.segments, seed=0)
+    generator = np.random.default_rng(1)
+    nodes = generator.choice(
+        arguments.grid * arguments.grid,
+        size=arguments.addresses,
+        replace=False,
+    )
+    addresses = [
+        road_network.MappedAddress(f"Stop {node}", f"{node} Grid St", "", "", "", node)
+        for node in nodes.tolist()
+    ]
+    started = time.perf_counter()
+    contracted = graph.contracted({address.node for address in addresses})
+    contracted_seconds = time.perf_counter() - started
+    matrix = road_network.build_distance_matrix(
+        graph,
+        addresses,
+        max_workers=arguments.workers,
+    )
+    total_seconds = time.perf_counter() - started
+    print(
+        f"graph nodes: {len(graph.out_edges)} -> {len(contracted.out_edges)} "
+        f"after contraction ({contracted_seconds:.1f} s)",
+    )
+    print(
+        f"{arguments.addresses}x{arguments.addresses} matrix in {total_seconds:.1f} s, "
+        f"mean distance {matrix.mean():.2f} miles",
+    )
+
+
+if __name__ == "__main__":
+    main()
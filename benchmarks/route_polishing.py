@@ -0,0 +1,56 @@
+"""Measure how much mileage intra-route polishing recovers after a short search.
+
+Solves a generated delivery day once, then polishes every route on its own
+and validates the result. Run from the repository root:
+
+    python benchmarks/route_polishing.py --packages 150 --seconds 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from candidate_arcs import build_data  # noqa: E402
+
+from delivery_route_planner.polishing import polishing  # noqa: E402
+from delivery_route_planner.routing import routing  # noqa: E402
+from delivery_route_planner.validation import validation  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--packages", type=int, default=150)
+    parser.add_argument("--vehicles", type=int, default=6)
+    parser.add_argument("--seconds", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=None)
+    arguments = parser.parse_args()
+
+    data = build_data(arguments.packages, arguments.vehicles)
+    data.settings.solver_time_limit_seconds = arguments.seconds
+    data.settings.solver_solution_limit = None
+    data.settings.polish_routes = False
+    solution = routing.solve_vehicle_routing_problem(data)
+    print(
+        f"search     mileage={solution.mileage:.1f}  "
+        f"delivered={solution.delivered_packages_count}",
+    )
+
+    started = time.perf_counter()
+    polished = polishing.polish_solution(solution, arguments.workers)
+    seconds = time.perf_counter() - started
+    report = validation.validate_solution(polished)
+    print(
+        f"polished   mileage={polished.mileage:.1f}  "
+        f"delivered={polished.delivered_packages_count}  "
+        f"violations={len(report.violations)}  "
+        f"time={seconds:.2f} s",
+    )
+
+
+if __name__ == "__main__":
+    main()
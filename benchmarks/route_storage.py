@@ -0,0 +1,123 @@
+"""Compare columnar route storage with one object per stop.
+
+Run from the repository root:
+
+    python benchmarks/route_storage.py --stops 50000
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from delivery_route_planner.models import models  # noqa: E402
+
+
+@dataclass
+class ObjectStop:
+    node: models.Node
+    vehicle_load: int
+    visit_time: models.RoutingTime
+    mileage: float
+
+
+def build_object_stops(data: models.DataModel, sequence: list[int]) -> list:
+    stops = []
+    load = 0
+    for position, node_index in enumerate(sequence):
+        node = data.nodes[node_index]
+        load += node.kind.capacity_impact
+        stops.append(
+            ObjectStop(
+                node,
+                load,
+                models.RoutingTime.from_seconds(position * 60),
+                position * 0.5,
+            ),
+        )
+    return stops
+
+
+def build_columnar_route(data: models.DataModel, sequence: list[int]) -> models.Route:
+    vehicle = next(iter(data.vehicles.values()))
+    return models.Route.from_columns(
+        vehicle,
+        data,
+        sequence,
+        [position * 60 for position in range(len(sequence))],
+        [position * 0.5 for position in range(len(sequence))],
+    )
+
+
+def group_object_stops(stops: list) -> list:
+    groups = []
+    packages = []
+    for this_stop, next_stop in zip(stops[1:], stops[2:] + [None]):
+        if this_stop.node.package:
+            packages.append(this_stop.node.package.id)
+        if (
+            next_stop
+            and this_stop.node.kind == next_stop.node.kind
+            and this_stop.node.address == next_stop.node.address
+        ):
+            continue
+        groups.append((this_stop, packages.copy()))
+        packages.clear()
+    return groups
+
+
+def measure(build: callable) -> tuple[object, int, float]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size, elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stops", type=int, default=50_000)
+    args = parser.parse_args()
+
+    data = models.DataModel.with_defaults()
+    data.node_kind_codes  # noqa: B018
+    data.node_address_codes  # noqa: B018
+    data.node_package_ids  # noqa: B018
+    sequence = [0] + [
+        1 + position % (len(data.nodes) - 1) for position in range(args.stops - 2)
+    ] + [0]
+
+    object_stops, object_bytes, object_build = measure(
+        lambda: build_object_stops(data, sequence),
+    )
+    route, columnar_bytes, columnar_build = measure(
+        lambda: build_columnar_route(data, sequence),
+    )
+
+    start = time.perf_counter()
+    for _ in group_object_stops(object_stops):
+        pass
+    object_iterate = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in route.stop_groups():
+        pass
+    columnar_iterate = time.perf_counter() - start
+
+    print(f"{'storage':<12}{'memory KiB':>12}{'build ms':>10}{'group ms':>10}")
+    for name, size, build, iterate in (
+        ("objects", object_bytes, object_build, object_iterate),
+        ("columnar", columnar_bytes, columnar_build, columnar_iterate),
+    ):
+        print(f"{name:<12}{size / 1024:>12.0f}{build * 1000:>10.1f}{iterate * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
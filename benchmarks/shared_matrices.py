@@ -0,0 +1,100 @@
+"""Compare sending a delivery day to worker processes with and without shared matrices.
+
+Writes synthetic distance matrices of growing size and reports the bytes
+pickled per task and the round trip of a task that reads a few distances
+in a worker process. Run from the repository root:
+
+    python benchmarks/shared_matrices.py --addresses 250 500 1000 2000
+"""
+
+from __future__ import annotations
+
+import argparse
+import concurrent.futures
+import pickle
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from delivery_route_planner.models import models  # noqa: E402
+from sparse_matrix import write_matrix  # noqa: E402
+
+TASK_COUNT = 5
+
+
+def build_data(address_count: int, package_count: int) -> models.DataModel:
+    with tempfile.TemporaryDirectory() as directory:
+        models.ADDRESS_FILE = str(Path(directory) / "distance_matrix.csv")
+        write_matrix(Path(models.ADDRESS_FILE), address_count)
+        addresses = models.Address.from_csv()
+    scenario = models.RoutingScenario()
+    vehicles = models.Vehicle.with_shared_attributes(
+        scenario.vehicle_count,
+        scenario.vehicle_speed_mph,
+        scenario.vehicle_capacity,
+        models.TravelCostMap.with_duration(addresses, scenario.vehicle_speed_mph),
+    )
+    generator = np.random.default_rng(0)
+    streets = list(addresses)
+    packages = {
+        package_id: models.Package(
+            id=package_id,
+            address=addresses[streets[generator.integers(1, len(streets))]],
+        )
+        for package_id in range(1, package_count + 1)
+    }
+    return models.DataModel(
+        addresses=addresses,
+        distance_map=models.TravelCostMap.with_distance(addresses),
+        vehicles=vehicles,
+        packages=packages,
+        nodes=models.Node.from_packages(packages, vehicles),
+        scenario=scenario,
+        settings=models.SearchSettings(),
+    )
+
+
+def route_seconds(data: models.DataModel) -> int:
+    streets = [node.address for node in data.nodes]
+    durations = data.vehicles[1].duration_map.cost_map
+    return sum(durations[start][end] for start, end in zip(streets, streets[1:]))
+
+
+def time_tasks(data: models.DataModel) -> float:
+    with concurrent.futures.ProcessPoolExecutor(max_workers=1) as executor:
+        executor.submit(int).result()
+        started = time.perf_counter()
+        for _ in range(TASK_COUNT):
+            executor.submit(route_seconds, data).result()
+        return (time.perf_counter() - started) / TASK_COUNT
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--addresses", type=int, nargs="+", default=[250, 500, 1000])
+    parser.add_argument("--packages", type=int, default=100)
+    arguments = parser.parse_args()
+
+    print("addresses  plain MiB  shared MiB  plain ms  shared ms")
+    for address_count in arguments.addresses:
+        data = build_data(address_count, arguments.packages)
+        plain_mib = len(pickle.dumps(data)) / 2**20
+        plain_seconds = time_tasks(data)
+        with data.share_matrices() as shared_data:
+            shared_mib = len(pickle.dumps(shared_data)) / 2**20
+            shared_seconds = time_tasks(shared_data)
+            assert route_seconds(shared_data) == route_seconds(data)
+        print(
+            f"{address_count:9d}  {plain_mib:9.2f}  {shared_mib:10.2f}  "
+            f"{plain_seconds * 1000:8.1f}  {shared_seconds * 1000:9.1f}",
+        )
+
+
+if __name__ == "__main__":
+    main()
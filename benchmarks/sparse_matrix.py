@@ -0,0 +1,75 @@
+"""Compare memory of the dense and the k-nearest-neighbor distance matrix.
+
+Writes a synthetic matrix of random points and loads it both ways. Run from
+the repository root:
+
+    python benchmarks/sparse_matrix.py --addresses 3000 --neighbors 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from delivery_route_planner.models import models  # noqa: E402
+
+
+def write_matrix(path: Path, address_count: int) -> None:
+    points = np.random.default_rng(0).uniform(0, 30, size=(address_count, 2))
+    points[0] = 15
+    streets = [models.DEPOT_ADDRESS] + [f"{i} Test St" for i in range(1, address_count)]
+    with path.open("w", newline="", encoding="utf-8-sig") as file:
+        writer = csv.writer(file)
+        writer.writerow([*models.ADDRESS_COLUMNS, *streets])
+        for street, point in zip(streets, points):
+            miles = np.hypot(*(points - point).T).round(1)
+            writer.writerow([street, street, "City", "UT", "84000", *miles.tolist()])
+
+
+def load(neighbor_count: int | None) -> tuple[float, float, models.TravelCostMap]:
+    tracemalloc.start()
+    started = time.perf_counter()
+    addresses = models.Address.from_csv(neighbor_count)
+    cost_map = models.TravelCostMap.with_distance(addresses)
+    seconds = time.perf_counter() - started
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, current / 2**20, cost_map
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--addresses", type=int, default=2000)
+    parser.add_argument("--neighbors", type=int, default=20)
+    arguments = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        models.ADDRESS_FILE = str(Path(directory) / "distance_matrix.csv")
+        write_matrix(Path(models.ADDRESS_FILE), arguments.addresses)
+        dense_seconds, dense_mib, dense = load(None)
+        sparse_seconds, sparse_mib, sparse = load(arguments.neighbors)
+
+    streets = list(dense.cost_map)
+    generator = np.random.default_rng(1)
+    pairs = generator.integers(0, len(streets), size=(10_000, 2)).tolist()
+    exact = np.array([dense.cost_map[streets[a]][streets[b]] for a, b in pairs])
+    estimated = np.array([sparse.cost_map[streets[a]][streets[b]] for a, b in pairs])
+    print(f"dense:  {dense_mib:8.1f} MiB, loaded in {dense_seconds:.1f} s")
+    print(f"sparse: {sparse_mib:8.1f} MiB, loaded in {sparse_seconds:.1f} s")
+    print(
+        f"random pairs: mean estimate {estimated.sum() / max(exact.sum(), 1):.2f}x "
+        "the exact distance",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Fit the runtime model behind the adaptive time limit.
+
+Solves a corpus of generated delivery days of different sizes, fleets,
+pinned and linked shares and deadlines, records when each search first came
+within CONVERGED_SHARE of its final objective and fits the log-linear
+runtime model to those times. Run from the repository root:
+
+    python benchmarks/time_budget.py --seconds 30
+
+Paste the printed coefficients into budget.DEFAULT_RUNTIME_MODEL.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from candidate_arcs import build_data  # noqa: E402
+
+from delivery_route_planner.budget import budget  # noqa: E402
+from delivery_route_planner.models import models  # noqa: E402
+from delivery_route_planner.routing import routing  # noqa: E402
+
+CONVERGED_SHARE = 0.01
+# Packages, vehicles, pinned share, linked share and deadline share per day.
+CORPUS = [
+    (20, 2, 0.0, 0.0, 0.3),
+    (30, 3, 0.3, 0.1, 0.6),
+    (40, 4, 0.0, 0.2, 0.3),
+    (50, 3, 0.2, 0.0, 0.8),
+    (60, 5, 0.0, 0.0, 0.3),
+    (80, 4, 0.4, 0.1, 0.3),
+    (100, 6, 0.0, 0.1, 0.5),
+    (120, 5, 0.1, 0.0, 0.3),
+    (150, 8, 0.0, 0.0, 0.6),
+    (180, 6, 0.3, 0.1, 0.3),
+    (220, 10, 0.0, 0.1, 0.3),
+    (300, 12, 0.1, 0.0, 0.4),
+]
+
+
+def build_corpus_day(
+    package_count: int,
+    vehicle_count: int,
+    pinned_share: float,
+    linked_share: float,
+    deadline_share: float,
+) -> models.DataModel:
+    data = build_data(package_count, vehicle_count)
+    generator = np.random.default_rng(package_count)
+    packages = list(data.packages.values())
+    for package in packages:
+        package.delivery_deadline = (
+            models.RoutingTime.from_seconds(
+                int(generator.integers(10, 17)) * models.SECONDS_PER_HOUR,
+            )
+            if generator.random() < deadline_share
+            else None
+        )
+        if generator.random() < pinned_share:
+            package.vehicle_requirement = data.vehicles[
+                int(generator.integers(1, vehicle_count + 1))
+            ]
+    for package, other in zip(packages[::2], packages[1::2]):
+        if (
+            generator.random() < linked_share
+            and package.vehicle_requirement is other.vehicle_requirement
+        ):
+            package.bundled_packages.append(other)
+    return data
+
+
+def measure_convergence_seconds(data: models.DataModel, seconds: int) -> float:
+    """Seconds until the search came within CONVERGED_SHARE of its final objective."""
+    data.settings.solver_time_limit_seconds = seconds
+    data.settings.solver_solution_limit = None
+    manager, router = routing.create_routing_model(data)
+    objectives: list[tuple[float, int]] = []
+    started = time.perf_counter()
+    router.AddAtSolutionCallback(
+        lambda: objectives.append(
+            (time.perf_counter() - started, router.CostVar().Value()),
+        ),
+    )
+    router.SolveWithParameters(routing.create_search_parameters(data.settings))
+    if not objectives:
+        return float(seconds)
+    final_objective = min(objective for _, objective in objectives)
+    return next(
+        elapsed
+        for elapsed, objective in objectives
+        if objective <= final_objective * (1 + CONVERGED_SHARE)
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=int, default=30)
+    arguments = parser.parse_args()
+
+    features = []
+    converged_seconds = []
+    for day in CORPUS:
+        data = build_corpus_day(*day)
+        features.append(budget.InstanceFeatures.from_data(data))
+        converged_seconds.append(measure_convergence_seconds(data, arguments.seconds))
+        print(f"{features[-1]}  converged={converged_seconds[-1]:5.1f} s", flush=True)
+
+    model = budget.RuntimeModel.fit(features, converged_seconds)
+    print(f"\nRuntimeModel({model.coefficients})")
+    for day, feature, seconds in zip(CORPUS, features, converged_seconds):
+        print(
+            f"packages={day[0]:3}  "
+            f"converged={seconds:5.1f} s  "
+            f"predicted={model.predict_seconds(feature):5.1f} s",
+        )
+
+
+if __name__ == "__main__":
+    main()
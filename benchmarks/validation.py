@@ -0,0 +1,85 @@
+"""Time the solution validator on a large synthetic delivery day.
+
+Run from the repository root:
+
+    python benchmarks/validation.py --packages 100000 --vehicles 60
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from delivery_route_planner.models import models  # noqa: E402
+from delivery_route_planner.validation import validation  # noqa: E402
+
+
+def build_solution(package_count: int, vehicle_count: int) -> models.Solution:
+    data = models.DataModel.with_defaults()
+    streets = list(data.addresses)
+    data.vehicles = models.Vehicle.with_shared_attributes(
+        vehicle_count,
+        data.scenario.vehicle_speed_mph,
+        data.scenario.vehicle_capacity,
+        next(iter(data.vehicles.values())).duration_map,
+    )
+    data.packages = {
+        package_id: models.Package(
+            id=package_id,
+            address=data.addresses[streets[1 + package_id % (len(streets) - 1)]],
+        )
+        for package_id in range(1, package_count + 1)
+    }
+    data.nodes = models.Node.from_packages(data.packages)
+
+    capacity = data.scenario.vehicle_capacity
+    sequences = {vehicle_id: [0] for vehicle_id in data.vehicles}
+    for trip, first in enumerate(range(0, package_count, capacity)):
+        batch = range(first, min(first + capacity, package_count))
+        sequence = sequences[1 + trip % vehicle_count]
+        sequence.extend(1 + 2 * position for position in batch)
+        sequence.extend(2 + 2 * position for position in batch)
+    routes = []
+    for vehicle_id, sequence in sequences.items():
+        sequence.append(0)
+        routes.append(
+            models.Route.from_columns(
+                data.vehicles[vehicle_id],
+                data,
+                sequence,
+                [data.scenario.day_start.seconds + step for step in range(len(sequence))],
+                [0.0] * len(sequence),
+            ),
+        )
+    return models.Solution(data, routes)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--packages", type=int, default=100_000)
+    parser.add_argument("--vehicles", type=int, default=60)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    solution = build_solution(args.packages, args.vehicles)
+
+    start = time.perf_counter()
+    report = validation.validate_solution(solution)
+    first_run = time.perf_counter() - start
+    timings = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        validation.validate_solution(solution)
+        timings.append(time.perf_counter() - start)
+
+    print(f"packages: {args.packages}, violations: {len(report.violations)}")
+    print(f"first run (builds cached package columns): {first_run * 1000:.1f} ms")
+    print(f"cached runs, best of {args.runs}: {min(timings) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
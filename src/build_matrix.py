@@ -0,0 +1,61 @@
+import argparse
+import sys
+from pathlib import Path
+
+from delivery_route_planner.road_network import road_network
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Build a distance matrix from a local road graph, "
+        "in the format of distance_matrix.csv.",
+    )
+    parser.add_argument(
+        "graph",
+        type=Path,
+        help="edge list .csv with source, target, miles and optional oneway "
+        "columns, or an OpenStreetMap .pbf extract (requires osmium)",
+    )
+    parser.add_argument(
+        "addresses",
+        type=Path,
+        help=".csv with Name, Street, City, State and Zip Code columns plus "
+        "either a graph node or latitude and longitude",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=Path("distance_matrix.csv"),
+        metavar="PATH",
+        help="where to write the matrix (default: distance_matrix.csv)",
+    )
+    parser.add_argument("--workers", type=int, help="number of worker processes")
+    return parser.parse_args()
+
+
+def main() -> int:
+    arguments = parse_arguments()
+    graph = road_network.RoadGraph.from_path(arguments.graph)
+    addresses = road_network.read_mapped_addresses(arguments.addresses, graph)
+    try:
+        matrix = road_network.build_distance_matrix(
+            graph,
+            addresses,
+            max_workers=arguments.workers,
+            progress=lambda fraction: print(
+                f"\r{fraction:.0%} of addresses routed",
+                end="",
+                flush=True,
+            ),
+        )
+    except ValueError as e:
+        print(f"\n{e}")
+        return 1
+    print()
+    road_network.write_distance_matrix(addresses, matrix, arguments.output)
+    print(f"{len(addresses)} addresses were written to {arguments.output}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,291 @@
+from __future__ import annotations
+
+import concurrent.futures
+import contextlib
+import logging
+import time
+from collections.abc import Iterator
+from typing import NamedTuple
+
+import numpy as np
+from ortools.constraint_solver import pywrapcp
+
+from delivery_route_planner.models import models
+from delivery_route_planner.screening import screening
+
+MAX_BOUND_ITERATIONS = 300
+MAX_BOUND_SECONDS = 30.0
+# Subgradient steps halve after this many iterations without a better bound.
+STEP_PATIENCE = 20
+MIN_STEP_SCALE = 0.001
+
+
+class MileageBound(NamedTuple):
+    """No routes that deliver package_count packages drive fewer miles."""
+
+    miles: float
+    package_count: int
+
+
+@contextlib.contextmanager
+def bound_in_background(
+    data: models.DataModel,
+) -> Iterator[concurrent.futures.Future[MileageBound]]:
+    """Compute the mileage bound in a worker process while the with block runs."""
+    with (
+        data.share_matrices() as shared_data,
+        concurrent.futures.ProcessPoolExecutor(max_workers=1) as executor,
+    ):
+        yield executor.submit(compute_mileage_bound, shared_data)
+
+
+def bound_result(
+    mileage_bound: concurrent.futures.Future[MileageBound],
+) -> MileageBound | None:
+    """The finished bound, or None if it failed; the routes do not depend on it."""
+    try:
+        return mileage_bound.result()
+    except Exception as e:
+        if isinstance(e, (KeyboardInterrupt, SystemExit)):
+            raise
+        logging.exception("The mileage lower bound could not be computed.")
+        return None
+
+
+def compute_mileage_bound(data: models.DataModel) -> MileageBound:
+    """Lower bound on the miles of any routes that deliver every routable package.
+
+    Routes are closed walks from home depots that visit each delivery
+    address and origin depot. In the shortest-path closure of the miles
+    between those addresses they can be shortcut to tours that visit every
+    address once, with all depots merged into one. A Held-Karp style
+    Lagrangian relaxation of those tours bounds their length.
+
+    When packages are only picked up at home depots, each trip from a depot
+    carries at most a full load. There are then enough tours to visit every
+    delivery address, and each trip drives at least twice to its farthest
+    delivery and back, which bounds the miles of heavy days by the radial
+    distances. Time windows and required vehicles are ignored.
+    """
+    infeasible_ids = screening.find_infeasible_packages(data)
+    packages = [
+        package
+        for package_id, package in data.packages.items()
+        if package_id not in infeasible_ids
+    ]
+    home_depots = sorted({vehicle.depot for vehicle in data.vehicles.values()})
+    stops = sorted(
+        {package.address.street for package in packages}
+        | {package.origin_depot for package in packages},
+    )
+    stops = [street for street in stops if street not in home_depots]
+    if not stops or not home_depots:
+        return MileageBound(0.0, len(packages))
+
+    address_codes = data.address_codes
+    codes = np.array(
+        [address_codes[street] for street in home_depots + stops],
+        dtype=np.int64,
+    )
+    from_codes, to_codes = np.meshgrid(codes, codes, indexing="ij")
+    miles = data.leg_miles(from_codes.ravel(), to_codes.ravel()).reshape(
+        len(codes),
+        len(codes),
+    )
+    miles = shortest_path_closure(np.minimum(miles, miles.T))
+    depot_miles = miles[: len(home_depots), len(home_depots) :].min(axis=0)
+    stop_miles = miles[len(home_depots) :, len(home_depots) :]
+
+    min_tour_count = 1
+    radial_miles = 0.0
+    if all(package.origin_depot in home_depots for package in packages):
+        capacity = max(
+            max(vehicle.package_capacity for vehicle in data.vehicles.values()),
+            1,
+        )
+        stop_indices = {street: index for index, street in enumerate(stops)}
+        delivery_indices = np.array(
+            [
+                stop_indices[package.address.street]
+                for package in packages
+                if package.address.street in stop_indices
+            ],
+            dtype=np.int64,
+        )
+        min_tour_count = max(-(-len(np.unique(delivery_indices)) // capacity), 1)
+        radial_miles = 2 * float(depot_miles[delivery_indices].sum()) / capacity
+    tour_miles = tour_lower_bound(depot_miles, stop_miles, min_tour_count)
+    return MileageBound(max(tour_miles, radial_miles, 0.0), len(packages))
+
+
+def shortest_path_closure(miles: np.ndarray) -> np.ndarray:
+    """Floyd-Warshall over the given addresses only."""
+    miles = miles.copy()
+    for via in range(len(miles)):
+        np.minimum(miles, miles[:, via, None] + miles[None, via, :], out=miles)
+    return miles
+
+
+def tour_lower_bound(
+    depot_miles: np.ndarray,
+    stop_miles: np.ndarray,
+    min_tour_count: int = 1,
+) -> float:
+    """Bound tours from one depot that visit each stop once, by subgradient ascent.
+
+    Without the depot, tours are paths: a spanning forest of the stops with
+    one tree per tour. Each tour adds two depot edges. For node penalties
+    the cheapest such structure, over at least min_tour_count tours, is the
+    minimum spanning tree without its k - 1 longest edges plus the 2k
+    cheapest depot edges. Penalties then move stop degrees towards two.
+    """
+    stop_count = len(depot_miles)
+    penalties = np.zeros(stop_count)
+    step_scale = 2.0
+    upper_bound = nearest_neighbor_miles(depot_miles, stop_miles)
+    best_bound = -np.inf
+    iterations_since_best = 0
+    started = time.monotonic()
+    for _ in range(MAX_BOUND_ITERATIONS):
+        bound, degrees = penalized_k_tree(
+            depot_miles,
+            stop_miles,
+            penalties,
+            min_tour_count,
+        )
+        if bound > best_bound + 1e-9:
+            best_bound = bound
+            iterations_since_best = 0
+        else:
+            iterations_since_best += 1
+            if iterations_since_best >= STEP_PATIENCE:
+                step_scale /= 2
+                iterations_since_best = 0
+        subgradient = 2 - degrees
+        norm = float(subgradient @ subgradient)
+        if (
+            norm == 0
+            or step_scale < MIN_STEP_SCALE
+            or time.monotonic() - started > MAX_BOUND_SECONDS
+        ):
+            break
+        penalties += step_scale * max(upper_bound - bound, 0.0) / norm * subgradient
+    return float(best_bound)
+
+
+def penalized_k_tree(
+    depot_miles: np.ndarray,
+    stop_miles: np.ndarray,
+    penalties: np.ndarray,
+    min_tour_count: int = 1,
+) -> tuple[float, np.ndarray]:
+    """The Lagrangian bound for the penalties and the stop degrees it uses."""
+    stop_count = len(depot_miles)
+    costs = stop_miles - penalties[:, None] - penalties[None, :]
+    parents, edge_costs = minimum_spanning_tree(costs)
+    # Dropping the k - 1 longest tree edges leaves k paths.
+    tree_order = np.argsort(-edge_costs)
+    dropped_savings = np.concatenate(([0.0], np.cumsum(edge_costs[tree_order])))
+    # Every stop may take one or two depot edges.
+    depot_costs = np.repeat(depot_miles - penalties, 2)
+    depot_order = np.argsort(depot_costs)
+    depot_sums = np.cumsum(depot_costs[depot_order])
+    tour_counts = np.arange(min(min_tour_count, stop_count), stop_count + 1)
+    totals = (
+        edge_costs.sum()
+        - dropped_savings[tour_counts - 1]
+        + depot_sums[2 * tour_counts - 1]
+    )
+    tour_count = int(tour_counts[np.argmin(totals)])
+
+    degrees = np.zeros(stop_count, dtype=np.int64)
+    kept_edges = tree_order[tour_count - 1 :]
+    np.add.at(degrees, kept_edges + 1, 1)
+    np.add.at(degrees, parents[kept_edges + 1], 1)
+    np.add.at(degrees, depot_order[: 2 * tour_count] // 2, 1)
+    return float(totals.min() + 2 * penalties.sum()), degrees
+
+
+def minimum_spanning_tree(costs: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Prim's algorithm on a dense matrix.
+
+    Returns each node's parent and, for nodes 1 and on, the cost of the edge
+    to it, so edge i joins nodes i + 1 and parents[i + 1].
+    """
+    node_count = len(costs)
+    parents = np.zeros(node_count, dtype=np.int64)
+    edge_costs = np.zeros(max(node_count - 1, 0))
+    in_tree = np.zeros(node_count, dtype=bool)
+    in_tree[0] = True
+    distances = costs[0].copy()
+    for _ in range(node_count - 1):
+        node = int(np.argmin(np.where(in_tree, np.inf, distances)))
+        in_tree[node] = True
+        edge_costs[node - 1] = distances[node]
+        closer = ~in_tree & (costs[node] < distances)
+        distances[closer] = costs[node][closer]
+        parents[closer] = node
+    return parents, edge_costs
+
+
+def nearest_neighbor_miles(depot_miles: np.ndarray, stop_miles: np.ndarray) -> float:
+    """Length of one tour that always drives to the closest unvisited stop."""
+    visited = np.zeros(len(depot_miles), dtype=bool)
+    node = int(np.argmin(depot_miles))
+    miles = float(depot_miles[node])
+    visited[node] = True
+    for _ in range(len(depot_miles) - 1):
+        next_node = int(np.argmin(np.where(visited, np.inf, stop_miles[node])))
+        miles += float(stop_miles[node, next_node])
+        visited[next_node] = True
+        node = next_node
+    return miles + float(depot_miles[node])
+
+
+class GapMonitor:
+    """Finish the search once the incumbent is within the target gap of the bound.
+
+    Registered as a solution callback. Incumbents are only compared once
+    the bound is ready, and only when they deliver every package it covers.
+    """
+
+    def __init__(
+        self,
+        data: models.DataModel,
+        manager: pywrapcp.RoutingIndexManager,
+        router: pywrapcp.RoutingModel,
+        mileage_bound: concurrent.futures.Future[MileageBound],
+        target_gap: float,
+    ) -> None:
+        self.data = data
+        self.manager = manager
+        self.router = router
+        self.mileage_bound = mileage_bound
+        self.target_gap = target_gap
+        self.is_reached = False
+
+    def __call__(self) -> None:
+        if not self.mileage_bound.done() or self.mileage_bound.exception():
+            return
+        bound = self.mileage_bound.result()
+        miles = 0.0
+        delivered_count = 0
+        for vehicle_index in range(self.router.vehicles()):
+            index = self.router.Start(vehicle_index)
+            node_indices = [self.manager.IndexToNode(index)]
+            while not self.router.IsEnd(index):
+                index = self.router.NextVar(index).Value()
+                node_indices.append(self.manager.IndexToNode(index))
+            address_codes = self.data.node_address_codes[node_indices]
+            miles += float(
+                self.data.leg_miles(address_codes[:-1], address_codes[1:]).sum(),
+            )
+            delivered_count += int(
+                (self.data.node_kind_codes[node_indices] < 0).sum(),
+            )
+        if (
+            delivered_count >= bound.package_count
+            and miles - bound.miles <= self.target_gap * miles
+        ):
+            self.is_reached = True
+            self.router.solver().FinishCurrentSearch()
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import collections
+import math
+import time
+from collections.abc import Sequence
+from typing import NamedTuple
+
+import numpy as np
+from ortools.constraint_solver import pywrapcp
+
+from delivery_route_planner.models import models
+from delivery_route_planner.screening import screening
+
+MIN_TIME_BUDGET_SECONDS = 5
+MAX_TIME_BUDGET_SECONDS = 600
+# Budgets leave room beyond the predicted time to converge.
+BUDGET_SAFETY_FACTOR = 1.5
+STALL_WINDOW_SHARE = 0.25
+MIN_STALL_WINDOW_SECONDS = 3.0
+STALL_IMPROVEMENT_SHARE = 0.002
+
+
+class InstanceFeatures(NamedTuple):
+    node_count: int
+    vehicle_count: int
+    # Mean share of the day that a package's delivery window rules out.
+    window_tightness: float
+    pinned_ratio: float
+    linked_ratio: float
+
+    @classmethod
+    def from_data(cls, data: models.DataModel) -> InstanceFeatures:
+        windows = screening.compute_package_windows(data)
+        day_seconds = max(
+            data.scenario.day_start.duration_until(data.scenario.day_end),
+            1,
+        )
+        package_count = max(len(data.packages), 1)
+        widths = np.array(
+            [
+                window.latest_delivery - window.earliest_delivery
+                for window in windows.values()
+            ],
+            dtype=np.float64,
+        )
+        return cls(
+            node_count=len(data.nodes),
+            vehicle_count=len(data.vehicles),
+            window_tightness=(
+                float(np.clip(1 - widths / day_seconds, 0, 1).mean())
+                if len(widths)
+                else 0.0
+            ),
+            pinned_ratio=sum(
+                bool(package.vehicle_requirement) for package in data.packages.values()
+            )
+            / package_count,
+            linked_ratio=sum(len(bundle) for bundle in screening.find_bundles(data))
+            / package_count,
+        )
+
+    def design_row(self) -> np.ndarray:
+        return np.array(
+            [
+                1.0,
+                math.log(max(self.node_count, 1)),
+                math.log(max(self.vehicle_count, 1)),
+                self.window_tightness,
+                self.pinned_ratio,
+                self.linked_ratio,
+            ],
+        )
+
+
+class RuntimeModel(NamedTuple):
+    """Log-linear model of the seconds a search needs to converge."""
+
+    coefficients: tuple[float, ...]
+
+    @classmethod
+    def fit(
+        cls,
+        features: Sequence[InstanceFeatures],
+        seconds: Sequence[float],
+    ) -> RuntimeModel:
+        design = np.array([feature.design_row() for feature in features])
+        targets = np.log(np.maximum(np.asarray(seconds, dtype=np.float64), 0.1))
+        coefficients, *_ = np.linalg.lstsq(design, targets, rcond=None)
+        return cls(tuple(round(float(value), 4) for value in coefficients))
+
+    def predict_seconds(self, features: InstanceFeatures) -> float:
+        return math.exp(float(features.design_row() @ np.array(self.coefficients)))
+
+
+# Fitted with benchmarks/time_budget.py --seconds 60 on generated days of 20
+# to 300 packages.
+DEFAULT_RUNTIME_MODEL = RuntimeModel((-0.2776, 0.0533, 1.2688, 2.5959, 2.1512, 7.5019))
+
+
+def choose_time_budget(
+    data: models.DataModel,
+    model: RuntimeModel = DEFAULT_RUNTIME_MODEL,
+) -> int:
+    """Seconds to search the day, capped by the configured time limit."""
+    predicted = model.predict_seconds(InstanceFeatures.from_data(data))
+    cap = data.settings.solver_time_limit_seconds or MAX_TIME_BUDGET_SECONDS
+    return int(
+        min(max(math.ceil(predicted * BUDGET_SAFETY_FACTOR), MIN_TIME_BUDGET_SECONDS), cap),
+    )
+
+
+class StallMonitor:
+    """Finish the search once the best objective stops improving.
+
+    Registered as a solution callback. The best objective of each solution
+    is kept over a sliding window, a quarter of the budget long, and the
+    search finishes when it improved by less than STALL_IMPROVEMENT_SHARE
+    over the whole window.
+    """
+
+    def __init__(self, router: pywrapcp.RoutingModel, time_budget_seconds: int) -> None:
+        self.router = router
+        self.window_seconds = max(
+            time_budget_seconds * STALL_WINDOW_SHARE,
+            MIN_STALL_WINDOW_SECONDS,
+        )
+        self.started = time.monotonic()
+        self.best_objectives: collections.deque[tuple[float, int]] = collections.deque()
+        self.is_stalled = False
+
+    def __call__(self) -> None:
+        now = time.monotonic() - self.started
+        objective = self.router.CostVar().Value()
+        if self.best_objectives:
+            objective = min(objective, self.best_objectives[-1][1])
+        self.best_objectives.append((now, objective))
+        while (
+            len(self.best_objectives) > 1
+            and self.best_objectives[1][0] <= now - self.window_seconds
+        ):
+            self.best_objectives.popleft()
+        window_start, window_objective = self.best_objectives[0]
+        if (
+            window_start <= now - self.window_seconds
+            and window_objective - objective <= STALL_IMPROVEMENT_SHARE * window_objective
+        ):
+            self.is_stalled = True
+            self.router.solver().FinishCurrentSearch()
@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, NamedTuple
+
+import numpy as np
+
+from delivery_route_planner.models import models
+
+MAX_PIE_SECTIONS = 6
+BAR_CHART_BAR_BUDGET = 60
+LINE_CHART_WIDTH = 1200
+LINE_CHART_POINT_BUDGET = LINE_CHART_WIDTH * 2
+MIN_LINE_POINTS_PER_SERIES = 32
+RENDER_FORMATS = ("png", "svg")
+
+
+class PieSlice(NamedTuple):
+    label: str
+    value: float
+    share: float
+    vehicle_id: int | None
+
+
+class Series(NamedTuple):
+    vehicle_id: int
+    x: np.ndarray
+    y: np.ndarray
+
+
+@dataclass
+class ChartData:
+    mileage_slices: list[PieSlice]
+    time_slices: list[PieSlice]
+    load_series: list[Series]
+    capacities: dict[int, int]
+    mileage_series: list[Series]
+    day_start_seconds: int
+    end_seconds: int
+    max_mileage: float
+
+
+def build_chart_data(
+    solution: models.Solution,
+    max_pie_sections: int = MAX_PIE_SECTIONS,
+    bar_budget: int = BAR_CHART_BAR_BUDGET,
+    line_point_budget: int = LINE_CHART_POINT_BUDGET,
+) -> ChartData:
+    """Compute every chart series once, downsampled to what the charts can show."""
+    routes = solution.routes
+    points_per_series = max(
+        MIN_LINE_POINTS_PER_SERIES,
+        line_point_budget // max(len(routes), 1),
+    )
+    load_series = []
+    mileage_series = []
+    for route in routes:
+        group_ends = route.stop_groups().ends
+        bar_ends = group_ends[:-1]
+        steps = np.arange(1, len(bar_ends) + 1)
+        keep = downsample_peaks(route.vehicle_loads[bar_ends], bar_budget)
+        load_series.append(
+            Series(route.vehicle.id, steps[keep], route.vehicle_loads[bar_ends][keep]),
+        )
+        times = route.visit_seconds[group_ends] % models.SECONDS_PER_DAY
+        mileages = route.mileages[group_ends]
+        keep = largest_triangle_three_buckets(times, mileages, points_per_series)
+        mileage_series.append(Series(route.vehicle.id, times[keep], mileages[keep]))
+
+    return ChartData(
+        mileage_slices=group_pie_slices(
+            {route.vehicle.id: route.mileage for route in routes},
+            max_pie_sections,
+        ),
+        time_slices=group_pie_slices(
+            {route.vehicle.id: route.time_used_seconds for route in routes},
+            max_pie_sections,
+        ),
+        load_series=load_series,
+        capacities={route.vehicle.id: route.vehicle.package_capacity for route in routes},
+        mileage_series=mileage_series,
+        day_start_seconds=solution.data.scenario.day_start.seconds,
+        end_seconds=solution.end_time.seconds,
+        max_mileage=max((route.mileage for route in routes), default=0.0),
+    )
+
+
+def group_pie_slices(values: dict[int, float], max_sections: int) -> list[PieSlice]:
+    """One slice per vehicle, folding the smallest into one slice past the limit."""
+    total = sum(values.values())
+    ranked = sorted(values.items(), key=lambda item: item[1], reverse=True)
+    if len(ranked) > max_sections:
+        shown, folded = ranked[: max_sections - 1], ranked[max_sections - 1 :]
+    else:
+        shown, folded = ranked, []
+    slices = [
+        PieSlice(
+            f"Vehicle {vehicle_id}",
+            value,
+            value / total if total else 0.0,
+            vehicle_id,
+        )
+        for vehicle_id, value in sorted(shown)
+    ]
+    if folded:
+        folded_value = sum(value for _, value in folded)
+        slices.append(
+            PieSlice(
+                f"{len(folded)} other vehicles",
+                folded_value,
+                folded_value / total if total else 0.0,
+                None,
+            ),
+        )
+    return slices
+
+
+def downsample_peaks(values: np.ndarray, budget: int) -> np.ndarray:
+    """Indices of the largest value in each of `budget` equal buckets."""
+    if len(values) <= budget:
+        return np.arange(len(values))
+    edges = np.linspace(0, len(values), budget + 1).astype(np.int64)
+    return np.array(
+        [
+            start + int(np.argmax(values[start:end]))
+            for start, end in zip(edges[:-1], edges[1:])
+        ],
+        dtype=np.int64,
+    )
+
+
+def largest_triangle_three_buckets(
+    x: np.ndarray,
+    y: np.ndarray,
+    threshold: int,
+) -> np.ndarray:
+    """Indices kept by Largest-Triangle-Three-Buckets, which preserves line shape."""
+    count = len(x)
+    if threshold >= count or threshold < 3:
+        return np.arange(count)
+    x = x.astype(np.float64)
+    y = y.astype(np.float64)
+    edges = np.linspace(1, count - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    anchor = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else count
+        next_x = x[end:next_end].mean()
+        next_y = y[end:next_end].mean()
+        areas = np.abs(
+            (x[anchor] - next_x) * (y[start:end] - y[anchor])
+            - (x[anchor] - x[start:end]) * (next_y - y[anchor]),
+        )
+        anchor = start + int(np.argmax(areas))
+        selected[bucket + 1] = anchor
+    selected[-1] = count - 1
+    return selected
+
+
+def duration_label(seconds: int, separator: str = "\n") -> str:
+    hours = seconds // 3600
+    minutes = (seconds % 3600) // 60
+    hour_str = "hour" if hours == 1 else "hours"
+    minute_str = "minute" if minutes == 1 else "minutes"
+    return f"{hours} {hour_str} and{separator}{minutes} {minute_str}"
+
+
+def is_rendering_available() -> bool:
+    try:
+        import matplotlib  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def render_charts(chart_data: ChartData, path: Path) -> int:
+    """Draw every chart into one PNG or SVG file without a display; returns the chart count."""
+    import matplotlib
+
+    matplotlib.use("Agg")
+    from matplotlib import pyplot
+
+    load_columns = 3
+    load_rows = -(-len(chart_data.load_series) // load_columns)
+    figure = pyplot.figure(figsize=(15, 10 + 3 * load_rows), layout="constrained")
+    grid = figure.add_gridspec(2 + load_rows, load_columns * 2)
+
+    for column, (title, slices) in enumerate(
+        (
+            ("Vehicle Utilization by Mileage", chart_data.mileage_slices),
+            ("Vehicle Utilization by Time", chart_data.time_slices),
+        ),
+    ):
+        axes = figure.add_subplot(grid[0, column * load_columns : (column + 1) * load_columns])
+        axes.set_title(title)
+        if not any(pie_slice.value > 0 for pie_slice in slices):
+            axes.set_axis_off()
+            continue
+        axes.pie(
+            [max(pie_slice.value, 0) for pie_slice in slices],
+            labels=[
+                f"{pie_slice.label}\n{round(pie_slice.share * 100, 1)}%"
+                for pie_slice in slices
+            ],
+            startangle=180,
+        )
+
+    axes = figure.add_subplot(grid[1, :])
+    for series in chart_data.mileage_series:
+        axes.plot(series.x, series.y, label=f"Vehicle {series.vehicle_id}")
+    ticks = range(chart_data.day_start_seconds, chart_data.end_seconds + 1, 1800)
+    axes.set_xticks(
+        list(ticks),
+        [models.RoutingTime.from_seconds(tick).short_str for tick in ticks],
+        rotation=45,
+    )
+    axes.set_title("Mileage Over Time")
+    axes.set_ylabel("Mileage")
+    if len(chart_data.mileage_series) <= MAX_PIE_SECTIONS * 2:
+        axes.legend()
+
+    for position, series in enumerate(chart_data.load_series):
+        row, column = divmod(position, load_columns)
+        axes = figure.add_subplot(grid[2 + row, column * 2 : column * 2 + 2])
+        axes.bar(series.x, series.y)
+        axes.axhline(chart_data.capacities[series.vehicle_id], linestyle="--", color="red")
+        axes.set_title(f"Load vs Capacity: Vehicle {series.vehicle_id}")
+        axes.set_xlabel("Route Steps")
+        axes.set_ylabel("Number of Packages")
+
+    figure.savefig(path, format=path.suffix.lstrip(".").lower())
+    pyplot.close(figure)
+    return 3 + len(chart_data.load_series)
+
+
+def export_charts(
+    solution: models.Solution,
+    path: Path,
+    progress: Callable[[float], None] | None = None,
+) -> int:
+    chart_count = render_charts(build_chart_data(solution), path)
+    if progress:
+        progress(1.0)
+    return chart_count
@@ -1,5 +1,26 @@
+from typing import TYPE_CHECKING, Any
+
+from .lazy_view import LazyView
 from .navigation_manager import NavigationManager
 from .title_bar import TitleBar
 from .window_manager import WindowManager
 
-__all__ = ["NavigationManager", "TitleBar", "WindowManager"]
+if TYPE_CHECKING:
+    from .export_manager import ExportManager
+
+__all__ = [
+    "ExportManager",
+    "LazyView",
+    "NavigationManager",
+    "TitleBar",
+    "WindowManager",
+]
+
+
+def __getattr__(name: str) -> Any:
+    # Only the result views export, so export and validation load on first use.
+    if name == "ExportManager":
+        from .export_manager import ExportManager
+
+        return ExportManager
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,115 @@
+import logging
+from pathlib import Path
+from typing import Callable, Sequence
+
+import flet as ft
+
+from delivery_route_planner.export import export
+
+
+class ExportManager:
+    def __init__(
+        self,
+        page: ft.Page,
+        dialog_title: str,
+        file_name: str,
+        export_callback: Callable[[Path, export.ProgressCallback], int],
+        allowed_extensions: Sequence[str] | None = None,
+        item_name: str = "rows",
+    ) -> None:
+        self.page = page
+        self.dialog_title = dialog_title
+        self.file_name = file_name
+        self.export_callback = export_callback
+        self.allowed_extensions = (
+            list(allowed_extensions)
+            if allowed_extensions is not None
+            else [
+                export_format.value
+                for export_format in export.ExportFormat
+                if export_format.is_available
+            ]
+        )
+        self.item_name = item_name
+        self.file_picker = ft.FilePicker(on_result=self.file_selected)
+        self.progress_bar = ft.ProgressBar(value=0, border_radius=5)
+        self.progress_dialog = ft.AlertDialog(
+            title=ft.Text("Saving file"),
+            content=ft.Column(
+                [ft.Text(f"Writing {item_name} to disk..."), self.progress_bar],
+                tight=True,
+            ),
+            modal=True,
+        )
+        self.last_progress = 0.0
+
+    def open(self) -> None:
+        if self.file_picker not in self.page.overlay:
+            self.page.overlay.append(self.file_picker)
+            self.page.update()
+        self.file_picker.save_file(
+            dialog_title=self.dialog_title,
+            file_name=self.file_name,
+            allowed_extensions=self.allowed_extensions,
+        )
+
+    def file_selected(self, e: ft.FilePickerResultEvent) -> None:
+        if not e.path:
+            return
+        path = Path(e.path)
+        if not path.suffix:
+            path = path.with_suffix(Path(self.file_name).suffix)
+        self.progress_bar.value = 0
+        self.last_progress = 0.0
+        self.page.open(self.progress_dialog)
+        self.page.run_thread(self.run_export, path)
+
+    def run_export(self, path: Path) -> None:
+        try:
+            item_count = self.export_callback(path, self.update_progress)
+        except Exception as e:
+            if isinstance(e, (KeyboardInterrupt, SystemExit)):
+                raise
+            logging.exception("The file could not be saved.")
+            result_dialog = self.build_result_dialog(
+                ft.Icon(name=ft.icons.ERROR_OUTLINE_ROUNDED, color=ft.colors.ERROR),
+                ft.Text("File not saved", color=ft.colors.ERROR),
+                f"{path.name} could not be written.\nPlease try another location "
+                "or file type.",
+            )
+        else:
+            result_dialog = self.build_result_dialog(
+                ft.Icon(name=ft.icons.CHECK_CIRCLE_ROUNDED),
+                ft.Text("File saved"),
+                f"{item_count} {self.item_name} were written to {path.name}.",
+            )
+        self.page.close(self.progress_dialog)
+        self.page.open(result_dialog)
+        self.page.update()
+
+    def update_progress(self, fraction: float) -> None:
+        if fraction - self.last_progress < 0.01 and fraction < 1:
+            return
+        self.last_progress = fraction
+        self.progress_bar.value = fraction
+        self.page.update()
+
+    def build_result_dialog(
+        self,
+        icon: ft.Icon,
+        title: ft.Text,
+        message: str,
+    ) -> ft.AlertDialog:
+        result_dialog = ft.AlertDialog(
+            icon=icon,
+            title=title,
+            content=ft.Text(message),
+            actions=[
+                ft.FilledTonalButton(
+                    text="Okay",
+                    on_click=lambda _: self.page.close(result_dialog),
+                ),
+            ],
+            actions_alignment=ft.MainAxisAlignment.END,
+        )
+        return result_dialog
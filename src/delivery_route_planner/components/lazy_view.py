@@ -0,0 +1,48 @@
+from typing import Any
+
+import flet as ft
+
+
+class LazyView:
+    """Builds the wrapped view the first time it is rendered or used.
+
+    A solution set before then is kept and handed to the view once it is built.
+    """
+
+    def __init__(self, view_class: type, *args: Any, **kwargs: Any) -> None:
+        self.view_class = view_class
+        self.args = args
+        self.kwargs = kwargs
+        self.title = view_class.title
+        self.icon = view_class.icon
+        self.selected_icon = view_class.selected_icon
+        self.disabled = view_class.disabled
+        self._view = None
+        self._solution = None
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.view, name)
+
+    @property
+    def view(self) -> Any:
+        if self._view is None:
+            self._view = self.view_class(*self.args, **self.kwargs)
+            if self._solution is not None:
+                self._view.set_solution(self._solution)
+                self._solution = None
+        return self._view
+
+    @property
+    def is_built(self) -> bool:
+        return self._view is not None
+
+    def set_solution(self, solution: Any) -> None:
+        if self._view is None:
+            self._solution = solution
+        else:
+            self._view.set_solution(solution)
+
+    def render(self) -> ft.Control:
+        return self.view.render()
@@ -1,4 +1,5 @@
 import base64
+import functools
 from pathlib import Path
 from typing import Callable, NamedTuple
 
@@ -9,8 +10,17 @@ from delivery_route_planner.models import models
 LOTTIE_FILE = "src/delivery_route_planner/assets/animations/routing-loading.json"
 
 
+@functools.cache
+def load_lottie_base64() -> str:
+    """Read and encode the loading animation once per process."""
+    with Path(LOTTIE_FILE).open(encoding="utf-8") as lottie_file:
+        json_data = lottie_file.read()
+    return base64.b64encode(json_data.encode("utf-8")).decode("utf-8")
+
+
 class _SolutionDialogs(NamedTuple):
     progress: ft.AlertDialog
+    preview_progress: ft.SnackBar
     success: ft.AlertDialog
     failure: ft.AlertDialog
 
@@ -21,12 +31,15 @@ class NavigationManager:
         page: ft.Page,
         data: models.DataModel,
         solution_callback: Callable,
+        preview_callback: Callable | None = None,
     ) -> None:
         self.page = page
         self.data = data
         self.solution_callback = solution_callback
+        self.preview_callback = preview_callback
         self.views = {}
         self.view_names = []
+        self.solver_status_texts = []
         self.destinations = []
         self.navigation_rail = ft.NavigationRail()
         self.view_container = ft.Container(
@@ -101,22 +114,44 @@ class NavigationManager:
     def start_solver(self, _e: ft.ControlEvent) -> None:
         solver_dialogs = self.build_solution_dialogs()
 
-        self.page.open(solver_dialogs.progress)
+        if self.preview_callback and self.preview_callback():
+            # Show the quick plan while the search improves it in the background.
+            self.enable_view("routes")
+            self.navigate_from_view_name("routes")
+            progress = solver_dialogs.preview_progress
+        else:
+            progress = solver_dialogs.progress
+        self.page.open(progress)
         solver_successful = self.solution_callback()
 
         self.page.window.minimized = False
         self.page.window.to_front()
-        self.page.close(solver_dialogs.progress)
+        self.page.close(progress)
         if solver_successful:
             self.enable_view("routes")
             self.enable_view("validation")
             self.enable_view("charts")
+            self.refresh_view()
             self.page.open(solver_dialogs.success)
         else:
             self.page.open(solver_dialogs.failure)
 
         self.page.update()
 
+    def show_solver_status(self, message: str) -> None:
+        for status_text in self.solver_status_texts:
+            status_text.value = message
+        self.page.update()
+
+    def show_solver_failure(self, reason: str) -> None:
+        """Explain in the failure dialog why no routes could be created."""
+        self.solver_failure_text.value = f"Routes could not be created:\n{reason}."
+
+    def refresh_view(self) -> None:
+        selected_view_name = self.view_names[self.navigation_rail.selected_index]
+        self.view_container.content = self.views[selected_view_name].render()
+        self.page.update()
+
     def enable_view(self, name: str) -> None:
         for i, view_name in enumerate(self.view_names):
             if view_name == name and self.navigation_rail.destinations:
@@ -124,27 +159,38 @@ class NavigationManager:
         self.page.update()
 
     def build_solution_dialogs(self) -> _SolutionDialogs:
-        with Path(LOTTIE_FILE).open(encoding="utf-8") as lottie_file:
-            json_data = lottie_file.read()
-            json_base64 = base64.b64encode(json_data.encode("utf-8")).decode("utf-8")
         loading_animation = ft.Lottie(
-            src_base64=json_base64,
+            src_base64=load_lottie_base64(),
             fit=ft.ImageFit.SCALE_DOWN,
             background_loading=True,
             width=300,
         )
+        progress_text = ft.Text("Planning delivery routes...")
+        preview_progress_text = ft.Text(
+            "Showing quick routes while better ones are planned...",
+        )
+        self.solver_status_texts = [progress_text, preview_progress_text]
         solver_progress_dialog = ft.AlertDialog(
             title=ft.Text("Please wait"),
             content=ft.Column(
                 [
                     loading_animation,
-                    ft.Text("Planning delivery routes..."),
+                    progress_text,
                     ft.ProgressBar(border_radius=5),
                 ],
                 tight=True,
             ),
             modal=True,
         )
+        solver_preview_progress = ft.SnackBar(
+            ft.Row(
+                [
+                    ft.ProgressRing(width=16, height=16, stroke_width=2),
+                    preview_progress_text,
+                ],
+            ),
+            duration=models.SECONDS_PER_DAY * 1000,
+        )
         solver_success_dialog = ft.AlertDialog(
             icon=ft.Icon(name=ft.icons.CHECK_CIRCLE_ROUNDED),
             title=ft.Text("Solution found"),
@@ -160,12 +206,13 @@ class NavigationManager:
             ],
             actions_alignment=ft.MainAxisAlignment.END,
         )
+        self.solver_failure_text = ft.Text(
+            "Routes could not be created.\nPlease adjust settings and try again.",
+        )
         solver_failure_dialog = ft.AlertDialog(
             icon=ft.Icon(name=ft.icons.ERROR_OUTLINE_ROUNDED, color=ft.colors.ERROR),
             title=ft.Text("Solution not found", color=ft.colors.ERROR),
-            content=ft.Text(
-                "Routes could not be created.\nPlease adjust settings and try again.",
-            ),
+            content=self.solver_failure_text,
             actions=[
                 ft.FilledTonalButton(
                     text="Okay",
@@ -176,6 +223,7 @@ class NavigationManager:
         )
         return _SolutionDialogs(
             solver_progress_dialog,
+            solver_preview_progress,
             solver_success_dialog,
             solver_failure_dialog,
         )
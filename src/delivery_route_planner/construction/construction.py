@@ -0,0 +1,422 @@
+from __future__ import annotations
+
+import copy
+from dataclasses import dataclass, field
+from typing import NamedTuple
+
+import numpy as np
+
+from delivery_route_planner.models import models
+from delivery_route_planner.screening import screening
+
+DEPOT = -1
+
+
+class InsertionProblem(NamedTuple):
+    """Routable packages as arrays indexed by package position.
+
+    Home depots take the first street codes. Times are seconds after the
+    day start.
+    """
+
+    package_ids: list[int]
+    depot_codes: dict[str, int]
+    street_codes: np.ndarray
+    earliest_pickup: np.ndarray
+    latest_pickup: np.ndarray
+    earliest_delivery: np.ndarray
+    latest_delivery: np.ndarray
+    miles: np.ndarray
+    seconds: dict[int, np.ndarray]
+    day_seconds: int
+    max_miles: float
+
+
+@dataclass
+class RouteDraft:
+    """One vehicle's deliveries by package position, with DEPOT where each trip starts.
+
+    All pickups of a trip happen at its starting visit to the vehicle's
+    depot, and the last DEPOT is the return at the end of the day.
+    """
+
+    vehicle: models.Vehicle
+    depot_code: int = 0
+    stops: list[int] = field(default_factory=lambda: [DEPOT, DEPOT])
+    streets: np.ndarray = field(init=False, repr=False)
+    trip_starts: np.ndarray = field(init=False, repr=False)
+    trip_loads: np.ndarray = field(init=False, repr=False)
+    times: np.ndarray = field(init=False, repr=False)
+    latest_times: np.ndarray = field(init=False, repr=False)
+    miles: float = field(init=False, repr=False)
+
+    def update(self, problem: InsertionProblem) -> None:
+        """Recompute earliest visit times and the latest times that keep later stops on time."""
+        stops = np.array(self.stops)
+        is_depot = stops == DEPOT
+        packages = stops[~is_depot]
+        trip_ids = np.cumsum(is_depot) - 1
+        depot_positions = np.flatnonzero(is_depot)
+        self.trip_starts = depot_positions[trip_ids]
+        self.trip_loads = np.bincount(
+            trip_ids[~is_depot],
+            minlength=len(depot_positions),
+        )[trip_ids]
+        self.streets = np.full(len(stops), self.depot_code, dtype=np.int64)
+        self.streets[~is_depot] = problem.street_codes[packages]
+
+        earliest = np.zeros(len(stops), dtype=np.int64)
+        latest = np.full(len(stops), problem.day_seconds, dtype=np.int64)
+        earliest[~is_depot] = problem.earliest_delivery[packages]
+        latest[~is_depot] = problem.latest_delivery[packages]
+        trip_earliest = np.zeros(len(depot_positions), dtype=np.int64)
+        trip_latest = np.full(len(depot_positions), problem.day_seconds, dtype=np.int64)
+        np.maximum.at(trip_earliest, trip_ids[~is_depot], problem.earliest_pickup[packages])
+        np.minimum.at(trip_latest, trip_ids[~is_depot], problem.latest_pickup[packages])
+        earliest[is_depot] = trip_earliest
+        latest[is_depot] = trip_latest
+
+        legs = problem.seconds[self.vehicle.id][self.streets[:-1], self.streets[1:]]
+        times = earliest.tolist()
+        for position, leg in enumerate(legs.tolist(), 1):
+            times[position] = max(times[position - 1] + leg, times[position])
+        latest_times = latest.tolist()
+        for position in range(len(legs) - 1, -1, -1):
+            latest_times[position] = min(
+                latest_times[position],
+                latest_times[position + 1] - int(legs[position]),
+            )
+        self.times = np.array(times, dtype=np.int64)
+        self.latest_times = np.array(latest_times, dtype=np.int64)
+        self.miles = float(
+            problem.miles[self.streets[:-1], self.streets[1:]].sum(),
+        )
+
+    def insertion_costs(
+        self,
+        problem: InsertionProblem,
+        packages: np.ndarray,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Cheapest feasible added miles per package and the gap it goes into.
+
+        Gap g inserts a delivery after stop g. The gap after the last stop
+        starts a new trip at the end of the route instead.
+        """
+        seconds = problem.seconds[self.vehicle.id]
+        streets = problem.street_codes[packages][:, np.newaxis]
+        earliest_pickup = problem.earliest_pickup[packages][:, np.newaxis]
+        latest_pickup = problem.latest_pickup[packages][:, np.newaxis]
+        earliest_delivery = problem.earliest_delivery[packages][:, np.newaxis]
+        latest_delivery = problem.latest_delivery[packages][:, np.newaxis]
+
+        before, after = self.streets[:-1], self.streets[1:]
+        starts = self.trip_starts[:-1]
+        departures = np.maximum(self.times[starts], earliest_pickup)
+        arrivals = np.maximum(
+            self.times[:-1] + departures - self.times[starts] + seconds[before, streets],
+            earliest_delivery,
+        )
+        feasible = (
+            (self.trip_loads[:-1] < self.vehicle.package_capacity)
+            & (departures <= np.minimum(self.latest_times[starts], latest_pickup))
+            & (arrivals <= latest_delivery)
+            & (arrivals + seconds[streets, after] <= self.latest_times[1:])
+        )
+        costs = (
+            problem.miles[before, streets]
+            + problem.miles[streets, after]
+            - problem.miles[before, after]
+        )
+
+        if len(self.stops) > 2:
+            departures = np.maximum(self.times[-1], earliest_pickup)
+            depot = self.depot_code
+            arrivals = np.maximum(departures + seconds[depot, streets], earliest_delivery)
+            feasible = np.hstack(
+                (
+                    feasible,
+                    (departures <= latest_pickup)
+                    & (arrivals <= latest_delivery)
+                    & (arrivals + seconds[streets, depot] <= problem.day_seconds),
+                ),
+            )
+            costs = np.hstack(
+                (costs, problem.miles[depot, streets] + problem.miles[streets, depot]),
+            )
+
+        costs = np.where(
+            feasible & (self.miles + costs <= problem.max_miles),
+            costs,
+            np.inf,
+        )
+        gaps = np.argmin(costs, axis=1)
+        return costs[np.arange(len(packages)), gaps], gaps
+
+    def insert(self, package: int, gap: int) -> None:
+        if gap == len(self.stops) - 1:
+            self.stops.extend((package, DEPOT))
+        else:
+            self.stops.insert(gap + 1, package)
+
+    def remove(self, package: int) -> None:
+        self.stops.remove(package)
+        self.stops = [
+            stop
+            for position, stop in enumerate(self.stops)
+            if not (stop == DEPOT and position and self.stops[position - 1] == DEPOT)
+        ]
+        if len(self.stops) < 2:
+            self.stops.append(DEPOT)
+
+
+def build_initial_solution(
+    data: models.DataModel,
+    pinned_stops: dict[int, list[tuple[int, int]]] | None = None,
+) -> models.Solution:
+    """Route the packages by regret insertion, in moments rather than a full search.
+
+    Each round inserts the package that would lose the most by waiting: the
+    one whose cheapest vehicle beats its second cheapest by the widest
+    margin, so pinned and nearly pinned packages go first. Linked packages
+    follow the vehicle of the first one inserted, and bundles that cannot be
+    completed are left out. Packages only go to vehicles based at their
+    origin depot.
+
+    pinned_stops maps vehicle ids to routes solved for their pinned
+    packages, as (package id, capacity impact) stops. Those routes start
+    the vehicles' drafts if they keep every window, and the other packages
+    are inserted around them.
+    """
+    data = copy.deepcopy(data)
+    problem = create_insertion_problem(data)
+    package_positions = {
+        package_id: position for position, package_id in enumerate(problem.package_ids)
+    }
+    vehicles = sorted(data.vehicles.values(), key=lambda vehicle: vehicle.index)
+    drafts = [
+        RouteDraft(vehicle, problem.depot_codes[vehicle.depot]) for vehicle in vehicles
+    ]
+    package_count = len(problem.package_ids)
+    allowed = np.array(
+        [
+            [
+                data.packages[package_id].origin_depot == vehicle.depot
+                for vehicle in vehicles
+            ]
+            for package_id in problem.package_ids
+        ],
+        dtype=bool,
+    ).reshape(package_count, len(drafts))
+    for position, package_id in enumerate(problem.package_ids):
+        package = data.packages[package_id]
+        if package.vehicle_requirement:
+            required = allowed[position, package.vehicle_requirement.index]
+            allowed[position] = False
+            allowed[position, package.vehicle_requirement.index] = required
+
+    bundles = {}
+    for bundle in screening.find_bundles(data):
+        if not all(package_id in package_positions for package_id in bundle):
+            # A bundle with an unroutable package cannot be completed.
+            for package_id in bundle:
+                if package_id in package_positions:
+                    allowed[package_positions[package_id]] = False
+            continue
+        positions = [package_positions[package_id] for package_id in bundle]
+        allowed[positions] &= allowed[positions].all(axis=0)
+        for position in positions:
+            bundles[position] = positions
+
+    remaining = np.ones(package_count, dtype=bool)
+    for vehicle_index, draft in enumerate(drafts):
+        stops = (pinned_stops or {}).get(draft.vehicle.id)
+        if not stops:
+            continue
+        for position in seed_draft(draft, problem, stops, package_positions):
+            remaining[position] = False
+            for linked_position in bundles.get(position, ()):
+                allowed[linked_position] = False
+                allowed[linked_position, vehicle_index] = True
+    costs = np.full((package_count, len(drafts)), np.inf)
+    gaps = np.zeros((package_count, len(drafts)), dtype=np.int64)
+    all_packages = np.arange(package_count)
+    for vehicle_index, draft in enumerate(drafts):
+        draft.update(problem)
+        costs[:, vehicle_index], gaps[:, vehicle_index] = draft.insertion_costs(
+            problem,
+            all_packages,
+        )
+
+    while remaining.any():
+        candidates = np.where(allowed & remaining[:, np.newaxis], costs, np.inf)
+        if len(drafts) > 1:
+            cheapest, second_cheapest = np.partition(candidates, 1, axis=1)[:, :2].T
+        else:
+            cheapest, second_cheapest = candidates[:, 0], np.full(package_count, np.inf)
+        insertable = np.flatnonzero(np.isfinite(cheapest))
+        if not len(insertable):
+            break
+        regrets = second_cheapest[insertable] - cheapest[insertable]
+        position = insertable[np.lexsort((cheapest[insertable], -regrets))[0]]
+        vehicle_index = int(np.argmin(candidates[position]))
+
+        draft = drafts[vehicle_index]
+        draft.insert(int(position), int(gaps[position, vehicle_index]))
+        remaining[position] = False
+        for linked_position in bundles.get(position, ()):
+            allowed[linked_position] = False
+            allowed[linked_position, vehicle_index] = True
+        draft.update(problem)
+        unrouted = np.flatnonzero(remaining)
+        costs[unrouted, vehicle_index], gaps[unrouted, vehicle_index] = (
+            draft.insertion_costs(problem, unrouted)
+        )
+
+    for positions in {tuple(positions) for positions in bundles.values()}:
+        if remaining[list(positions)].any():
+            for draft in drafts:
+                for position in positions:
+                    if position in draft.stops:
+                        draft.remove(position)
+                        draft.update(problem)
+
+    node_indices = {
+        (node.package.id, node.kind): node_index
+        for node_index, node in enumerate(data.nodes)
+        if node.package
+    }
+    return models.Solution(
+        data,
+        [create_route(data, problem, node_indices, draft) for draft in drafts],
+    )
+
+
+def seed_draft(
+    draft: RouteDraft,
+    problem: InsertionProblem,
+    stops: list[tuple[int, int]],
+    package_positions: dict[int, int],
+) -> list[int]:
+    """Start the draft with the deliveries and trips of a route, if it stays feasible.
+
+    Returns the positions of the packages placed, none if the route misses
+    a window, a load or the mileage limit.
+    """
+    draft.stops = [DEPOT]
+    for package_id, capacity_impact in stops:
+        if package_id not in package_positions:
+            continue
+        if capacity_impact < 0:
+            draft.stops.append(package_positions[package_id])
+        elif draft.stops[-1] != DEPOT:
+            draft.stops.append(DEPOT)
+    if draft.stops[-1] != DEPOT or len(draft.stops) == 1:
+        draft.stops.append(DEPOT)
+    draft.update(problem)
+    if (
+        (draft.times <= draft.latest_times).all()
+        and (draft.trip_loads <= draft.vehicle.package_capacity).all()
+        and draft.miles <= problem.max_miles
+    ):
+        return [stop for stop in draft.stops if stop != DEPOT]
+    draft.stops = [DEPOT, DEPOT]
+    return []
+
+
+def create_insertion_problem(data: models.DataModel) -> InsertionProblem:
+    windows = screening.compute_package_windows(data)
+    infeasible_packages = screening.find_infeasible_packages(data, windows)
+    packages = [
+        package
+        for package in data.packages.values()
+        if package.id not in infeasible_packages
+    ]
+    depots = list(data.depot_node_indices)
+    streets = depots + sorted(
+        {package.address.street for package in packages} - set(depots),
+    )
+    street_codes = {street: code for code, street in enumerate(streets)}
+    if data.is_sparse:
+        miles = np.array(
+            [
+                [data.addresses[start].distance_map_miles[end] for end in streets]
+                for start in streets
+            ],
+            dtype=np.float64,
+        )
+    else:
+        address_codes = [data.address_codes[street] for street in streets]
+        miles = data.distance_matrix_miles[np.ix_(address_codes, address_codes)]
+
+    def window_column(name: str) -> np.ndarray:
+        return np.array(
+            [getattr(windows[package.id], name) for package in packages],
+            dtype=np.int64,
+        )
+
+    return InsertionProblem(
+        package_ids=[package.id for package in packages],
+        depot_codes={depot: street_codes[depot] for depot in depots},
+        street_codes=np.array(
+            [street_codes[package.address.street] for package in packages],
+            dtype=np.int64,
+        ),
+        earliest_pickup=window_column("earliest_pickup"),
+        latest_pickup=window_column("latest_pickup"),
+        earliest_delivery=window_column("earliest_delivery"),
+        latest_delivery=window_column("latest_delivery"),
+        miles=miles,
+        seconds={
+            # Same truncation as models.travel_seconds.
+            vehicle.id: (miles / vehicle.speed_mph * models.SECONDS_PER_HOUR).astype(
+                np.int64,
+            )
+            for vehicle in data.vehicles.values()
+        },
+        day_seconds=data.scenario.day_start.duration_until(data.scenario.day_end),
+        max_miles=data.settings.max_mileage_per_vehicle,
+    )
+
+
+def create_route(
+    data: models.DataModel,
+    problem: InsertionProblem,
+    package_node_indices: dict[tuple[int, models.NodeKind], int],
+    draft: RouteDraft,
+) -> models.Route:
+    stops = draft.stops
+    times = draft.times.tolist()
+    depot_node_index = data.depot_node_indices[draft.vehicle.depot]
+    node_indices = [depot_node_index]
+    visit_seconds = [times[0]]
+    for position, stop in enumerate(stops[:-1]):
+        if stop == DEPOT:
+            trip_end = stops.index(DEPOT, position + 1)
+            for package_position in stops[position + 1 : trip_end]:
+                node_indices.append(
+                    package_node_indices[
+                        problem.package_ids[package_position],
+                        models.NodeKind.PICKUP,
+                    ],
+                )
+                visit_seconds.append(times[position])
+        else:
+            node_indices.append(
+                package_node_indices[problem.package_ids[stop], models.NodeKind.DELIVERY],
+            )
+            visit_seconds.append(times[position])
+    node_indices.append(depot_node_index)
+    visit_seconds.append(times[-1])
+
+    address_codes = data.node_address_codes[node_indices]
+    route = models.Route.from_columns(
+        draft.vehicle,
+        data,
+        node_indices,
+        data.scenario.day_start.seconds + np.array(visit_seconds, dtype=np.int64),
+        np.concatenate(
+            ([0.0], np.cumsum(data.leg_miles(address_codes[:-1], address_codes[1:]))),
+        ),
+    )
+    route.record_package_visits()
+    return route
@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+import concurrent.futures
+import copy
+import dataclasses
+import itertools
+import math
+import os
+from typing import NamedTuple
+
+import numpy as np
+
+from delivery_route_planner.construction import construction
+from delivery_route_planner.models import models
+from delivery_route_planner.routing import routing
+from delivery_route_planner.screening import screening
+
+
+class DepotGroup(NamedTuple):
+    """Depots whose vehicles and packages do not depend on any other depot."""
+
+    depots: list[str]
+    vehicle_ids: list[int]
+    package_ids: list[int]
+
+
+class DepotRoute(NamedTuple):
+    # (package id, capacity impact) per visited stop, without the start and end.
+    stops: list[tuple[int, int]]
+    visit_seconds: list[int]
+
+
+class DepotSolution(NamedTuple):
+    routes: list[DepotRoute]
+    search_report: models.SearchReport | None
+
+
+def find_depot_groups(data: models.DataModel) -> list[DepotGroup]:
+    """Split the depots into groups that can be solved on their own.
+
+    A package joins its origin depot to the depot of its required vehicle,
+    and linked packages join their origin depots. Groups without vehicles
+    are left out, as are packages that require a vehicle outside the fleet;
+    those packages are missed either way.
+    """
+    packages = [
+        package
+        for package in data.packages.values()
+        if not package.vehicle_requirement
+        or package.vehicle_requirement.id in data.vehicles
+    ]
+    depots = screening.DisjointSet(
+        sorted(
+            {vehicle.depot for vehicle in data.vehicles.values()}
+            | {package.origin_depot for package in packages},
+            key=lambda street: (street != models.DEPOT_ADDRESS, street),
+        ),
+    )
+    for package in packages:
+        if package.vehicle_requirement:
+            depots.union(
+                package.origin_depot,
+                data.vehicles[package.vehicle_requirement.id].depot,
+            )
+    for bundle in screening.find_bundles(data):
+        for package_id, linked_id in itertools.pairwise(bundle):
+            depots.union(
+                data.packages[package_id].origin_depot,
+                data.packages[linked_id].origin_depot,
+            )
+
+    groups = {
+        depots.find(group[0]): DepotGroup(group, [], [])
+        for group in depots.groups()
+    }
+    for vehicle in sorted(data.vehicles.values(), key=lambda vehicle: vehicle.id):
+        groups[depots.find(vehicle.depot)].vehicle_ids.append(vehicle.id)
+    for package in packages:
+        groups[depots.find(package.origin_depot)].package_ids.append(package.id)
+    return [group for group in groups.values() if group.vehicle_ids]
+
+
+def solve_depots_separately(
+    data: models.DataModel,
+    max_workers: int | None = None,
+) -> tuple[models.Solution | None, models.StopReason | None]:
+    """Solve each depot group as its own problem in parallel and merge the routes.
+
+    The groups share the time limit like the pinned vehicle sub-problems,
+    and the merged routes are polished together at the end. The search
+    stopped for the reason of the group that ran longest.
+    """
+    groups = sorted(find_depot_groups(data), key=lambda group: -len(group.package_ids))
+    worker_count = min(len(groups), max_workers or os.cpu_count() or 1)
+    time_limit_seconds = data.settings.solver_time_limit_seconds
+    if time_limit_seconds:
+        time_limit_seconds = max(
+            int(time_limit_seconds / math.ceil(len(groups) / max(worker_count, 1))),
+            1,
+        )
+
+    def create_subproblems(source: models.DataModel) -> list[models.DataModel]:
+        return [
+            create_depot_subproblem(source, group, time_limit_seconds)
+            for group in groups
+        ]
+
+    if worker_count > 1:
+        with (
+            data.share_matrices() as shared_data,
+            concurrent.futures.ProcessPoolExecutor(max_workers=worker_count) as executor,
+        ):
+            group_solutions = list(
+                executor.map(solve_depot_subproblem, create_subproblems(shared_data)),
+            )
+    else:
+        group_solutions = [
+            solve_depot_subproblem(subproblem)
+            for subproblem in create_subproblems(data)
+        ]
+
+    search_reports = [
+        group_solution.search_report
+        for group_solution in group_solutions
+        if group_solution.search_report
+    ]
+    if not search_reports:
+        return None, None
+    solution = merge_depot_routes(
+        data,
+        groups,
+        [group_solution.routes for group_solution in group_solutions],
+    )
+    if data.settings.polish_routes:
+        from delivery_route_planner.polishing import polishing
+
+        solution = polishing.polish_solution(solution)
+    longest_report = max(search_reports, key=lambda report: report.elapsed_seconds)
+    return solution, longest_report.stop_reason
+
+
+def create_depot_subproblem(
+    data: models.DataModel,
+    group: DepotGroup,
+    time_limit_seconds: int | None,
+) -> models.DataModel:
+    """The group's vehicles, renumbered from 1, and its packages.
+
+    Required vehicles follow the renumbered vehicles.
+    """
+    vehicles = {
+        new_id: dataclasses.replace(data.vehicles[vehicle_id], id=new_id)
+        for new_id, vehicle_id in enumerate(group.vehicle_ids, 1)
+    }
+    shared_objects = {id(address): address for address in data.addresses.values()}
+    shared_objects |= {
+        id(data.vehicles[vehicle_id]): vehicles[new_id]
+        for new_id, vehicle_id in enumerate(group.vehicle_ids, 1)
+    }
+    packages = copy.deepcopy(
+        {package_id: data.packages[package_id] for package_id in group.package_ids},
+        shared_objects,
+    )
+    settings = dataclasses.replace(
+        data.settings,
+        solve_depots_separately=False,
+        solve_pinned_vehicles_first=False,
+        use_parallel_search=False,
+        polish_routes=False,
+        report_optimality_gap=False,
+        solver_time_limit_seconds=time_limit_seconds,
+    )
+    return dataclasses.replace(
+        data,
+        vehicles=vehicles,
+        packages=packages,
+        nodes=models.Node.from_packages(packages, vehicles),
+        settings=settings,
+    )
+
+
+def solve_depot_subproblem(data: models.DataModel) -> DepotSolution:
+    """Stops and visit times of each route in vehicle order, and the search report.
+
+    Both are empty if the group is unsolved.
+    """
+    solution = routing.solve_vehicle_routing_problem(
+        data,
+        construction.build_initial_solution(data),
+    )
+    if solution is None:
+        return DepotSolution([], None)
+    routes = [
+        DepotRoute(
+            [
+                (stop.node.package.id, stop.node.kind.capacity_impact)
+                for stop in route.stops[1:-1]
+            ],
+            route.visit_seconds.tolist(),
+        )
+        for route in sorted(solution.routes, key=lambda route: route.vehicle.id)
+    ]
+    return DepotSolution(routes, solution.search_report)
+
+
+def merge_depot_routes(
+    data: models.DataModel,
+    groups: list[DepotGroup],
+    group_routes: list[list[DepotRoute]],
+) -> models.Solution:
+    """One solution of the full data with every group's routes and visit times."""
+    data = copy.deepcopy(data)
+    routes_by_vehicle = {
+        vehicle_id: route
+        for group, routes in zip(groups, group_routes)
+        for vehicle_id, route in zip(group.vehicle_ids, routes)
+    }
+    package_node_indices = {
+        (node.package.id, node.kind.capacity_impact): node_index
+        for node_index, node in enumerate(data.nodes)
+        if node.package
+    }
+    depot_node_indices = data.depot_node_indices
+    routes = []
+    for vehicle in data.vehicles.values():
+        depot_node_index = depot_node_indices[vehicle.depot]
+        depot_route = routes_by_vehicle.get(
+            vehicle.id,
+            DepotRoute([], [data.scenario.day_start.seconds] * 2),
+        )
+        node_indices = [
+            depot_node_index,
+            *(package_node_indices[stop] for stop in depot_route.stops),
+            depot_node_index,
+        ]
+        address_codes = data.node_address_codes[node_indices]
+        route = models.Route.from_columns(
+            vehicle,
+            data,
+            node_indices,
+            depot_route.visit_seconds,
+            np.concatenate(
+                ([0.0], np.cumsum(data.leg_miles(address_codes[:-1], address_codes[1:]))),
+            ),
+        )
+        route.record_package_visits()
+        routes.append(route)
+    return models.Solution(data, routes)
@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+import csv
+import json
+from collections.abc import Iterable, Iterator
+from enum import Enum
+from pathlib import Path
+from typing import Any, Callable, NamedTuple, TypeAlias
+
+from delivery_route_planner.models import models
+from delivery_route_planner.validation import validation
+
+PARQUET_BATCH_ROWS = 10_000
+PROGRESS_INTERVAL_ROWS = 1_000
+
+Row: TypeAlias = tuple[Any, ...]
+ProgressCallback: TypeAlias = Callable[[float], None]
+
+
+class Column(NamedTuple):
+    name: str
+    kind: type
+
+
+ROUTE_COLUMNS = (
+    Column("vehicle_id", int),
+    Column("step", int),
+    Column("address", str),
+    Column("activity", str),
+    Column("package_ids", list),
+    Column("load", int),
+    Column("mileage", float),
+    Column("time", str),
+)
+
+VALIDATION_COLUMNS = (
+    Column("package_id", int),
+    Column("status", str),
+    Column("availability", str),
+    Column("shipped", str),
+    Column("deadline", str),
+    Column("delivered", str),
+    Column("vehicle_id_required", int),
+    Column("vehicle_id_used", int),
+    Column("linked_package_ids", list),
+    Column("violations", str),
+)
+
+
+class ExportFormat(Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+    PARQUET = "parquet"
+
+    @classmethod
+    def from_path(cls, path: Path) -> ExportFormat:
+        return cls(path.suffix.lstrip(".").lower())
+
+    @property
+    def is_available(self) -> bool:
+        if self != ExportFormat.PARQUET:
+            return True
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+
+def iter_route_rows(solution: models.Solution) -> Iterator[Row]:
+    nodes = solution.data.nodes
+    for route in solution.routes:
+        node_indices = route.node_indices.tolist()
+        loads = route.vehicle_loads.tolist()
+        mileages = route.mileages.round(2).tolist()
+        visit_seconds = route.visit_seconds.tolist()
+        for step, (stop, package_ids) in enumerate(route.stop_groups(), 1):
+            position = stop.position
+            node = nodes[node_indices[position]]
+            yield (
+                route.vehicle.id,
+                step,
+                node.address,
+                node.kind.description if node.kind != models.NodeKind.ORIGIN else "End",
+                package_ids,
+                loads[position],
+                mileages[position],
+                _format_seconds(visit_seconds[position]),
+            )
+
+
+def _format_seconds(seconds: int) -> str:
+    minutes, seconds = divmod(seconds % models.SECONDS_PER_DAY, 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02}:{minutes:02}:{seconds:02}"
+
+
+def count_route_rows(solution: models.Solution) -> int:
+    return sum(len(route.stop_groups()) for route in solution.routes)
+
+
+def iter_validation_rows(solution: models.Solution) -> Iterator[Row]:
+    report = validation.validate_solution(solution)
+    package_violations: dict[int, list[str]] = {}
+    for violation in report.violations:
+        if violation.package_id is not None:
+            package_violations.setdefault(violation.package_id, []).append(
+                violation.kind.value,
+            )
+
+    def time_or_none(routing_time: models.RoutingTime | None) -> str | None:
+        return routing_time.time.isoformat() if routing_time else None
+
+    for package in solution.data.packages.values():
+        yield (
+            package.id,
+            "Delivered" if package.delivered_time else "Missed",
+            time_or_none(package.shipping_availability),
+            time_or_none(package.shipped_time),
+            time_or_none(package.delivery_deadline),
+            time_or_none(package.delivered_time),
+            package.vehicle_requirement.id if package.vehicle_requirement else None,
+            package.vehicle_used.id if package.vehicle_used else None,
+            [bundled_package.id for bundled_package in package.bundled_packages],
+            "; ".join(package_violations.get(package.id, [])) or None,
+        )
+
+
+def export_routes(
+    solution: models.Solution,
+    path: Path,
+    progress: ProgressCallback | None = None,
+) -> int:
+    return write_rows(
+        iter_route_rows(solution),
+        ROUTE_COLUMNS,
+        path,
+        total_rows=count_route_rows(solution),
+        progress=progress,
+    )
+
+
+def export_validation(
+    solution: models.Solution,
+    path: Path,
+    progress: ProgressCallback | None = None,
+) -> int:
+    return write_rows(
+        iter_validation_rows(solution),
+        VALIDATION_COLUMNS,
+        path,
+        total_rows=len(solution.data.packages),
+        progress=progress,
+    )
+
+
+def write_rows(
+    rows: Iterable[Row],
+    columns: tuple[Column, ...],
+    path: Path,
+    total_rows: int,
+    progress: ProgressCallback | None = None,
+) -> int:
+    """Stream rows to a file whose format is chosen by its extension."""
+    export_format = ExportFormat.from_path(path)
+
+    def report_progress(rows_written: int) -> None:
+        if progress and total_rows:
+            progress(min(rows_written / total_rows, 1.0))
+
+    def tracked(rows: Iterable[Row]) -> Iterator[Row]:
+        rows_written = 0
+        for row in rows:
+            yield row
+            rows_written += 1
+            if rows_written % PROGRESS_INTERVAL_ROWS == 0:
+                report_progress(rows_written)
+        report_progress(total_rows)
+
+    writers = {
+        ExportFormat.CSV: _write_csv,
+        ExportFormat.NDJSON: _write_ndjson,
+        ExportFormat.PARQUET: _write_parquet,
+    }
+    return writers[export_format](tracked(rows), columns, path)
+
+
+def _write_csv(rows: Iterable[Row], columns: tuple[Column, ...], path: Path) -> int:
+    list_positions = [i for i, column in enumerate(columns) if column.kind is list]
+    count = 0
+    with path.open("w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(column.name for column in columns)
+        for row in rows:
+            if list_positions:
+                row = list(row)
+                for position in list_positions:
+                    row[position] = ", ".join(str(value) for value in row[position])
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+def _write_ndjson(rows: Iterable[Row], columns: tuple[Column, ...], path: Path) -> int:
+    names = [column.name for column in columns]
+    count = 0
+    with path.open("w", encoding="utf-8") as file:
+        for row in rows:
+            file.write(json.dumps(dict(zip(names, row))))
+            file.write("\n")
+            count += 1
+    return count
+
+
+def _write_parquet(rows: Iterable[Row], columns: tuple[Column, ...], path: Path) -> int:
+    import pyarrow as pa
+    from pyarrow import parquet
+
+    arrow_types = {
+        int: pa.int64(),
+        float: pa.float64(),
+        str: pa.string(),
+        list: pa.list_(pa.int64()),
+    }
+    schema = pa.schema(
+        [(column.name, arrow_types[column.kind]) for column in columns],
+    )
+    count = 0
+    batch: list[Row] = []
+    with parquet.ParquetWriter(path, schema) as writer:
+
+        def flush() -> None:
+            writer.write_batch(
+                pa.record_batch(
+                    [list(values) for values in zip(*batch)],
+                    schema=schema,
+                ),
+            )
+            batch.clear()
+
+        for row in rows:
+            batch.append(row)
+            count += 1
+            if len(batch) == PARQUET_BATCH_ROWS:
+                flush()
+        if batch:
+            flush()
+    return count
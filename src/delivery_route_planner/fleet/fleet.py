@@ -0,0 +1,280 @@
+from __future__ import annotations
+
+import concurrent.futures
+import contextlib
+import copy
+import dataclasses
+import itertools
+import math
+import os
+from dataclasses import dataclass, field
+from typing import NamedTuple
+
+from delivery_route_planner.construction import construction
+from delivery_route_planner.models import models
+from delivery_route_planner.routing import routing
+from delivery_route_planner.screening import screening
+
+PROBE_TIME_LIMIT_SECONDS = 5
+
+
+class FleetProbe(NamedTuple):
+    vehicle_count: int
+    delivered_packages_count: int
+    missed_packages_count: int
+    mileage: float | None
+
+    @property
+    def delivers_all(self) -> bool:
+        return self.mileage is not None and self.missed_packages_count == 0
+
+
+@dataclass
+class FleetSizeResult:
+    lower_bound: int
+    vehicle_count: int | None
+    solution: models.Solution | None
+    probes: list[FleetProbe] = field(default_factory=list)
+
+    def summary_lines(self) -> list[str]:
+        lines = [f"Fleet size lower bound: {self.lower_bound} vehicles"]
+        if self.vehicle_count is None:
+            lines.append("No probed fleet size delivered every package")
+        else:
+            lines.append(
+                f"Smallest fleet delivering every package: {self.vehicle_count}",
+            )
+        lines.append("Probed fleet sizes:")
+        for probe in sorted(self.probes):
+            result = (
+                f"{probe.delivered_packages_count} delivered, "
+                f"{probe.missed_packages_count} missed, "
+                f"{round(probe.mileage, 1)} miles"
+                if probe.mileage is not None
+                else "no routes"
+            )
+            lines.append(f"  {probe.vehicle_count} vehicles: {result}")
+        return lines
+
+
+def minimize_fleet(
+    data: models.DataModel,
+    max_workers: int | None = None,
+    probe_time_limit_seconds: int = PROBE_TIME_LIMIT_SECONDS,
+) -> FleetSizeResult:
+    """Find the smallest fleet that delivers every package, then solve it fully.
+
+    Fleet sizes are probed with short searches, several at a time in a
+    process pool. Sizes below a cheap lower bound are never probed. The
+    routable packages of each probe are those screening does not rule out.
+    """
+    lower_bound = fleet_lower_bound(data)
+    # One vehicle per package is always enough for the packages that are
+    # routable at all.
+    max_count = max(len(data.packages), lower_bound)
+    worker_count = max_workers or os.cpu_count() or 1
+    probes: dict[int, FleetProbe] = {}
+    probe_data = data
+    executor = None
+
+    def run_probes(vehicle_counts: list[int]) -> None:
+        tasks = [
+            (probe_data, vehicle_count, probe_time_limit_seconds)
+            for vehicle_count in vehicle_counts
+            if vehicle_count not in probes
+        ]
+        results = (
+            executor.map(probe_fleet_size, tasks)
+            if executor
+            else map(probe_fleet_size, tasks)
+        )
+        for probe in results:
+            probes[probe.vehicle_count] = probe
+
+    with contextlib.ExitStack() as stack:
+        if worker_count > 1:
+            probe_data = stack.enter_context(data.share_matrices())
+            executor = stack.enter_context(
+                concurrent.futures.ProcessPoolExecutor(max_workers=worker_count),
+            )
+
+        # Grow the range until its top delivers everything, probing several
+        # doublings at once.
+        low, high = lower_bound, max(lower_bound, len(data.vehicles))
+        while True:
+            vehicle_counts = sorted(
+                {min(high * 2**step, max_count) for step in range(worker_count)},
+            )
+            run_probes(vehicle_counts)
+            feasible_counts = [
+                count for count in vehicle_counts if probes[count].delivers_all
+            ]
+            if feasible_counts:
+                low = max(
+                    [low]
+                    + [
+                        count + 1
+                        for count in vehicle_counts
+                        if count < feasible_counts[0]
+                    ],
+                )
+                high = feasible_counts[0]
+                break
+            if vehicle_counts[-1] >= max_count:
+                return FleetSizeResult(lower_bound, None, None, list(probes.values()))
+            low, high = vehicle_counts[-1] + 1, vehicle_counts[-1] * 2
+
+        # Split [low, high) into as many parts as there are workers.
+        while low < high:
+            step = (high - low) / (worker_count + 1)
+            vehicle_counts = sorted(
+                {
+                    min(low + int(step * part), high - 1)
+                    for part in range(1, worker_count + 1)
+                },
+            )
+            run_probes(vehicle_counts)
+            for count in vehicle_counts:
+                if probes[count].delivers_all:
+                    high = min(high, count)
+                else:
+                    low = max(low, count + 1)
+
+    fleet_data = resize_fleet(data, high)
+    solution = routing.solve_vehicle_routing_problem(
+        fleet_data,
+        construction.build_initial_solution(fleet_data),
+    )
+    return FleetSizeResult(lower_bound, high, solution, list(probes.values()))
+
+
+def probe_fleet_size(task: tuple[models.DataModel, int, int]) -> FleetProbe:
+    """Short search with the given fleet size, unless the quick routes deliver all."""
+    data, vehicle_count, time_limit_seconds = task
+    data = resize_fleet(data, vehicle_count)
+    data.settings = dataclasses.replace(
+        data.settings,
+        solver_time_limit_seconds=time_limit_seconds,
+        solver_solution_limit=None,
+        polish_routes=False,
+        use_parallel_search=False,
+        solve_pinned_vehicles_first=False,
+        report_optimality_gap=False,
+    )
+    routable_count = len(data.packages) - len(screening.find_infeasible_packages(data))
+    solution = construction.build_initial_solution(data)
+    if solution.delivered_packages_count < routable_count:
+        solution = routing.solve_vehicle_routing_problem(data, solution)
+    if solution is None:
+        return FleetProbe(vehicle_count, 0, routable_count, None)
+    return FleetProbe(
+        vehicle_count,
+        solution.delivered_packages_count,
+        routable_count - solution.delivered_packages_count,
+        solution.mileage,
+    )
+
+
+def resize_fleet(data: models.DataModel, vehicle_count: int) -> models.DataModel:
+    """A copy of the data with vehicles 1 to vehicle_count.
+
+    Existing vehicles keep their attributes. New ones take turns between the
+    depots, in the order the fleet first uses them, and copy the last vehicle
+    of their depot. Required vehicles follow the new vehicle objects.
+    """
+    last_vehicles = {}
+    for vehicle in sorted(data.vehicles.values(), key=lambda vehicle: vehicle.id):
+        last_vehicles[vehicle.depot] = vehicle
+    templates = list(last_vehicles.values())
+    vehicles = {
+        vehicle_id: dataclasses.replace(
+            data.vehicles.get(vehicle_id, templates[(vehicle_id - 1) % len(templates)]),
+            id=vehicle_id,
+        )
+        for vehicle_id in range(1, vehicle_count + 1)
+    }
+    shared_objects = {id(address): address for address in data.addresses.values()}
+    shared_objects |= {
+        id(vehicle): vehicles.get(vehicle.id, vehicle)
+        for vehicle in data.vehicles.values()
+    }
+    packages = copy.deepcopy(data.packages, shared_objects)
+    return dataclasses.replace(
+        data,
+        vehicles=vehicles,
+        packages=packages,
+        nodes=models.Node.from_packages(packages, vehicles),
+        scenario=dataclasses.replace(data.scenario, vehicle_count=vehicle_count),
+        settings=copy.copy(data.settings),
+    )
+
+
+def fleet_lower_bound(data: models.DataModel) -> int:
+    """Fewest vehicles that can possibly deliver every routable package.
+
+    Required vehicles must exist. Every address due by a deadline needs an
+    arrival before it from its closest other address, and every trip beyond
+    one per vehicle needs a return to a depot, all of which has to fit
+    between the day start and that deadline on each vehicle.
+    """
+    pinned_count = max(
+        (
+            package.vehicle_requirement.id
+            for package in data.packages.values()
+            if package.vehicle_requirement
+        ),
+        default=0,
+    )
+    windows = screening.compute_package_windows(data)
+    infeasible_packages = screening.find_infeasible_packages(data, windows)
+    packages = sorted(
+        (
+            package
+            for package in data.packages.values()
+            if package.id not in infeasible_packages
+        ),
+        key=lambda package: windows[package.id].latest_delivery,
+    )
+    if not packages:
+        return max(pinned_count, 1)
+
+    travel_costs = max(
+        data.vehicles.values(),
+        key=lambda vehicle: vehicle.speed_mph,
+    ).duration_map.cost_map
+    capacity = max(vehicle.package_capacity for vehicle in data.vehicles.values())
+    streets = {package.address.street for package in packages}
+    depots = {vehicle.depot for vehicle in data.vehicles.values()}
+    depots.update(package.origin_depot for package in packages)
+    arrival_seconds = {
+        street: min(
+            travel_costs[other_street][street]
+            for other_street in streets | depots
+            if other_street != street
+        )
+        for street in streets
+    }
+    return_seconds = min(
+        travel_costs[street][depot] for street in streets for depot in depots
+    )
+
+    vehicle_count = max(pinned_count, 1)
+    busy_seconds = 0
+    due_count = 0
+    visited_streets = set()
+    for deadline, due_packages in itertools.groupby(
+        packages,
+        key=lambda package: windows[package.id].latest_delivery,
+    ):
+        for package in due_packages:
+            due_count += 1
+            if package.address.street not in visited_streets:
+                visited_streets.add(package.address.street)
+                busy_seconds += arrival_seconds[package.address.street]
+        trip_count = math.ceil(due_count / capacity)
+        while (
+            busy_seconds + max(trip_count - vehicle_count, 0) * return_seconds
+            > vehicle_count * max(deadline, 1)
+        ):
+            vehicle_count += 1
+    return vehicle_count
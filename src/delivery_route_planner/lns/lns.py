@@ -0,0 +1,395 @@
+from __future__ import annotations
+
+import concurrent.futures
+import copy
+import dataclasses
+import logging
+import os
+import time
+from typing import NamedTuple, TypeAlias
+
+import numpy as np
+from ortools.constraint_solver import pywrapcp
+
+from delivery_route_planner.construction import construction
+from delivery_route_planner.models import models
+from delivery_route_planner.routing import routing
+from delivery_route_planner.screening import screening
+
+ROUND_SECONDS = 3
+RUIN_ROUTE_COUNT = 3
+MAX_RELEASED_MISSED_PACKAGES = 20
+MIN_IMPROVEMENT_MILES = 1e-6
+
+# (package id, capacity impact) per visited stop, without the route's start and end.
+RouteStops: TypeAlias = list[tuple[int, int]]
+
+
+class RepairTask(NamedTuple):
+    data: models.DataModel
+    routes: list[RouteStops]
+
+
+@dataclasses.dataclass
+class Incumbent:
+    """The best routes found so far, shared by all rounds through the coordinator."""
+
+    routes: dict[int, RouteStops]
+    missed_package_ids: set[int]
+    improvement_count: int = 0
+
+    @classmethod
+    def from_solution(cls, solution: models.Solution) -> Incumbent:
+        routes = {
+            route.vehicle.id: [
+                (stop.node.package.id, stop.node.kind.capacity_impact)
+                for stop in route.stops[1:-1]
+            ]
+            for route in solution.routes
+        }
+        infeasible_packages = screening.find_infeasible_packages(solution.data)
+        return cls(
+            routes=routes,
+            missed_package_ids={
+                package_id
+                for package_id in solution.missed_packages
+                if package_id not in infeasible_packages
+            },
+        )
+
+    def offer(
+        self,
+        data: models.DataModel,
+        vehicle_ids: list[int],
+        released_package_ids: set[int],
+        routes: list[RouteStops],
+    ) -> bool:
+        """Take the repaired routes if they deliver more, or as many in fewer miles."""
+        old_routes = [self.routes[vehicle_id] for vehicle_id in vehicle_ids]
+        old_key = (
+            -count_deliveries(old_routes),
+            routes_miles(data, vehicle_ids, old_routes),
+        )
+        new_key = (-count_deliveries(routes), routes_miles(data, vehicle_ids, routes))
+        if old_key[0] < new_key[0] or (
+            old_key[0] == new_key[0]
+            and new_key[1] >= old_key[1] - MIN_IMPROVEMENT_MILES
+        ):
+            return False
+        delivered_ids = {package_id for route in routes for package_id, _ in route}
+        self.missed_package_ids |= released_package_ids - delivered_ids
+        self.missed_package_ids -= delivered_ids
+        for vehicle_id, route in zip(vehicle_ids, routes):
+            self.routes[vehicle_id] = route
+        self.improvement_count += 1
+        return True
+
+
+def solve_cooperatively(
+    data: models.DataModel,
+    initial_solution: models.Solution | None = None,
+    max_workers: int | None = None,
+) -> tuple[models.Solution, models.StopReason]:
+    """Improve one shared solution with ruin and recreate rounds in a process pool.
+
+    Each round releases a few related routes and the missed packages that
+    may join them, and searches them again as a small problem starting from
+    their current order. The coordinator keeps the best routes and every new
+    round starts from them, so workers build on each other's improvements.
+    Rounds running at the same time never share a route or package.
+
+    The search stops when the time limit leaves no room for another round,
+    or is complete when no round has a used route left to release.
+    """
+    started = time.monotonic()
+    time_limit_seconds = (
+        data.settings.solver_time_limit_seconds
+        or models.SearchSettings.solver_time_limit_seconds
+    )
+    if initial_solution is None:
+        initial_solution = construction.build_initial_solution(data)
+    incumbent = Incumbent.from_solution(initial_solution)
+    generator = np.random.default_rng(0)
+    worker_count = max_workers or os.cpu_count() or 1
+    round_seconds = min(ROUND_SECONDS, time_limit_seconds)
+    busy_vehicle_ids: set[int] = set()
+    busy_package_ids: set[int] = set()
+    stop_reason = models.StopReason.COMPLETED
+
+    def start_round(
+        executor: concurrent.futures.Executor,
+        pending: dict,
+    ) -> None:
+        vehicle_ids = choose_related_routes(
+            data,
+            incumbent,
+            busy_vehicle_ids,
+            generator,
+        )
+        if not vehicle_ids:
+            return
+        released_package_ids = set(
+            sorted(incumbent.missed_package_ids - busy_package_ids)[
+                :MAX_RELEASED_MISSED_PACKAGES
+            ],
+        )
+        task = create_repair_task(
+            shared_data,
+            incumbent,
+            vehicle_ids,
+            released_package_ids,
+            round_seconds,
+        )
+        released_package_ids = set(task.data.packages) & released_package_ids
+        busy_vehicle_ids.update(vehicle_ids)
+        busy_package_ids.update(released_package_ids)
+        pending[executor.submit(repair_routes, task)] = (
+            vehicle_ids,
+            released_package_ids,
+        )
+
+    with (
+        data.share_matrices() as shared_data,
+        concurrent.futures.ProcessPoolExecutor(max_workers=worker_count) as executor,
+    ):
+        pending = {}
+        for _ in range(worker_count):
+            start_round(executor, pending)
+        while pending:
+            done, _ = concurrent.futures.wait(
+                pending,
+                return_when=concurrent.futures.FIRST_COMPLETED,
+            )
+            for future in done:
+                vehicle_ids, released_package_ids = pending.pop(future)
+                busy_vehicle_ids.difference_update(vehicle_ids)
+                busy_package_ids.difference_update(released_package_ids)
+                routes = future.result()
+                if routes is not None:
+                    incumbent.offer(data, vehicle_ids, released_package_ids, routes)
+                if time.monotonic() - started + round_seconds <= time_limit_seconds:
+                    start_round(executor, pending)
+                else:
+                    stop_reason = models.StopReason.TIME_LIMIT
+
+    return create_solution(data, incumbent, initial_solution), stop_reason
+
+
+def choose_related_routes(
+    data: models.DataModel,
+    incumbent: Incumbent,
+    busy_vehicle_ids: set[int],
+    generator: np.random.Generator,
+) -> list[int]:
+    """A random used route, the free routes passing closest to it and one unused vehicle."""
+    free_ids = [
+        vehicle_id
+        for vehicle_id in sorted(incumbent.routes)
+        if vehicle_id not in busy_vehicle_ids
+    ]
+    used_ids = [vehicle_id for vehicle_id in free_ids if incumbent.routes[vehicle_id]]
+    unused_ids = [vehicle_id for vehicle_id in free_ids if not incumbent.routes[vehicle_id]]
+    if not used_ids:
+        return []
+    seed_id = used_ids[generator.integers(len(used_ids))]
+    seed_streets = route_streets(data, incumbent.routes[seed_id])
+    street = seed_streets[generator.integers(len(seed_streets))]
+    distances = data.addresses[street].distance_map_miles
+    related_ids = sorted(
+        (vehicle_id for vehicle_id in used_ids if vehicle_id != seed_id),
+        key=lambda vehicle_id: min(
+            distances[other_street]
+            for other_street in route_streets(data, incumbent.routes[vehicle_id])
+        ),
+    )
+    vehicle_ids = [seed_id] + related_ids[: RUIN_ROUTE_COUNT - 1 - bool(unused_ids)]
+    return vehicle_ids + unused_ids[:1]
+
+
+def route_streets(data: models.DataModel, route: RouteStops) -> list[str]:
+    return [
+        data.packages[package_id].address.street
+        for package_id, capacity_impact in route
+        if capacity_impact == models.NodeKind.DELIVERY.capacity_impact
+    ]
+
+
+def count_deliveries(routes: list[RouteStops]) -> int:
+    return sum(
+        capacity_impact == models.NodeKind.DELIVERY.capacity_impact
+        for route in routes
+        for _, capacity_impact in route
+    )
+
+
+def routes_miles(
+    data: models.DataModel,
+    vehicle_ids: list[int],
+    routes: list[RouteStops],
+) -> float:
+    miles = 0.0
+    for vehicle_id, route in zip(vehicle_ids, routes):
+        depot = data.vehicles[vehicle_id].depot
+        streets = [depot]
+        for package_id, capacity_impact in route:
+            package = data.packages[package_id]
+            streets.append(
+                package.address.street
+                if capacity_impact == models.NodeKind.DELIVERY.capacity_impact
+                else package.origin_depot,
+            )
+        streets.append(depot)
+        miles += sum(
+            data.addresses[start].distance_map_miles[end]
+            for start, end in zip(streets, streets[1:])
+        )
+    return miles
+
+
+def create_repair_task(
+    data: models.DataModel,
+    incumbent: Incumbent,
+    vehicle_ids: list[int],
+    released_package_ids: set[int],
+    time_limit_seconds: int,
+) -> RepairTask:
+    """A small problem with only the chosen vehicles and the packages they may carry.
+
+    Vehicles are renumbered from 1, and required vehicles follow them.
+    Missed packages only join with their whole linked group and when their
+    required vehicle, if any, is among the chosen ones.
+    """
+    bundles = {
+        package_id: bundle
+        for bundle in screening.find_bundles(data)
+        for package_id in bundle
+    }
+    package_ids = {
+        package_id
+        for vehicle_id in vehicle_ids
+        for package_id, _ in incumbent.routes[vehicle_id]
+    }
+    for package_id in released_package_ids:
+        linked_ids = bundles.get(package_id, [package_id])
+        if all(
+            linked_id in released_package_ids
+            and (
+                not data.packages[linked_id].vehicle_requirement
+                or data.packages[linked_id].vehicle_requirement.id in vehicle_ids
+            )
+            for linked_id in linked_ids
+        ):
+            package_ids.add(package_id)
+
+    vehicles = {
+        new_id: dataclasses.replace(data.vehicles[vehicle_id], id=new_id)
+        for new_id, vehicle_id in enumerate(vehicle_ids, 1)
+    }
+    shared_objects = {id(address): address for address in data.addresses.values()}
+    shared_objects |= {id(vehicle): vehicle for vehicle in data.vehicles.values()}
+    shared_objects |= {
+        id(data.vehicles[vehicle_id]): vehicles[new_id]
+        for new_id, vehicle_id in enumerate(vehicle_ids, 1)
+    }
+    packages = copy.deepcopy(
+        {package_id: data.packages[package_id] for package_id in sorted(package_ids)},
+        shared_objects,
+    )
+    settings = dataclasses.replace(
+        data.settings,
+        solve_pinned_vehicles_first=False,
+        use_parallel_search=False,
+        polish_routes=False,
+        solver_time_limit_seconds=time_limit_seconds,
+        solver_solution_limit=None,
+    )
+    task_data = dataclasses.replace(
+        data,
+        vehicles=vehicles,
+        packages=packages,
+        nodes=models.Node.from_packages(packages, vehicles),
+        settings=settings,
+    )
+    return RepairTask(
+        task_data,
+        [incumbent.routes[vehicle_id] for vehicle_id in vehicle_ids],
+    )
+
+
+def repair_routes(task: RepairTask) -> list[RouteStops] | None:
+    """Search the released routes again from their current order."""
+    node_routes = stops_to_nodes(task.data, task.routes)
+    manager, router = routing.create_routing_model(
+        task.data,
+        initial_routes=node_routes,
+    )
+    search = routing.create_search_parameters(task.data.settings)
+    assignment = routing.solve_from_routes(
+        router,
+        search,
+        nodes_to_indices(manager, node_routes),
+    )
+    if not assignment:
+        return None
+    return [
+        [
+            (node.package.id, node.kind.capacity_impact)
+            for node in (task.data.nodes[manager.IndexToNode(index)] for index in route)
+        ]
+        for route in routing.read_routes(router, assignment)
+    ]
+
+
+def stops_to_nodes(data: models.DataModel, routes: list[RouteStops]) -> list[list[int]]:
+    node_indices = {
+        (node.package.id, node.kind.capacity_impact): node_index
+        for node_index, node in enumerate(data.nodes)
+        if node.package
+    }
+    return [[node_indices[stop] for stop in route] for route in routes]
+
+
+def nodes_to_indices(
+    manager: pywrapcp.RoutingIndexManager,
+    routes: list[list[int]],
+) -> list[list[int]]:
+    return [[manager.NodeToIndex(node_index) for node_index in route] for route in routes]
+
+
+def create_solution(
+    data: models.DataModel,
+    incumbent: Incumbent,
+    initial_solution: models.Solution,
+) -> models.Solution:
+    """Turn the incumbent into a Solution of the full model, with its visit times.
+
+    If the full model rejects the incumbent's routes, the initial solution is
+    kept instead.
+    """
+    routes = incumbent.routes
+    vehicles = sorted(data.vehicles.values(), key=lambda vehicle: vehicle.index)
+    node_routes = stops_to_nodes(data, [routes[vehicle.id] for vehicle in vehicles])
+    manager, router = routing.create_routing_model(data, initial_routes=node_routes)
+    search = routing.create_search_parameters(data.settings)
+    search.solution_limit = 1
+    router.CloseModelWithParameters(search)
+    initial_assignment = router.ReadAssignmentFromRoutes(
+        nodes_to_indices(manager, node_routes),
+        True,
+    )
+    assignment = initial_assignment and router.SolveFromAssignmentWithParameters(
+        initial_assignment,
+        search,
+    )
+    if not assignment:
+        logging.warning(
+            "The full model rejected the cooperative search's routes; "
+            "keeping the initial solution.",
+        )
+        return initial_solution
+    solution = models.Solution.save_solution(data, manager, router, assignment)
+    if data.settings.polish_routes:
+        from delivery_route_planner.polishing import polishing
+
+        solution = polishing.polish_solution(solution)
+    return solution
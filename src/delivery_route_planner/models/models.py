@@ -1,20 +1,31 @@
 from __future__ import annotations
 
+import contextlib
 import copy
 import csv
+import dataclasses
 import datetime
+import functools
+from collections.abc import Iterator, Sequence
 from dataclasses import dataclass, field
 from enum import Enum
+from multiprocessing import shared_memory
 from pathlib import Path
-from typing import Any, Callable, TypeAlias
+from typing import TYPE_CHECKING, Any, Callable, NamedTuple, TypeAlias, overload
 
-from ortools.constraint_solver import pywrapcp, routing_enums_pb2
+import numpy as np
+from ortools.constraint_solver import routing_enums_pb2
+
+if TYPE_CHECKING:
+    from ortools.constraint_solver import pywrapcp
 
 FSS = routing_enums_pb2.FirstSolutionStrategy
 LSM = routing_enums_pb2.LocalSearchMetaheuristic
 ADDRESS_FILE = "src/delivery_route_planner/data/distance_matrix.csv"
 PACKAGE_FILE = "src/delivery_route_planner/data/package_details.csv"
 DEPOT_ADDRESS = "4001 South 700 East"
+ADDRESS_COLUMNS = ("Name", "Street", "City", "State", "Zip Code")
+SPARSE_LANDMARK_COUNT = 8
 MILEAGE_SCALE_FACTOR = 10
 SECONDS_PER_HOUR = 3600
 SECONDS_PER_DAY = SECONDS_PER_HOUR * 24
@@ -26,6 +37,8 @@ VehicleDict: TypeAlias = dict[int, "Vehicle"]
 PackageDict: TypeAlias = dict[int, "Package"]
 CsvRow: TypeAlias = dict[str, str]
 
+_attached_matrices: dict[str, SharedMatrix] = {}
+
 
 @dataclass
 class Address:
@@ -37,7 +50,10 @@ class Address:
     distance_map_miles: AddressMap
 
     @classmethod
-    def from_csv(cls) -> AddressDict:
+    def from_csv(cls, neighbor_count: int | None = None) -> AddressDict:
+        """Read the distance matrix, keeping only the nearest neighbors if given."""
+        if neighbor_count:
+            return cls.from_csv_sparse(neighbor_count)
         with Path(ADDRESS_FILE).open(newline="", encoding="utf-8-sig") as file:
             return {
                 row["Street"]: cls(
@@ -51,6 +67,243 @@ class Address:
                 for row in csv.DictReader(file)
             }
 
+    @classmethod
+    def from_csv_sparse(cls, neighbor_count: int) -> AddressDict:
+        with Path(ADDRESS_FILE).open(newline="", encoding="utf-8-sig") as file:
+            reader = csv.reader(file)
+            streets = next(reader)[len(ADDRESS_COLUMNS) :]
+            distances = SparseDistances.for_streets(streets)
+            addresses = {}
+            for row in reader:
+                name, street, city, state, zip_code = row[: len(ADDRESS_COLUMNS)]
+                addresses[street] = cls(
+                    name=name,
+                    street=street,
+                    city=city,
+                    state=state,
+                    zip_code=zip_code,
+                    distance_map_miles=distances.add_row(
+                        street,
+                        np.array(row[len(ADDRESS_COLUMNS) :], dtype=np.float64),
+                        neighbor_count,
+                    ),
+                )
+        return addresses
+
+
+class DistanceRow(dict):
+    """Exact miles to nearby addresses, estimating and caching the rest on lookup."""
+
+    __slots__ = ("code", "distances")
+
+    def __init__(
+        self,
+        distances: SparseDistances,
+        code: int,
+        exact_miles: AddressMap,
+    ) -> None:
+        super().__init__(exact_miles)
+        self.distances = distances
+        self.code = code
+
+    def __missing__(self, street: str) -> float:
+        miles = self.distances.estimate_miles(self.code, street)
+        self[street] = miles
+        return miles
+
+
+@dataclass(eq=False)
+class SparseDistances:
+    """Landmark distances for triangle-bound estimates between distant addresses.
+
+    Every address keeps its distances to and from the depot and a few evenly
+    spaced landmarks, so storage grows with N·(k + landmarks) instead of N².
+    The estimate is the shortest detour through a landmark, which is an upper
+    bound whenever the matrix obeys the triangle inequality.
+    """
+
+    streets: list[str]
+    codes: dict[str, int]
+    landmark_codes: np.ndarray
+    to_landmark_miles: np.ndarray
+    from_landmark_miles: np.ndarray
+
+    @classmethod
+    def for_streets(
+        cls,
+        streets: list[str],
+        landmark_count: int = SPARSE_LANDMARK_COUNT,
+    ) -> SparseDistances:
+        codes = {street: code for code, street in enumerate(streets)}
+        landmark_codes = np.unique(
+            np.concatenate(
+                (
+                    [codes.get(DEPOT_ADDRESS, 0)],
+                    np.linspace(0, len(streets) - 1, landmark_count - 1).astype(
+                        np.int64,
+                    ),
+                ),
+            ),
+        )
+        return cls(
+            streets=streets,
+            codes=codes,
+            landmark_codes=landmark_codes,
+            to_landmark_miles=np.zeros((len(streets), len(landmark_codes))),
+            from_landmark_miles=np.zeros((len(landmark_codes), len(streets))),
+        )
+
+    def add_row(
+        self,
+        street: str,
+        row_miles: np.ndarray,
+        neighbor_count: int,
+    ) -> DistanceRow:
+        code = self.codes[street]
+        self.to_landmark_miles[code] = row_miles[self.landmark_codes]
+        landmark_position = np.flatnonzero(self.landmark_codes == code)
+        if len(landmark_position):
+            self.from_landmark_miles[landmark_position[0]] = row_miles
+        neighbor_count = min(neighbor_count + 1, len(row_miles))
+        neighbors = np.argpartition(row_miles, neighbor_count - 1)[:neighbor_count]
+        kept = np.union1d(neighbors, np.append(self.landmark_codes, code))
+        return DistanceRow(
+            self,
+            code,
+            dict(zip([self.streets[i] for i in kept], row_miles[kept].tolist())),
+        )
+
+    def estimate_miles(self, from_code: int, to_street: str) -> float:
+        to_code = self.codes[to_street]
+        return float(
+            np.min(
+                self.to_landmark_miles[from_code]
+                + self.from_landmark_miles[:, to_code],
+            ),
+        )
+
+
+class SharedMatrix:
+    """A street-by-street matrix in shared memory that pickles by segment name.
+
+    Worker processes attach to the segment once and read the same pages as
+    the parent, so sending a model that uses it costs the same at any size.
+    """
+
+    __slots__ = ("codes", "memory", "values")
+
+    def __init__(
+        self,
+        memory: shared_memory.SharedMemory,
+        codes: dict[str, int],
+        shape: tuple[int, ...],
+        dtype: np.dtype,
+    ) -> None:
+        self.memory = memory
+        self.codes = codes
+        self.values = np.ndarray(shape, dtype=dtype, buffer=memory.buf)
+
+    def __reduce__(self) -> tuple:
+        return (
+            SharedMatrix.attach,
+            (self.memory.name, self.codes, self.values.shape, self.values.dtype.str),
+        )
+
+    @classmethod
+    def create(cls, codes: dict[str, int], values: np.ndarray) -> SharedMatrix:
+        memory = shared_memory.SharedMemory(create=True, size=values.nbytes)
+        matrix = cls(memory, codes, values.shape, values.dtype)
+        matrix.values[:] = values
+        _attached_matrices[memory.name] = matrix
+        return matrix
+
+    @classmethod
+    def attach(
+        cls,
+        name: str,
+        codes: dict[str, int],
+        shape: tuple[int, ...],
+        dtype: str,
+    ) -> SharedMatrix:
+        if name not in _attached_matrices:
+            _attached_matrices[name] = cls(
+                shared_memory.SharedMemory(name),
+                codes,
+                shape,
+                np.dtype(dtype),
+            )
+        return _attached_matrices[name]
+
+    def row(self, street: str) -> SharedRow:
+        return SharedRow(self, self.codes[street])
+
+    def release(self) -> None:
+        _attached_matrices.pop(self.memory.name, None)
+        del self.values
+        self.memory.close()
+        self.memory.unlink()
+
+
+class SharedRow(dict):
+    """One row of a shared matrix, read into the dict on lookup."""
+
+    __slots__ = ("code", "matrix")
+
+    def __init__(self, matrix: SharedMatrix, code: int) -> None:
+        super().__init__()
+        self.matrix = matrix
+        self.code = code
+
+    def __reduce__(self) -> tuple:
+        return (SharedRow, (self.matrix, self.code))
+
+    def __missing__(self, street: str) -> Any:
+        value = self.matrix.values[self.code, self.matrix.codes[street]].item()
+        self[street] = value
+        return value
+
+    def __contains__(self, street: object) -> bool:
+        return street in self.matrix.codes
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.matrix.codes)
+
+    def __len__(self) -> int:
+        return len(self.matrix.codes)
+
+    def get(self, street: str, default: Any = None) -> Any:
+        return self[street] if street in self.matrix.codes else default
+
+    def items(self) -> Iterator[tuple[str, Any]]:
+        return zip(self.matrix.codes, self.matrix.values[self.code].tolist())
+
+
+class TravelCostRow(dict):
+    """Travel costs converted from a distance row, converting missing ones on lookup.
+
+    Rows of a shared matrix are only converted on lookup.
+    """
+
+    __slots__ = ("distances", "transform")
+
+    def __init__(
+        self,
+        distances: AddressMap,
+        transform: Callable[[float], int],
+    ) -> None:
+        if not isinstance(distances, SharedRow):
+            super().__init__(
+                (street, transform(distance))
+                for street, distance in distances.items()
+            )
+        self.distances = distances
+        self.transform = transform
+
+    def __missing__(self, street: str) -> int:
+        cost = self.transform(self.distances[street])
+        self[street] = cost
+        return cost
+
 
 @dataclass
 class TravelCostMap:
@@ -63,35 +316,38 @@ class TravelCostMap:
         transform: Callable[[float], int],
     ) -> TravelCostMap:
         cost_map = {
-            from_address: {
-                to_address: transform(distance)
-                for to_address, distance in address.distance_map_miles.items()
-            }
+            from_address: TravelCostRow(address.distance_map_miles, transform)
             for from_address, address in addresses.items()
         }
         return cls(cost_map=cost_map)
 
     @classmethod
     def with_distance(cls, addresses: AddressDict) -> TravelCostMap:
-        return cls.create_from_addresses_with_transformer(
-            addresses,
-            lambda distance: int(distance * MILEAGE_SCALE_FACTOR),
-        )
+        return cls.create_from_addresses_with_transformer(addresses, scaled_mileage)
 
     @classmethod
     def with_duration(cls, addresses: AddressDict, speed_mph: float) -> TravelCostMap:
         return cls.create_from_addresses_with_transformer(
             addresses,
-            lambda distance: int(distance / speed_mph * SECONDS_PER_HOUR),
+            functools.partial(travel_seconds, speed_mph),
         )
 
 
+def scaled_mileage(distance: float) -> int:
+    return int(distance * MILEAGE_SCALE_FACTOR)
+
+
+def travel_seconds(speed_mph: float, distance: float) -> int:
+    return int(distance / speed_mph * SECONDS_PER_HOUR)
+
+
 @dataclass
 class Vehicle:
     id: int
     speed_mph: float
     package_capacity: int
     duration_map: TravelCostMap
+    depot: str = DEPOT_ADDRESS
 
     @classmethod
     def with_shared_attributes(
@@ -100,13 +356,16 @@ class Vehicle:
         speed_mph: float,
         package_capacity: int,
         duration_map: TravelCostMap,
+        depots: Sequence[str] = (DEPOT_ADDRESS,),
     ) -> VehicleDict:
+        """A uniform fleet whose vehicles take turns between the given home depots."""
         return {
             vehicle_id: cls(
                 id=vehicle_id,
                 speed_mph=speed_mph,
                 package_capacity=package_capacity,
                 duration_map=duration_map,
+                depot=depots[(vehicle_id - 1) % len(depots)],
             )
             for vehicle_id in range(1, vehicle_count + 1)
         }
@@ -119,6 +378,7 @@ class Vehicle:
         vehicle_id: int,
         speed_mph: float,
         package_capacity: int,
+        depot: str = DEPOT_ADDRESS,
     ) -> None:
         new_travel_map = TravelCostMap.with_duration(addresses, speed_mph)
         new_vehicle = cls(
@@ -126,6 +386,7 @@ class Vehicle:
             speed_mph=speed_mph,
             package_capacity=package_capacity,
             duration_map=new_travel_map,
+            depot=depot,
         )
         vehicles[vehicle_id] = new_vehicle
 
@@ -139,7 +400,7 @@ class Vehicle:
         return self.id - 1
 
 
-@dataclass
+@dataclass(slots=True)
 class RoutingTime:
     _total_seconds: int
 
@@ -191,7 +452,7 @@ class RoutingTime:
         return self.seconds - other.seconds
 
 
-@dataclass
+@dataclass(slots=True)
 class Package:
     id: int
     address: Address
@@ -200,6 +461,7 @@ class Package:
     delivery_deadline: RoutingTime | None = None
     vehicle_requirement: Vehicle | None = None
     bundled_packages: list[Package] = field(default_factory=list)
+    origin_depot: str = DEPOT_ADDRESS
     shipped_time: RoutingTime | None = None
     delivered_time: RoutingTime | None = None
     vehicle_used: Vehicle | None = None
@@ -223,6 +485,7 @@ class Package:
         addresses: AddressDict,
     ) -> Package:
         vehicle_id = cls.convert_or_none(row["vehicle_requirement"], int)
+        origin_depot = (row.get("depot") or "").strip() or DEPOT_ADDRESS
         return cls(
             id=int(row["id"]),
             address=addresses[row["address"].strip()],
@@ -230,6 +493,7 @@ class Package:
             shipping_availability=RoutingTime.from_isoformat(row["availability"]),
             delivery_deadline=RoutingTime.from_isoformat(row["deadline"]),
             vehicle_requirement=vehicles[vehicle_id] if vehicle_id else None,
+            origin_depot=addresses[origin_depot].street,
         )
 
     @classmethod
@@ -281,7 +545,7 @@ class NodeKind(Enum):
         self.capacity_impact = capacity_impact
 
 
-@dataclass
+@dataclass(slots=True)
 class Node:
     kind: NodeKind
     address: str
@@ -289,10 +553,22 @@ class Node:
     origin_id = 0
 
     @classmethod
-    def from_packages(cls, packages: PackageDict) -> list[Node]:
-        nodes: list[Node] = [cls(NodeKind.ORIGIN, DEPOT_ADDRESS)]
+    def from_packages(
+        cls,
+        packages: PackageDict,
+        vehicles: VehicleDict | None = None,
+    ) -> list[Node]:
+        """One origin per home depot, the default depot first, then each package's stops.
+
+        Pickups happen at the package's origin depot.
+        """
+        depots = sorted(
+            {vehicle.depot for vehicle in (vehicles or {}).values()} or {DEPOT_ADDRESS},
+            key=lambda street: (street != DEPOT_ADDRESS, street),
+        )
+        nodes: list[Node] = [cls(NodeKind.ORIGIN, depot) for depot in depots]
         for package in packages.values():
-            nodes.append(cls(NodeKind.PICKUP, DEPOT_ADDRESS, package))
+            nodes.append(cls(NodeKind.PICKUP, package.origin_depot, package))
             nodes.append(cls(NodeKind.DELIVERY, package.address.street, package))
         return nodes
 
@@ -339,6 +615,31 @@ class SearchSettings:
     local_search_metaheuristic: OrToolsEnum = LSM.GUIDED_LOCAL_SEARCH
     solver_time_limit_seconds: int | None = 120
     solver_solution_limit: int | None = 2000
+    candidate_neighbor_count: int | None = None
+    solve_pinned_vehicles_first: bool = False
+    polish_routes: bool = True
+    use_parallel_search: bool = False
+    solve_depots_separately: bool = False
+    use_adaptive_time_limit: bool = False
+    report_optimality_gap: bool = True
+    target_optimality_gap: float | None = None
+    solve_service_url: str | None = None
+
+
+class PackageColumns(NamedTuple):
+    ids: np.ndarray
+    availability_seconds: np.ndarray
+    deadline_seconds: np.ndarray
+    required_vehicle_ids: np.ndarray
+    bundle_pairs: np.ndarray
+
+
+# DataModel cached properties computed from each field.
+CACHED_BY_FIELD = {
+    "addresses": ("address_codes", "distance_matrix_miles", "node_address_codes"),
+    "packages": ("package_columns",),
+    "nodes": ("node_kind_codes", "node_address_codes", "node_package_ids"),
+}
 
 
 @dataclass
@@ -351,10 +652,16 @@ class DataModel:
     scenario: RoutingScenario
     settings: SearchSettings
 
+    def __setattr__(self, name: str, value: object) -> None:
+        """Assigning a field drops the cached arrays derived from it."""
+        super().__setattr__(name, value)
+        for cached_name in CACHED_BY_FIELD.get(name, ()):
+            self.__dict__.pop(cached_name, None)
+
     @classmethod
-    def with_defaults(cls) -> DataModel:
+    def with_defaults(cls, neighbor_count: int | None = None) -> DataModel:
         scenario = RoutingScenario()
-        addresses = Address.from_csv()
+        addresses = Address.from_csv(neighbor_count)
         vehicles = Vehicle.with_shared_attributes(
             scenario.vehicle_count,
             scenario.vehicle_speed_mph,
@@ -367,24 +674,346 @@ class DataModel:
             distance_map=TravelCostMap.with_distance(addresses),
             vehicles=vehicles,
             packages=packages,
-            nodes=Node.from_packages(packages),
+            nodes=Node.from_packages(packages, vehicles),
             scenario=RoutingScenario(),
             settings=SearchSettings(),
         )
 
+    @property
+    def depot_node_indices(self) -> dict[str, int]:
+        """Origin node index per home depot street."""
+        return {
+            node.address: node_index
+            for node_index, node in enumerate(self.nodes)
+            if node.kind == NodeKind.ORIGIN
+        }
+
+    @property
+    def single_depot(self) -> str | None:
+        """The depot every vehicle starts from and every package leaves, if there is one."""
+        depots = {vehicle.depot for vehicle in self.vehicles.values()}
+        depots.update(package.origin_depot for package in self.packages.values())
+        return depots.pop() if len(depots) == 1 else None
+
+    @functools.cached_property
+    def address_codes(self) -> dict[str, int]:
+        return {street: code for code, street in enumerate(self.addresses)}
+
+    @functools.cached_property
+    def distance_matrix_miles(self) -> np.ndarray:
+        depot_miles = self.addresses[DEPOT_ADDRESS].distance_map_miles
+        if (
+            isinstance(depot_miles, SharedRow)
+            and depot_miles.matrix.codes == self.address_codes
+        ):
+            return depot_miles.matrix.values
+        return np.array(
+            [
+                [address.distance_map_miles[street] for street in self.addresses]
+                for address in self.addresses.values()
+            ],
+            dtype=np.float64,
+        )
+
+    @contextlib.contextmanager
+    def share_matrices(self) -> Iterator[DataModel]:
+        """A copy whose miles and travel costs are read from shared memory.
+
+        Pass the copy to worker processes started inside the with block,
+        instead of the model; it is only valid there. Sparse distances are
+        already small and are not shared.
+        """
+        if self.is_sparse:
+            yield self
+            return
+        miles = self.distance_matrix_miles
+        codes = dict(self.address_codes)
+        miles_matrix = SharedMatrix.create(codes, miles)
+        matrices = [
+            miles_matrix,
+            SharedMatrix.create(
+                codes,
+                (miles * MILEAGE_SCALE_FACTOR).astype(np.int64),
+            ),
+        ]
+        duration_maps = {}
+        for speed_mph in sorted({vehicle.speed_mph for vehicle in self.vehicles.values()}):
+            matrices.append(
+                SharedMatrix.create(
+                    codes,
+                    (miles / speed_mph * SECONDS_PER_HOUR).astype(np.int64),
+                ),
+            )
+            duration_maps[speed_mph] = TravelCostMap(
+                {street: matrices[-1].row(street) for street in codes},
+            )
+        addresses = {
+            street: dataclasses.replace(
+                address,
+                distance_map_miles=miles_matrix.row(street),
+            )
+            for street, address in self.addresses.items()
+        }
+        vehicles = {
+            vehicle_id: dataclasses.replace(
+                vehicle,
+                duration_map=duration_maps[vehicle.speed_mph],
+            )
+            for vehicle_id, vehicle in self.vehicles.items()
+        }
+        shared_objects = {
+            id(address): addresses[street] for street, address in self.addresses.items()
+        }
+        shared_objects |= {
+            id(vehicle): vehicles[vehicle_id]
+            for vehicle_id, vehicle in self.vehicles.items()
+        }
+        packages = copy.deepcopy(self.packages, shared_objects)
+        shared_data = dataclasses.replace(
+            self,
+            addresses=addresses,
+            distance_map=TravelCostMap(
+                {street: matrices[1].row(street) for street in codes},
+            ),
+            vehicles=vehicles,
+            packages=packages,
+            nodes=Node.from_packages(packages, vehicles),
+        )
+        try:
+            yield shared_data
+        finally:
+            shared_data.__dict__.pop("distance_matrix_miles", None)
+            for matrix in matrices:
+                matrix.release()
+
+    @property
+    def is_sparse(self) -> bool:
+        return any(
+            isinstance(address.distance_map_miles, DistanceRow)
+            for address in self.addresses.values()
+        )
+
+    def leg_miles(self, from_codes: np.ndarray, to_codes: np.ndarray) -> np.ndarray:
+        """Miles between pairs of address codes, without a dense matrix if sparse."""
+        if not self.is_sparse:
+            return self.distance_matrix_miles[from_codes, to_codes]
+        addresses = list(self.addresses.values())
+        return np.array(
+            [
+                addresses[from_code].distance_map_miles[addresses[to_code].street]
+                for from_code, to_code in zip(from_codes.tolist(), to_codes.tolist())
+            ],
+            dtype=np.float64,
+        )
+
+    @functools.cached_property
+    def node_kind_codes(self) -> np.ndarray:
+        """Each node's capacity impact, which is unique per NodeKind."""
+        return np.array(
+            [node.kind.capacity_impact for node in self.nodes],
+            dtype=np.int8,
+        )
+
+    @functools.cached_property
+    def node_address_codes(self) -> np.ndarray:
+        return np.array(
+            [self.address_codes[node.address] for node in self.nodes],
+            dtype=np.int32,
+        )
+
+    @functools.cached_property
+    def node_package_ids(self) -> np.ndarray:
+        return np.array(
+            [node.package.id if node.package else -1 for node in self.nodes],
+            dtype=np.int64,
+        )
+
+    @functools.cached_property
+    def package_columns(self) -> PackageColumns:
+        """Package constraints as arrays sorted by package id, for vectorized checks.
+
+        Missing availability is 0, a missing deadline is SECONDS_PER_DAY and a
+        missing vehicle requirement is -1.
+        """
+        packages = sorted(self.packages.values(), key=lambda package: package.id)
+        return PackageColumns(
+            ids=np.array([package.id for package in packages], dtype=np.int64),
+            availability_seconds=np.array(
+                [
+                    package.shipping_availability.seconds
+                    if package.shipping_availability
+                    else 0
+                    for package in packages
+                ],
+                dtype=np.int64,
+            ),
+            deadline_seconds=np.array(
+                [
+                    package.delivery_deadline.seconds
+                    if package.delivery_deadline
+                    else SECONDS_PER_DAY
+                    for package in packages
+                ],
+                dtype=np.int64,
+            ),
+            required_vehicle_ids=np.array(
+                [
+                    package.vehicle_requirement.id
+                    if package.vehicle_requirement
+                    else -1
+                    for package in packages
+                ],
+                dtype=np.int64,
+            ),
+            bundle_pairs=np.array(
+                [
+                    (package.id, bundled_package.id)
+                    for package in packages
+                    for bundled_package in package.bundled_packages
+                ],
+                dtype=np.int64,
+            ).reshape(-1, 2),
+        )
+
 
-@dataclass
 class Stop:
-    node: Node
-    vehicle_load: int
-    visit_time: RoutingTime
-    mileage: float
+    """A single stop read from the columns of its route."""
 
+    __slots__ = ("position", "route")
 
-@dataclass
+    def __init__(self, route: Route, position: int) -> None:
+        self.route = route
+        self.position = position
+
+    def __repr__(self) -> str:
+        return (
+            f"Stop(node={self.node!r}, vehicle_load={self.vehicle_load}, "
+            f"visit_time={self.visit_time!r}, mileage={self.mileage})"
+        )
+
+    @property
+    def node(self) -> Node:
+        return self.route.data.nodes[self.route.node_indices[self.position]]
+
+    @property
+    def vehicle_load(self) -> int:
+        return int(self.route.vehicle_loads[self.position])
+
+    @property
+    def visit_time(self) -> RoutingTime:
+        return RoutingTime.from_seconds(int(self.route.visit_seconds[self.position]))
+
+    @property
+    def mileage(self) -> float:
+        return float(self.route.mileages[self.position])
+
+
+class RouteStops(Sequence):
+    __slots__ = ("positions", "route")
+
+    def __init__(self, route: Route, positions: range) -> None:
+        self.route = route
+        self.positions = positions
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    @overload
+    def __getitem__(self, index: int) -> Stop: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> RouteStops: ...
+
+    def __getitem__(self, index: int | slice) -> Stop | RouteStops:
+        if isinstance(index, slice):
+            return RouteStops(self.route, self.positions[index])
+        return Stop(self.route, self.positions[index])
+
+    def __iter__(self) -> Iterator[Stop]:
+        for position in self.positions:
+            yield Stop(self.route, position)
+
+
+class StopGroup(NamedTuple):
+    stop: Stop
+    package_ids: list[int]
+
+
+class StopGroups(Sequence):
+    """Group boundaries of a route, materialized one StopGroup at a time."""
+
+    __slots__ = ("ends", "route", "starts")
+
+    def __init__(self, route: Route, starts: np.ndarray, ends: np.ndarray) -> None:
+        self.route = route
+        self.starts = starts
+        self.ends = ends
+
+    def __len__(self) -> int:
+        return len(self.ends)
+
+    @overload
+    def __getitem__(self, index: int) -> StopGroup: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> StopGroups: ...
+
+    def __getitem__(self, index: int | slice) -> StopGroup | StopGroups:
+        if isinstance(index, slice):
+            return StopGroups(self.route, self.starts[index], self.ends[index])
+        return self.create_group(int(self.starts[index]), int(self.ends[index]))
+
+    def __iter__(self) -> Iterator[StopGroup]:
+        package_ids = self.route.data.node_package_ids[
+            self.route.node_indices
+        ].tolist()
+        for start, end in zip(self.starts.tolist(), self.ends.tolist()):
+            if start == end:
+                package_id = package_ids[end]
+                yield StopGroup(
+                    Stop(self.route, end),
+                    [package_id] if package_id >= 0 else [],
+                )
+            else:
+                yield self.create_group(start, end)
+
+    def create_group(self, start: int, end: int) -> StopGroup:
+        group_ids = self.route.data.node_package_ids[
+            self.route.node_indices[start : end + 1]
+        ]
+        return StopGroup(Stop(self.route, end), group_ids[group_ids >= 0].tolist())
+
+
+@dataclass(eq=False)
 class Route:
     vehicle: Vehicle
-    stops: list[Stop]
+    data: DataModel = field(repr=False, compare=False)
+    node_indices: np.ndarray
+    vehicle_loads: np.ndarray
+    visit_seconds: np.ndarray
+    mileages: np.ndarray
+
+    @classmethod
+    def from_columns(
+        cls,
+        vehicle: Vehicle,
+        data: DataModel,
+        node_indices: Sequence[int],
+        visit_seconds: Sequence[int],
+        mileages: Sequence[float],
+    ) -> Route:
+        node_indices = np.asarray(node_indices, dtype=np.int32)
+        return cls(
+            vehicle=vehicle,
+            data=data,
+            node_indices=node_indices,
+            vehicle_loads=np.cumsum(
+                data.node_kind_codes[node_indices],
+                dtype=np.int32,
+            ),
+            visit_seconds=np.asarray(visit_seconds, dtype=np.int64),
+            mileages=np.asarray(mileages, dtype=np.float64),
+        )
 
     @classmethod
     def create_route(
@@ -395,62 +1024,100 @@ class Route:
         router: pywrapcp.RoutingModel,
         assignments: pywrapcp.Assignment,
     ) -> Route:
-        stops = []
-        vehicle_load = 0
-        mileage = 0.0
-        index = router.Start(vehicle.index)
         time_dimension = router.GetDimensionOrDie("Time")
+        index = router.Start(vehicle.index)
+        end_index = router.End(vehicle.index)
+        indices = [index]
+        while index != end_index:
+            index = router.Next(assignments, index)
+            indices.append(index)
+
+        node_indices = np.fromiter(
+            (manager.IndexToNode(index) for index in indices),
+            dtype=np.int32,
+            count=len(indices),
+        )
+        route_seconds = np.fromiter(
+            (assignments.Max(time_dimension.CumulVar(index)) for index in indices),
+            dtype=np.int64,
+            count=len(indices),
+        )
+        address_codes = data.node_address_codes[node_indices]
+        mileages = np.concatenate(
+            (
+                [0.0],
+                np.cumsum(
+                    data.leg_miles(address_codes[:-1], address_codes[1:]),
+                ),
+            ),
+        )
+        route = cls.from_columns(
+            vehicle,
+            data,
+            node_indices,
+            data.scenario.day_start.seconds + route_seconds,
+            mileages,
+        )
+        route.record_package_visits()
+        return route
+
+    def record_package_visits(self) -> None:
+        kinds = self.data.node_kind_codes[self.node_indices]
+        for position in np.flatnonzero(kinds != NodeKind.ORIGIN.capacity_impact):
+            stop = Stop(self, int(position))
+            package = stop.node.package
+            if kinds[position] == NodeKind.PICKUP.capacity_impact:
+                package.shipped_time = stop.visit_time
+                package.vehicle_used = self.vehicle
+            else:
+                package.delivered_time = stop.visit_time
 
-        def create_stop(index: int, previous_index: int | None) -> Stop:
-            nonlocal vehicle_load, mileage
-            node = data.nodes[manager.IndexToNode(index)]
-            vehicle_load += node.kind.capacity_impact
-            route_seconds = assignments.Max(time_dimension.CumulVar(index))
-            visit_time = RoutingTime.from_seconds(
-                data.scenario.day_start.seconds + route_seconds,
+    @property
+    def stops(self) -> RouteStops:
+        return RouteStops(self, range(len(self.node_indices)))
+
+    def stop_groups(self) -> StopGroups:
+        """Collapse consecutive stops of one kind at one address, skipping the start."""
+        if len(self.node_indices) < 2:
+            return StopGroups(self, np.empty(0, np.int64), np.empty(0, np.int64))
+        kinds = self.data.node_kind_codes[self.node_indices]
+        addresses = self.data.node_address_codes[self.node_indices]
+        group_ends = np.append(
+            np.flatnonzero(
+                (kinds[1:-1] != kinds[2:]) | (addresses[1:-1] != addresses[2:]),
             )
-            if previous_index:
-                mileage += (
-                    router.GetArcCostForVehicle(previous_index, index, vehicle.index)
-                    / MILEAGE_SCALE_FACTOR
-                )
-
-            if node.kind == NodeKind.PICKUP:
-                node.package.shipped_time = visit_time
-                node.package.vehicle_used = vehicle
-            elif node.kind == NodeKind.DELIVERY:
-                node.package.delivered_time = visit_time
-
-            return Stop(node, vehicle_load, visit_time, mileage)
-
-        previous_index = None
-        while not router.IsEnd(index):
-            stops.append(create_stop(index, previous_index))
-            previous_index = index
-            index = assignments.Value(router.NextVar(index))
-        stops.append(create_stop(index, previous_index))
-
-        return cls(vehicle, stops)
+            + 1,
+            len(self.node_indices) - 1,
+        )
+        group_starts = np.concatenate(([1], group_ends[:-1] + 1))
+        return StopGroups(self, group_starts, group_ends)
 
     @property
     def delivered_packages(self) -> PackageDict:
+        kinds = self.data.node_kind_codes[self.node_indices]
+        delivery_indices = self.node_indices[
+            kinds == NodeKind.DELIVERY.capacity_impact
+        ]
         return {
-            stop.node.package.id: stop.node.package
-            for stop in self.stops
-            if stop.node.kind == NodeKind.DELIVERY and stop.node.package
+            package.id: package
+            for package in (
+                self.data.nodes[node_index].package
+                for node_index in delivery_indices.tolist()
+            )
+            if package
         }
 
     @property
     def mileage(self) -> float:
-        return self.stops[-1].mileage if self.stops else 0.0
+        return float(self.mileages[-1]) if len(self.mileages) else 0.0
 
     @property
     def start_time(self) -> RoutingTime | None:
-        return self.stops[1].visit_time if self.stops else None
+        return self.stops[1].visit_time if len(self.node_indices) else None
 
     @property
     def end_time(self) -> RoutingTime | None:
-        return self.stops[-1].visit_time if self.stops else None
+        return self.stops[-1].visit_time if len(self.node_indices) else None
 
     @property
     def time_used_seconds(self) -> int:
@@ -461,10 +1128,40 @@ class Route:
         )
 
 
+class StopReason(Enum):
+    TIME_LIMIT = "the time budget was used up"
+    SOLUTION_LIMIT = "the solution limit was reached"
+    STALLED = "improvements stalled"
+    GAP_REACHED = "the target gap to the lower bound was reached"
+    COMPLETED = "the search was complete"
+
+
+@dataclass
+class SearchReport:
+    time_budget_seconds: int | None
+    elapsed_seconds: float
+    stop_reason: StopReason
+    # Fewest miles that deliver bounded_package_count packages, if computed.
+    lower_bound_miles: float | None = None
+    bounded_package_count: int = 0
+
+    def __str__(self) -> str:
+        budget = (
+            f" of a {self.time_budget_seconds} s budget"
+            if self.time_budget_seconds
+            else ""
+        )
+        return (
+            f"Searched {round(self.elapsed_seconds, 1)} s{budget}; "
+            f"stopped because {self.stop_reason.value}"
+        )
+
+
 @dataclass
 class Solution:
     data: DataModel
     routes: list[Route]
+    search_report: SearchReport | None = None
 
     @classmethod
     def save_solution(
@@ -546,3 +1243,22 @@ class Solution:
     @property
     def delivery_percentage(self) -> str:
         return f"{round(self.delivery_success_rate * 100, 2)}%"
+
+    @property
+    def optimality_gap(self) -> float | None:
+        """Share of the mileage that may lie above the shortest routes.
+
+        Only known when the routes deliver every package the lower bound
+        covers; missed packages make shorter routes possible.
+        """
+        report = self.search_report
+        if (
+            report is None
+            or report.lower_bound_miles is None
+            or self.delivered_packages_count < report.bounded_package_count
+        ):
+            return None
+        mileage = self.mileage
+        return (
+            max(mileage - report.lower_bound_miles, 0.0) / mileage if mileage > 0 else 0.0
+        )
@@ -0,0 +1,410 @@
+from __future__ import annotations
+
+import concurrent.futures
+import copy
+import itertools
+import os
+from typing import NamedTuple
+
+import numpy as np
+
+from delivery_route_planner.models import models
+from delivery_route_planner.routing import routing
+from delivery_route_planner.screening import screening
+
+EXACT_MAX_STOPS = 10
+OR_OPT_MAX_SEGMENT = 3
+MIN_IMPROVEMENT_MILES = 1e-6
+
+
+class RouteProblem(NamedTuple):
+    """One route's stops as a single-vehicle problem, in plain lists for workers.
+
+    Stop positions index every per-stop list. Address 0 is the route's depot.
+    The cost fields price the route's share of the solver's objective in
+    miles, with the other routes' longest mileage for the distance span.
+    """
+
+    address_codes: list[int]
+    load_changes: list[int]
+    pickup_positions: list[int]
+    earliest_seconds: list[int]
+    latest_seconds: list[int]
+    miles: list[list[float]]
+    seconds: list[list[int]]
+    capacity: int
+    start_seconds: int
+    day_seconds: int
+    max_miles: float
+    cost_per_second: float
+    span_cost_per_mile: float
+    longest_other_miles: float
+
+
+class Schedule(NamedTuple):
+    miles: float
+    visit_seconds: list[int]
+
+
+def polish_solution(
+    solution: models.Solution,
+    max_workers: int | None = None,
+) -> models.Solution:
+    """Re-sequence every route on its own, keeping only feasible cheaper orders."""
+    data = copy.deepcopy(solution.data)
+    windows = screening.compute_package_windows(data)
+    route_miles = [route.mileage for route in solution.routes]
+    problems = [
+        (
+            route,
+            create_route_problem(
+                data,
+                route,
+                windows,
+                max(route_miles[:position] + route_miles[position + 1 :], default=0.0),
+            ),
+        )
+        for position, route in enumerate(solution.routes)
+        if len(route.node_indices) > 3
+    ]
+    worker_count = min(len(problems), max_workers or os.cpu_count() or 1)
+    if worker_count > 1:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=worker_count) as executor:
+            orders = list(executor.map(polish_route, [problem for _, problem in problems]))
+    else:
+        orders = [polish_route(problem) for _, problem in problems]
+    polished_orders = {
+        route.vehicle.id: (problem, order)
+        for (route, problem), order in zip(problems, orders)
+        if order is not None
+    }
+
+    routes = []
+    for route in solution.routes:
+        vehicle = data.vehicles[route.vehicle.id]
+        if route.vehicle.id in polished_orders:
+            problem, order = polished_orders[route.vehicle.id]
+            new_route = create_polished_route(
+                data,
+                vehicle,
+                route.node_indices[0],
+                route.node_indices[1:-1][order],
+                evaluate_order(problem, order),
+            )
+        else:
+            new_route = models.Route.from_columns(
+                vehicle,
+                data,
+                route.node_indices,
+                route.visit_seconds,
+                route.mileages,
+            )
+        new_route.record_package_visits()
+        routes.append(new_route)
+    return models.Solution(data, routes)
+
+
+def create_route_problem(
+    data: models.DataModel,
+    route: models.Route,
+    windows: dict[int, screening.PackageWindow],
+    longest_other_miles: float,
+) -> RouteProblem:
+    stops = route.node_indices[1:-1].tolist()
+    nodes = [data.nodes[node_index] for node_index in stops]
+    depot = data.nodes[route.node_indices[0]].address
+    streets = [depot] + sorted({node.address for node in nodes} - {depot})
+    street_codes = {street: code for code, street in enumerate(streets)}
+    durations = route.vehicle.duration_map.cost_map
+    pickup_positions = {
+        node.package.id: position
+        for position, node in enumerate(nodes)
+        if node.kind == models.NodeKind.PICKUP
+    }
+    day_start = data.scenario.day_start.seconds
+    return RouteProblem(
+        address_codes=[street_codes[node.address] for node in nodes],
+        load_changes=[node.kind.capacity_impact for node in nodes],
+        pickup_positions=[
+            pickup_positions[node.package.id]
+            if node.kind == models.NodeKind.DELIVERY
+            else -1
+            for node in nodes
+        ],
+        earliest_seconds=[
+            windows[node.package.id].earliest_pickup
+            if node.kind == models.NodeKind.PICKUP
+            else windows[node.package.id].earliest_delivery
+            for node in nodes
+        ],
+        latest_seconds=[
+            windows[node.package.id].latest_pickup
+            if node.kind == models.NodeKind.PICKUP
+            else windows[node.package.id].latest_delivery
+            for node in nodes
+        ],
+        miles=[
+            [data.addresses[start].distance_map_miles[end] for end in streets]
+            for start in streets
+        ],
+        seconds=[[durations[start][end] for end in streets] for start in streets],
+        capacity=route.vehicle.package_capacity,
+        start_seconds=int(route.visit_seconds[0]) - day_start,
+        day_seconds=data.scenario.day_start.duration_until(data.scenario.day_end),
+        max_miles=data.settings.max_mileage_per_vehicle,
+        cost_per_second=(
+            routing.TIME_SPAN_COST_PER_SECOND / models.MILEAGE_SCALE_FACTOR
+            if data.scenario.optimization == models.OptimizationType.TIME
+            else 0.0
+        ),
+        span_cost_per_mile=data.settings.distance_span_cost_coefficient,
+        longest_other_miles=longest_other_miles,
+    )
+
+
+def create_polished_route(
+    data: models.DataModel,
+    vehicle: models.Vehicle,
+    origin_index: int,
+    stops: np.ndarray,
+    schedule: Schedule,
+) -> models.Route:
+    node_indices = np.concatenate(([origin_index], stops, [origin_index]))
+    address_codes = data.node_address_codes[node_indices]
+    return models.Route.from_columns(
+        vehicle,
+        data,
+        node_indices,
+        data.scenario.day_start.seconds + np.asarray(schedule.visit_seconds),
+        np.concatenate(
+            ([0.0], np.cumsum(data.leg_miles(address_codes[:-1], address_codes[1:]))),
+        ),
+    )
+
+
+def evaluate_order(problem: RouteProblem, order: list[int]) -> Schedule | None:
+    """Earliest-arrival schedule of the stops in this order, or None if infeasible."""
+    seen = bytearray(len(order))
+    time = problem.start_seconds
+    load = 0
+    miles = 0.0
+    previous = 0
+    visit_seconds = [time]
+    for stop in order:
+        pickup = problem.pickup_positions[stop]
+        if pickup >= 0 and not seen[pickup]:
+            return None
+        seen[stop] = 1
+        address = problem.address_codes[stop]
+        time = max(time + problem.seconds[previous][address], problem.earliest_seconds[stop])
+        load += problem.load_changes[stop]
+        if time > problem.latest_seconds[stop] or load > problem.capacity:
+            return None
+        miles += problem.miles[previous][address]
+        previous = address
+        visit_seconds.append(time)
+    time += problem.seconds[previous][0]
+    miles += problem.miles[previous][0]
+    if time > problem.day_seconds or miles > problem.max_miles:
+        return None
+    visit_seconds.append(time)
+    return Schedule(miles, visit_seconds)
+
+
+def schedule_cost(problem: RouteProblem, miles: float, end_seconds: int) -> float:
+    """The route's share of the solver's objective, in miles."""
+    return (
+        miles
+        + problem.cost_per_second * (end_seconds - problem.start_seconds)
+        + problem.span_cost_per_mile * max(miles, problem.longest_other_miles)
+    )
+
+
+def polish_route(problem: RouteProblem) -> list[int] | None:
+    """A cheaper feasible order of the route's stops, or None to keep it."""
+    current_order = list(range(len(problem.address_codes)))
+    current = evaluate_order(problem, current_order)
+    if current is None:
+        return None
+    current_cost = schedule_cost(problem, current.miles, current.visit_seconds[-1])
+    if len(current_order) <= EXACT_MAX_STOPS:
+        order = exact_order(problem)
+    else:
+        order = local_search_order(problem, current_order, current_cost)
+    if order is None:
+        return None
+    schedule = evaluate_order(problem, order)
+    if (
+        schedule is None
+        or schedule_cost(problem, schedule.miles, schedule.visit_seconds[-1])
+        > current_cost - MIN_IMPROVEMENT_MILES
+    ):
+        return None
+    return order
+
+
+def exact_order(problem: RouteProblem) -> list[int] | None:
+    """Dynamic programming over visited sets, keeping Pareto labels of miles and time.
+
+    The labels keep the cheapest order for any cost that grows with both.
+    """
+    stop_count = len(problem.address_codes)
+    full_mask = (1 << stop_count) - 1
+    # label: (miles, time, load, stop, previous label)
+    layer = {(0, -1): [(0.0, problem.start_seconds, 0, -1, None)]}
+    for _ in range(stop_count):
+        next_layer: dict[tuple[int, int], list] = {}
+        for (mask, last), labels in layer.items():
+            previous = problem.address_codes[last] if last >= 0 else 0
+            for stop in range(stop_count):
+                if mask >> stop & 1:
+                    continue
+                pickup = problem.pickup_positions[stop]
+                if pickup >= 0 and not mask >> pickup & 1:
+                    continue
+                address = problem.address_codes[stop]
+                for label in labels:
+                    miles, time, load = label[0], label[1], label[2]
+                    time = max(
+                        time + problem.seconds[previous][address],
+                        problem.earliest_seconds[stop],
+                    )
+                    load += problem.load_changes[stop]
+                    if time > problem.latest_seconds[stop] or load > problem.capacity:
+                        continue
+                    add_label(
+                        next_layer.setdefault((mask | 1 << stop, stop), []),
+                        (miles + problem.miles[previous][address], time, load, stop, label),
+                    )
+        layer = next_layer
+
+    best = None
+    for (mask, last), labels in layer.items():
+        if mask != full_mask:
+            continue
+        address = problem.address_codes[last]
+        for label in labels:
+            end_seconds = label[1] + problem.seconds[address][0]
+            if end_seconds > problem.day_seconds:
+                continue
+            miles = label[0] + problem.miles[address][0]
+            cost = schedule_cost(problem, miles, end_seconds)
+            if best is None or cost < best[0]:
+                best = (cost, label)
+    if best is None:
+        return None
+    order = []
+    label = best[1]
+    while label[3] >= 0:
+        order.append(label[3])
+        label = label[4]
+    return order[::-1]
+
+
+def add_label(labels: list, label: tuple) -> None:
+    for other in labels:
+        if other[0] <= label[0] and other[1] <= label[1]:
+            return
+    labels[:] = [
+        other for other in labels if not (label[0] <= other[0] and label[1] <= other[1])
+    ]
+    labels.append(label)
+
+
+def local_search_order(
+    problem: RouteProblem,
+    order: list[int],
+    cost: float,
+) -> list[int]:
+    """First-improvement Or-opt and 2-opt until neither finds a cheaper feasible order.
+
+    Moves are priced by their change in mileage first, so only shorter orders
+    are checked for feasibility and cost.
+    """
+    while True:
+        for candidate, _ in iter_shorter_orders(problem, order):
+            schedule = evaluate_order(problem, candidate)
+            if not schedule:
+                continue
+            candidate_cost = schedule_cost(
+                problem,
+                schedule.miles,
+                schedule.visit_seconds[-1],
+            )
+            if candidate_cost < cost - MIN_IMPROVEMENT_MILES:
+                order, cost = candidate, candidate_cost
+                break
+        else:
+            return order
+
+
+def iter_shorter_orders(problem: RouteProblem, order: list[int]):
+    """Or-opt and 2-opt neighbors of the order that shorten it, with their change in miles."""
+    distance = problem.miles
+    # Route positions with the depot at both ends: stop order[p - 1] is at position p.
+    addresses = [0] + [problem.address_codes[stop] for stop in order] + [0]
+    stop_count = len(order)
+    forward = list(
+        itertools.accumulate(
+            (distance[a][b] for a, b in itertools.pairwise(addresses)),
+            initial=0.0,
+        ),
+    )
+    backward = list(
+        itertools.accumulate(
+            (distance[b][a] for a, b in itertools.pairwise(addresses)),
+            initial=0.0,
+        ),
+    )
+
+    for length in range(1, OR_OPT_MAX_SEGMENT + 1):
+        for start in range(1, stop_count - length + 2):
+            end = start + length - 1
+            first, last = addresses[start], addresses[end]
+            before, after = addresses[start - 1], addresses[end + 1]
+            removed = (
+                distance[before][after] - distance[before][first] - distance[last][after]
+            )
+            for gap in itertools.chain(range(1, start), range(end + 2, stop_count + 2)):
+                left, right = addresses[gap - 1], addresses[gap]
+                change = (
+                    removed
+                    + distance[left][first]
+                    + distance[last][right]
+                    - distance[left][right]
+                )
+                if change < -MIN_IMPROVEMENT_MILES:
+                    segment = order[start - 1 : end]
+                    if gap < start:
+                        candidate = (
+                            order[: gap - 1]
+                            + segment
+                            + order[gap - 1 : start - 1]
+                            + order[end:]
+                        )
+                    else:
+                        candidate = (
+                            order[: start - 1]
+                            + order[end : gap - 1]
+                            + segment
+                            + order[gap - 1 :]
+                        )
+                    yield candidate, change
+
+    for start in range(1, stop_count):
+        for end in range(start + 1, stop_count + 1):
+            change = (
+                distance[addresses[start - 1]][addresses[end]]
+                + distance[addresses[start]][addresses[end + 1]]
+                - distance[addresses[start - 1]][addresses[start]]
+                - distance[addresses[end]][addresses[end + 1]]
+                + backward[end]
+                - backward[start]
+                - forward[end]
+                + forward[start]
+            )
+            if change < -MIN_IMPROVEMENT_MILES:
+                yield (
+                    order[: start - 1] + order[start - 1 : end][::-1] + order[end:],
+                    change,
+                )
@@ -0,0 +1,324 @@
+from __future__ import annotations
+
+import concurrent.futures
+import csv
+import heapq
+import math
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, NamedTuple
+
+import numpy as np
+
+EARTH_RADIUS_MILES = 3958.8
+SOURCES_PER_TASK = 16
+ADDRESS_COLUMNS = ("Name", "Street", "City", "State", "Zip Code")
+ONEWAY_VALUES = {"yes", "true", "1"}
+
+EdgeMap = dict[int, dict[int, float]]
+
+
+class MappedAddress(NamedTuple):
+    name: str
+    street: str
+    city: str
+    state: str
+    zip_code: str
+    node: int
+
+
+@dataclass
+class RoadGraph:
+    out_edges: EdgeMap = field(default_factory=dict)
+    coordinates: dict[int, tuple[float, float]] = field(default_factory=dict)
+
+    @classmethod
+    def from_path(cls, path: Path) -> RoadGraph:
+        if path.suffix.lower() == ".pbf":
+            return cls.from_osm_pbf(path)
+        return cls.from_edge_csv(path)
+
+    @classmethod
+    def from_edge_csv(cls, path: Path) -> RoadGraph:
+        """Read `source,target,miles` rows; an optional `oneway` column marks directed edges."""
+        graph = cls()
+        with path.open(newline="", encoding="utf-8-sig") as file:
+            for row in csv.DictReader(file):
+                graph.add_edge(
+                    int(row["source"]),
+                    int(row["target"]),
+                    float(row["miles"]),
+                    oneway=(row.get("oneway") or "").strip().lower() in ONEWAY_VALUES,
+                )
+        return graph
+
+    @classmethod
+    def from_osm_pbf(cls, path: Path) -> RoadGraph:
+        import osmium
+
+        graph = cls()
+
+        class WayHandler(osmium.SimpleHandler):
+            def way(self, way: osmium.osm.Way) -> None:
+                if "highway" not in way.tags:
+                    return
+                oneway = way.tags.get("oneway", "no") in ONEWAY_VALUES
+                previous = None
+                for node in way.nodes:
+                    if not node.location.valid():
+                        previous = None
+                        continue
+                    graph.coordinates[node.ref] = (node.lat, node.lon)
+                    if previous is not None:
+                        graph.add_edge(
+                            previous,
+                            node.ref,
+                            haversine_miles(
+                                graph.coordinates[previous],
+                                graph.coordinates[node.ref],
+                            ),
+                            oneway=oneway,
+                        )
+                    previous = node.ref
+
+        WayHandler().apply_file(str(path), locations=True)
+        return graph
+
+    def add_edge(
+        self,
+        source: int,
+        target: int,
+        miles: float,
+        oneway: bool = False,
+    ) -> None:
+        if source == target:
+            return
+        for start, end in ((source, target),) if oneway else (
+            (source, target),
+            (target, source),
+        ):
+            edges = self.out_edges.setdefault(start, {})
+            self.out_edges.setdefault(end, {})
+            if miles < edges.get(end, math.inf):
+                edges[end] = miles
+
+    def nearest_node(self, latitude: float, longitude: float) -> int:
+        if not self.coordinates:
+            raise ValueError("The road graph has no coordinates to match addresses to.")
+        node_ids = np.fromiter(self.coordinates, dtype=np.int64)
+        points = np.radians(np.array(list(self.coordinates.values())))
+        latitude, longitude = math.radians(latitude), math.radians(longitude)
+        x = (points[:, 1] - longitude) * math.cos(latitude)
+        y = points[:, 0] - latitude
+        return int(node_ids[np.argmin(x * x + y * y)])
+
+    def contracted(self, keep: set[int]) -> RoadGraph:
+        """Contract nodes with at most two neighbors that no address uses.
+
+        Like one round of contraction hierarchies restricted to nodes that need
+        no witness search: paths through a removed node are kept as shortcuts,
+        so distances between the remaining nodes are unchanged.
+        """
+        out_edges = {node: dict(edges) for node, edges in self.out_edges.items()}
+        in_edges: EdgeMap = {node: {} for node in out_edges}
+        for source, edges in out_edges.items():
+            for target, miles in edges.items():
+                in_edges[target][source] = miles
+
+        queue = list(out_edges)
+        while queue:
+            node = queue.pop()
+            if node in keep or node not in out_edges:
+                continue
+            neighbors = out_edges[node].keys() | in_edges[node].keys()
+            if len(neighbors) > 2:
+                continue
+            for source, miles_in in in_edges[node].items():
+                for target, miles_out in out_edges[node].items():
+                    miles = miles_in + miles_out
+                    if source != target and miles < out_edges[source].get(
+                        target,
+                        math.inf,
+                    ):
+                        out_edges[source][target] = miles
+                        in_edges[target][source] = miles
+            for source in in_edges.pop(node):
+                del out_edges[source][node]
+            for target in out_edges.pop(node):
+                del in_edges[target][node]
+            queue.extend(neighbors)
+
+        return RoadGraph(
+            out_edges,
+            {
+                node: coordinate
+                for node, coordinate in self.coordinates.items()
+                if node in out_edges
+            },
+        )
+
+    def compact(self, addresses: Sequence[MappedAddress]) -> CompactGraph:
+        positions = {node: position for position, node in enumerate(self.out_edges)}
+        offsets = [0]
+        targets = []
+        weights = []
+        for edges in self.out_edges.values():
+            targets.extend(positions[target] for target in edges)
+            weights.extend(edges.values())
+            offsets.append(len(targets))
+        address_columns: dict[int, list[int]] = {}
+        for column, address in enumerate(addresses):
+            if address.node not in positions:
+                raise ValueError(
+                    f"{address.street} is mapped to node {address.node}, "
+                    "which is not in the road graph.",
+                )
+            address_columns.setdefault(positions[address.node], []).append(column)
+        return CompactGraph(
+            offsets,
+            targets,
+            weights,
+            address_columns,
+            [positions[address.node] for address in addresses],
+        )
+
+
+class CompactGraph(NamedTuple):
+    """Adjacency lists flattened into plain lists, which is what workers receive."""
+
+    offsets: list[int]
+    targets: list[int]
+    weights: list[float]
+    address_columns: dict[int, list[int]]
+    address_positions: list[int]
+
+
+def haversine_miles(start: tuple[float, float], end: tuple[float, float]) -> float:
+    start_latitude, start_longitude = map(math.radians, start)
+    end_latitude, end_longitude = map(math.radians, end)
+    a = (
+        math.sin((end_latitude - start_latitude) / 2) ** 2
+        + math.cos(start_latitude)
+        * math.cos(end_latitude)
+        * math.sin((end_longitude - start_longitude) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_MILES * math.asin(math.sqrt(a))
+
+
+def read_mapped_addresses(path: Path, graph: RoadGraph) -> list[MappedAddress]:
+    """Read address rows with either a `node` id or `latitude` and `longitude`."""
+    with path.open(newline="", encoding="utf-8-sig") as file:
+        rows = list(csv.DictReader(file))
+    addresses = []
+    for row in rows:
+        if (row.get("node") or "").strip():
+            node = int(row["node"])
+        else:
+            node = graph.nearest_node(float(row["latitude"]), float(row["longitude"]))
+        addresses.append(
+            MappedAddress(*(row[column].strip() for column in ADDRESS_COLUMNS), node),
+        )
+    return addresses
+
+
+def shortest_distances(graph: CompactGraph, source: int, column_count: int) -> list[float]:
+    """Dijkstra from one node, stopping once every address node is settled."""
+    offsets, targets, weights = graph.offsets, graph.targets, graph.weights
+    address_columns = graph.address_columns
+    row = [math.inf] * column_count
+    distances = [math.inf] * (len(offsets) - 1)
+    distances[source] = 0.0
+    settled = bytearray(len(offsets) - 1)
+    remaining = len(address_columns)
+    heap = [(0.0, source)]
+    while heap and remaining:
+        distance, node = heapq.heappop(heap)
+        if settled[node]:
+            continue
+        settled[node] = 1
+        columns = address_columns.get(node)
+        if columns:
+            remaining -= 1
+            for column in columns:
+                row[column] = distance
+        for edge in range(offsets[node], offsets[node + 1]):
+            target = targets[edge]
+            candidate = distance + weights[edge]
+            if candidate < distances[target]:
+                distances[target] = candidate
+                heapq.heappush(heap, (candidate, target))
+    return row
+
+
+_worker_graph: CompactGraph | None = None
+
+
+def _initialize_worker(graph: CompactGraph) -> None:
+    global _worker_graph
+    _worker_graph = graph
+
+
+def _distance_rows(sources: list[int]) -> list[list[float]]:
+    column_count = len(_worker_graph.address_positions)
+    return [
+        shortest_distances(_worker_graph, source, column_count) for source in sources
+    ]
+
+
+def build_distance_matrix(
+    graph: RoadGraph,
+    addresses: Sequence[MappedAddress],
+    max_workers: int | None = None,
+    progress: Callable[[float], None] | None = None,
+) -> np.ndarray:
+    """Shortest road distances in miles between every pair of addresses."""
+    compact = graph.contracted({address.node for address in addresses}).compact(
+        addresses,
+    )
+    sources = compact.address_positions
+    chunks = [
+        sources[first : first + SOURCES_PER_TASK]
+        for first in range(0, len(sources), SOURCES_PER_TASK)
+    ]
+    rows = []
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=_initialize_worker,
+        initargs=(compact,),
+    ) as executor:
+        for chunk_rows in executor.map(_distance_rows, chunks):
+            rows.extend(chunk_rows)
+            if progress:
+                progress(len(rows) / len(sources))
+    matrix = np.array(rows, dtype=np.float64).reshape(len(addresses), len(addresses))
+
+    unreachable = np.argwhere(np.isinf(matrix))
+    if len(unreachable):
+        source, target = unreachable[0]
+        raise ValueError(
+            f"{len(unreachable)} address pairs are not connected, e.g. "
+            f"{addresses[target].street} cannot be reached from "
+            f"{addresses[source].street}.",
+        )
+    return matrix
+
+
+def write_distance_matrix(
+    addresses: Sequence[MappedAddress],
+    matrix: np.ndarray,
+    path: Path,
+    decimals: int = 1,
+) -> None:
+    """Write the matrix in the layout of the bundled distance_matrix.csv."""
+    with path.open("w", newline="", encoding="utf-8-sig") as file:
+        writer = csv.writer(file)
+        writer.writerow([*ADDRESS_COLUMNS, *(address.street for address in addresses)])
+        for address, distances in zip(addresses, matrix.round(decimals).tolist()):
+            writer.writerow(
+                [
+                    *address[: len(ADDRESS_COLUMNS)],
+                    *(str(miles).removesuffix(".0") for miles in distances),
+                ],
+            )
+
@@ -1,20 +1,315 @@
 from __future__ import annotations
 
-from typing import Callable
+import collections
+import concurrent.futures
+import copy
+import dataclasses
+import heapq
+import itertools
+import logging
+import math
+import operator
+import os
+import time
+from typing import TYPE_CHECKING, Callable, Iterable
 
-from ortools.constraint_solver import pywrapcp
+import numpy as np
+from ortools.constraint_solver import pywrapcp, routing_parameters_pb2
 
 from delivery_route_planner.models import models
+from delivery_route_planner.screening import screening
 
+if TYPE_CHECKING:
+    from delivery_route_planner.bounds import bounds
 
-def solve_vehicle_routing_problem(data: models.DataModel) -> models.Solution | None:
+REPLAN_TIME_LIMIT_SECONDS = 5
+PINNED_TIME_LIMIT_SHARE = 0.25
+# Cost of a second on the road when optimizing for time. A mile costs
+# MILEAGE_SCALE_FACTOR, so working hours outweigh mileage.
+TIME_SPAN_COST_PER_SECOND = 1
+STOP_TOLERANCE_SECONDS = 0.5
+# The search after the pinned pre-solves gets at least this long to read
+# its initial routes, even when the pre-solves used up the time limit.
+MIN_SEARCH_SECONDS = 0.1
 
+
+def solve_vehicle_routing_problem(
+    data: models.DataModel,
+    initial_solution: models.Solution | None = None,
+    incumbent_callback: Callable[[int, list[list[int]]], None] | None = None,
+) -> models.Solution | None:
+    """Search for routes, starting from initial_solution's routes if given.
+
+    incumbent_callback receives the objective and each vehicle's node
+    indices, without its start and end, whenever the search accepts a
+    solution. The cooperative parallel search and separately solved depots
+    do not report incumbents.
+
+    With use_adaptive_time_limit, the time limit only caps a budget chosen
+    from the day's features, the solution limit is lifted and the search
+    stops once improvements stall. The solution reports the budget and why
+    the search stopped.
+
+    With report_optimality_gap, a mileage lower bound is computed in a
+    worker process during the search and reported with the solution. The
+    single search then stops early once it is within target_optimality_gap
+    of the bound.
+    """
+    solve_started = time.monotonic()
+    check_pin_conflicts(data)
+    if data.settings.use_adaptive_time_limit:
+        from delivery_route_planner.budget import budget
+
+        data = dataclasses.replace(
+            data,
+            settings=dataclasses.replace(
+                data.settings,
+                solver_time_limit_seconds=budget.choose_time_budget(data),
+                solver_solution_limit=None,
+            ),
+        )
+    if not data.settings.report_optimality_gap:
+        solution, stop_reason = search_routes(data, initial_solution, incumbent_callback)
+        return report_search(solution, data.settings, solve_started, stop_reason)
+
+    from delivery_route_planner.bounds import bounds
+
+    with bounds.bound_in_background(data) as mileage_bound:
+        solution, stop_reason = search_routes(
+            data,
+            initial_solution,
+            incumbent_callback,
+            mileage_bound,
+        )
+        return report_search(
+            solution,
+            data.settings,
+            solve_started,
+            stop_reason,
+            bounds.bound_result(mileage_bound),
+        )
+
+
+def search_routes(
+    data: models.DataModel,
+    initial_solution: models.Solution | None = None,
+    incumbent_callback: Callable[[int, list[list[int]]], None] | None = None,
+    mileage_bound: concurrent.futures.Future[bounds.MileageBound] | None = None,
+) -> tuple[models.Solution | None, models.StopReason | None]:
+    """The routes and why the search stopped.
+
+    Pruned successors keep the arcs of the initial routes, which come from
+    regret insertion when none are given. If the pruned search delivers
+    fewer packages than those routes, it runs again on all arcs for the rest
+    of the time limit.
+    """
+    if not data.settings.candidate_neighbor_count:
+        return run_search(data, initial_solution, incumbent_callback, mileage_bound)
+    started = time.monotonic()
+    if initial_solution is None:
+        from delivery_route_planner.construction import construction
+
+        initial_solution = construction.build_initial_solution(data)
+    solution, stop_reason = run_search(
+        data,
+        initial_solution,
+        incumbent_callback,
+        mileage_bound,
+    )
+    if (
+        solution is not None
+        and solution.delivered_packages_count
+        >= initial_solution.delivered_packages_count
+    ):
+        return solution, stop_reason
+    logging.warning(
+        "The search on pruned arcs delivered %s of %s packages; searching all arcs.",
+        solution.delivered_packages_count if solution else 0,
+        initial_solution.delivered_packages_count,
+    )
+    time_limit_seconds = data.settings.solver_time_limit_seconds
+    if time_limit_seconds:
+        time_limit_seconds = max(
+            int(time_limit_seconds - (time.monotonic() - started)),
+            1,
+        )
+    unpruned_data = dataclasses.replace(
+        data,
+        settings=dataclasses.replace(
+            data.settings,
+            candidate_neighbor_count=None,
+            solver_time_limit_seconds=time_limit_seconds,
+        ),
+    )
+    return run_search(
+        unpruned_data,
+        initial_solution,
+        incumbent_callback,
+        mileage_bound,
+    )
+
+
+def run_search(
+    data: models.DataModel,
+    initial_solution: models.Solution | None = None,
+    incumbent_callback: Callable[[int, list[list[int]]], None] | None = None,
+    mileage_bound: concurrent.futures.Future[bounds.MileageBound] | None = None,
+) -> tuple[models.Solution | None, models.StopReason | None]:
+    """Search with the path the settings choose, without the pruning fallback."""
+    if data.settings.solve_depots_separately:
+        from delivery_route_planner.depots import depots
+
+        if len(depots.find_depot_groups(data)) > 1:
+            return depots.solve_depots_separately(data)
+    if data.settings.use_parallel_search:
+        from delivery_route_planner.lns import lns
+
+        return lns.solve_cooperatively(data, initial_solution)
+    pinned_started = None
+    if data.settings.solve_pinned_vehicles_first:
+        from delivery_route_planner.construction import construction
+
+        pinned_started = time.monotonic()
+        initial_solution = min(
+            construction.build_initial_solution(data, solve_pinned_vehicles(data)),
+            initial_solution or construction.build_initial_solution(data),
+            key=lambda solution: (-solution.delivered_packages_count, solution.mileage),
+        )
+    manager, router = create_routing_model(data, initial_solution)
+    search = create_search_parameters(data.settings)
+    if incumbent_callback:
+
+        def report_incumbent() -> None:
+            routes = []
+            for vehicle_index in range(router.vehicles()):
+                index = router.NextVar(router.Start(vehicle_index)).Value()
+                route = []
+                while not router.IsEnd(index):
+                    route.append(manager.IndexToNode(index))
+                    index = router.NextVar(index).Value()
+                routes.append(route)
+            incumbent_callback(router.CostVar().Value(), routes)
+
+        router.AddAtSolutionCallback(report_incumbent)
+    initial_routes = None
+    if initial_solution is not None:
+        initial_routes = solution_routes(manager, initial_solution)
+    if pinned_started is not None and data.settings.solver_time_limit_seconds:
+        search.time_limit.FromMilliseconds(
+            int(
+                max(
+                    data.settings.solver_time_limit_seconds
+                    - (time.monotonic() - pinned_started),
+                    MIN_SEARCH_SECONDS,
+                )
+                * 1000,
+            ),
+        )
+    if (
+        initial_routes
+        and data.settings.candidate_neighbor_count
+        and not routes_fit_arcs(router, initial_routes)
+    ):
+        return None, None
+    stall_monitor = None
+    if data.settings.use_adaptive_time_limit:
+        from delivery_route_planner.budget import budget
+
+        stall_monitor = budget.StallMonitor(router, search.time_limit.seconds)
+        router.AddAtSolutionCallback(stall_monitor)
+    gap_monitor = None
+    if data.settings.target_optimality_gap is not None and mileage_bound is not None:
+        from delivery_route_planner.bounds import bounds
+
+        gap_monitor = bounds.GapMonitor(
+            data,
+            manager,
+            router,
+            mileage_bound,
+            data.settings.target_optimality_gap,
+        )
+        router.AddAtSolutionCallback(gap_monitor)
+    search_started = time.monotonic()
+    assignments = solve_from_routes(router, search, initial_routes)
+    search_seconds = time.monotonic() - search_started
+
+    if not assignments:
+        return None, None
+    solution = models.Solution.save_solution(data, manager, router, assignments)
+    if data.settings.polish_routes:
+        from delivery_route_planner.polishing import polishing
+
+        solution = polishing.polish_solution(solution)
+    if gap_monitor and gap_monitor.is_reached:
+        stop_reason = models.StopReason.GAP_REACHED
+    elif stall_monitor and stall_monitor.is_stalled:
+        stop_reason = models.StopReason.STALLED
+    elif (
+        data.settings.solver_time_limit_seconds
+        and search_seconds
+        >= search.time_limit.ToTimedelta().total_seconds() - STOP_TOLERANCE_SECONDS
+    ):
+        stop_reason = models.StopReason.TIME_LIMIT
+    elif data.settings.solver_solution_limit:
+        stop_reason = models.StopReason.SOLUTION_LIMIT
+    else:
+        stop_reason = models.StopReason.COMPLETED
+    return solution, stop_reason
+
+
+def report_search(
+    solution: models.Solution | None,
+    settings: models.SearchSettings,
+    started: float,
+    stop_reason: models.StopReason | None,
+    mileage_bound: bounds.MileageBound | None = None,
+) -> models.Solution | None:
+    """Record the time budget, the time taken, why the search stopped and the bound."""
+    if solution is None:
+        return None
+    solution.search_report = models.SearchReport(
+        settings.solver_time_limit_seconds,
+        time.monotonic() - started,
+        stop_reason,
+        mileage_bound.miles if mileage_bound else None,
+        mileage_bound.package_count if mileage_bound else 0,
+    )
+    return solution
+
+
+def create_routing_model(
+    data: models.DataModel,
+    initial_solution: models.Solution | None = None,
+    initial_routes: list[list[int]] | None = None,
+) -> tuple[pywrapcp.RoutingIndexManager, pywrapcp.RoutingModel]:
+    """The routing model of the day.
+
+    Pruning keeps the arcs of initial_solution's routes, or of initial_routes,
+    the node indices each vehicle visits in order of vehicle index.
+    """
+    depot_node_indices = data.depot_node_indices
+    missing_depots = sorted(
+        {vehicle.depot for vehicle in data.vehicles.values()} - depot_node_indices.keys(),
+    )
+    if missing_depots:
+        raise ValueError(f"no origin nodes for depots {', '.join(missing_depots)}")
+    check_pin_conflicts(data)
+    vehicle_depots = [
+        depot_node_indices[vehicle.depot] for vehicle in data.vehicles.values()
+    ]
     manager = pywrapcp.RoutingIndexManager(
         len(data.nodes),
         len(data.vehicles),
-        models.Node.origin_id,
+        vehicle_depots,
+        vehicle_depots,
     )
     router = pywrapcp.RoutingModel(manager)
+    for node_index in depot_node_indices.values():
+        if node_index not in vehicle_depots:
+            # A depot without vehicles is never visited.
+            index = manager.NodeToIndex(node_index)
+            router.ActiveVar(index).SetValue(0)
+            router.AddDisjunction([index], 0)
 
     def distance_callback(from_index: int, to_index: int) -> int:
         from_node = data.nodes[manager.IndexToNode(from_index)]
@@ -62,6 +357,8 @@ def solve_vehicle_routing_problem(data: models.DataModel) -> models.Solution | N
         name="Time",
     )
     time_dimension = router.GetDimensionOrDie("Time")
+    if data.scenario.optimization == models.OptimizationType.TIME:
+        time_dimension.SetSpanCostCoefficientForAllVehicles(TIME_SPAN_COST_PER_SECOND)
     for vehicle in data.vehicles.values():
         index = router.Start(vehicle.index)
         time_dimension.CumulVar(index).SetRange(0, day_duration)
@@ -72,40 +369,38 @@ def solve_vehicle_routing_problem(data: models.DataModel) -> models.Solution | N
             time_dimension.CumulVar(router.End(vehicle.index)),
         )
 
+    pickup_indices = {}
+    package_windows = screening.compute_package_windows(data)
+    infeasible_packages = screening.find_infeasible_packages(data, package_windows)
     for node_index, node in enumerate(data.nodes):
         if not node.package:
             continue
 
         index = manager.NodeToIndex(node_index)
         node_drop_penalty = data.settings.base_penalty
+        window = package_windows[node.package.id]
 
-        start_time = (
-            node.package.shipping_availability
-            if node.package.shipping_availability
-            and data.scenario.day_start.seconds
-            < node.package.shipping_availability.seconds
-            else data.scenario.day_start
-        )
-        end_time = (
-            node.package.delivery_deadline
-            if node.package.delivery_deadline
-            and data.scenario.day_end.seconds > node.package.delivery_deadline.seconds
-            else data.scenario.day_end
-        )
-        start_seconds = start_time.duration_after(data.scenario.day_start)
-        end_seconds = end_time.duration_after(data.scenario.day_start)
-        if end_seconds > start_seconds:
-            time_dimension.CumulVar(index).SetRange(start_seconds, end_seconds)
-            node_drop_penalty *= day_duration / (end_seconds - start_seconds)
-        else:
-            time_dimension.CumulVar(index).SetRange(0, 0)
+        if node.package.id in infeasible_packages:
+            router.ActiveVar(index).SetValue(0)
             node_drop_penalty = 0
+        else:
+            if node.kind == models.NodeKind.PICKUP:
+                time_dimension.CumulVar(index).SetRange(
+                    window.earliest_pickup,
+                    window.latest_pickup,
+                )
+            else:
+                time_dimension.CumulVar(index).SetRange(
+                    window.earliest_delivery,
+                    window.latest_delivery,
+                )
+            node_drop_penalty *= day_duration / max(window.requested_seconds, 1)
 
-        req_vehicle_index = node.package.required_vehicle_index
+            req_vehicle_index = node.package.required_vehicle_index
 
-        if req_vehicle_index:
-            router.SetAllowedVehiclesForIndex([req_vehicle_index], index)
-            node_drop_penalty *= data.settings.penalty_scale_req_vehicle
+            if req_vehicle_index is not None:
+                router.SetAllowedVehiclesForIndex([req_vehicle_index], index)
+                node_drop_penalty *= data.settings.penalty_scale_req_vehicle
 
         if node.kind == models.NodeKind.PICKUP:
             node_drop_penalty *= data.settings.penalty_scale_pickups
@@ -120,16 +415,25 @@ def solve_vehicle_routing_problem(data: models.DataModel) -> models.Solution | N
                 distance_dimension.CumulVar(index)
                 <= distance_dimension.CumulVar(paired_index),
             )
-            for bundled_package in node.package.bundled_packages:
-                linked_index = manager.NodeToIndex(
-                    bundled_package.pickup_node_index(data.nodes),
-                )
-                router.solver().Add(
-                    router.VehicleVar(index) == router.VehicleVar(linked_index),
-                )
+            pickup_indices[node.package.id] = index
 
         router.AddDisjunction([index], int(node_drop_penalty))
 
+    for bundle in screening.find_bundles(data):
+        bundle_indices = [pickup_indices[package_id] for package_id in bundle]
+        for index, linked_index in itertools.pairwise(bundle_indices):
+            router.solver().Add(
+                router.VehicleVar(index) == router.VehicleVar(linked_index),
+            )
+        pinned_indices = {
+            data.packages[package_id].required_vehicle_index
+            for package_id in bundle
+            if data.packages[package_id].vehicle_requirement
+        }
+        if len(pinned_indices) == 1 and bundle[0] not in infeasible_packages:
+            for index in bundle_indices:
+                router.SetAllowedVehiclesForIndex(list(pinned_indices), index)
+
     def capacity_callback(from_index: int) -> int:
         from_node = manager.IndexToNode(from_index)
         return data.nodes[from_node].kind.capacity_impact
@@ -144,17 +448,406 @@ def solve_vehicle_routing_problem(data: models.DataModel) -> models.Solution | N
         name="Capacity",
     )
 
-    search = pywrapcp.DefaultRoutingSearchParameters()
-    search.first_solution_strategy = data.settings.first_solution_strategy
-    search.local_search_metaheuristic = data.settings.local_search_metaheuristic
-    search.use_full_propagation = data.settings.use_full_propagation
+    if data.settings.candidate_neighbor_count:
+        if initial_solution is not None:
+            initial_routes = [
+                route.node_indices[1:-1].tolist()
+                for route in sorted(
+                    initial_solution.routes,
+                    key=lambda route: route.vehicle.index,
+                )
+            ]
+        prune_candidate_arcs(
+            data,
+            manager,
+            router,
+            data.settings.candidate_neighbor_count,
+            initial_routes,
+        )
+
+    return manager, router
+
+
+def check_pin_conflicts(data: models.DataModel) -> None:
+    """Raise ValueError if linked packages require different vehicles.
+
+    No routes can deliver such packages together, so the day is rejected
+    before any search instead of leaving them out.
+    """
+    conflicts = screening.find_pin_conflicts(data)
+    if conflicts:
+        raise ValueError(
+            "; ".join(
+                f"linked packages {', '.join(map(str, bundle))} require vehicles "
+                f"{screening.join_vehicle_ids(vehicle_ids)}"
+                for bundle, vehicle_ids in conflicts
+            ),
+        )
+
+
+def prune_candidate_arcs(
+    data: models.DataModel,
+    manager: pywrapcp.RoutingIndexManager,
+    router: pywrapcp.RoutingModel,
+    neighbor_count: int,
+    initial_routes: list[list[int]] | None = None,
+) -> int:
+    """Limit each node's successors to nodes at its nearest addresses.
+
+    Deliveries may always return to a depot or go on to a pickup, and
+    pickups may always move on to another pickup or to any delivery loaded
+    at their depot, so every first trip out of a depot stays possible.
+    Successors that cannot be reached within their time window are removed
+    as well, except for the arcs of initial_routes, which the search
+    starts from. Returns the number of removed arcs.
+    """
+    time_dimension = router.GetDimensionOrDie("Time")
+    travel_costs = max(
+        data.vehicles.values(),
+        key=lambda vehicle: vehicle.speed_mph,
+    ).duration_map.cost_map
+    depots = {package.origin_depot for package in data.packages.values()}
+    nearby_streets = {
+        street: [
+            neighbor
+            for neighbor, _ in heapq.nsmallest(
+                neighbor_count + 1,
+                address.distance_map_miles.items(),
+                key=operator.itemgetter(1),
+            )
+            if neighbor not in depots
+        ]
+        for street, address in data.addresses.items()
+    }
+    indices_by_street = collections.defaultdict(list)
+    deliveries_by_depot = collections.defaultdict(list)
+    for node_index, node in enumerate(data.nodes):
+        if node.package:
+            indices_by_street[node.address].append(manager.NodeToIndex(node_index))
+            if node.kind == models.NodeKind.DELIVERY:
+                deliveries_by_depot[node.package.origin_depot].append(
+                    manager.NodeToIndex(node_index),
+                )
+    depot_indices = [
+        index for street in sorted(depots) for index in indices_by_street[street]
+    ]
+    depot_indices += [router.End(vehicle.index) for vehicle in data.vehicles.values()]
+    initial_successors = {}
+    for vehicle_index, node_indices in enumerate(initial_routes or []):
+        indices = [manager.NodeToIndex(node_index) for node_index in node_indices]
+        indices.append(router.End(vehicle_index))
+        initial_successors.update(itertools.pairwise(indices))
+
+    removed_count = 0
+    for node_index, node in enumerate(data.nodes):
+        if not node.package:
+            continue
+        index = manager.NodeToIndex(node_index)
+        earliest = time_dimension.CumulVar(index).Min()
+        if node.kind == models.NodeKind.PICKUP:
+            paired_index = manager.NodeToIndex(
+                node.package.delivery_node_index(data.nodes),
+            )
+        else:
+            paired_index = manager.NodeToIndex(
+                node.package.pickup_node_index(data.nodes),
+            )
+        candidates = [
+            successor
+            for street in nearby_streets[node.address]
+            for successor in indices_by_street[street]
+        ]
+        candidates.extend(depot_indices)
+        if node.kind == models.NodeKind.PICKUP:
+            candidates.extend(deliveries_by_depot[node.package.origin_depot])
+        allowed = {index}
+        if index in initial_successors:
+            allowed.add(initial_successors[index])
+        for successor in candidates:
+            if successor in allowed or (
+                node.kind == models.NodeKind.DELIVERY and successor == paired_index
+            ):
+                continue
+            street = data.nodes[manager.IndexToNode(successor)].address
+            if (
+                earliest + travel_costs[node.address][street]
+                <= time_dimension.CumulVar(successor).Max()
+            ):
+                allowed.add(successor)
+        next_var = router.NextVar(index)
+        removed_count += next_var.Size() - len(allowed)
+        next_var.SetValues(sorted(allowed))
+    return removed_count
+
+
+def solve_from_routes(
+    router: pywrapcp.RoutingModel,
+    search: routing_parameters_pb2.RoutingSearchParameters,
+    routes: list[list[int]] | None,
+) -> pywrapcp.Assignment | None:
+    """Search from the given routes if they are feasible, otherwise from scratch."""
+    if routes:
+        router.CloseModelWithParameters(search)
+        initial_assignment = router.ReadAssignmentFromRoutes(routes, True)
+        if initial_assignment:
+            return router.SolveFromAssignmentWithParameters(initial_assignment, search)
+    return router.SolveWithParameters(search)
+
+
+def routes_fit_arcs(router: pywrapcp.RoutingModel, routes: list[list[int]]) -> bool:
+    """Whether pruning left every arc of the routes in the successor domains."""
+    for vehicle_index, route in enumerate(routes):
+        indices = [router.Start(vehicle_index), *route, router.End(vehicle_index)]
+        if not all(
+            router.NextVar(index).Contains(successor)
+            for index, successor in itertools.pairwise(indices)
+        ):
+            return False
+    return True
+
+
+def solve_pinned_vehicles(data: models.DataModel) -> dict[int, list[tuple[int, int]]]:
+    """Route each pinned vehicle's packages on their own, in parallel.
+
+    Together the sub-problems take a quarter of the time limit.
+
+    Returns the stops of each pinned vehicle as (package id, capacity impact)
+    pairs, for the initial routes of the full search, which may still move
+    any of them.
+    """
+    infeasible_packages = screening.find_infeasible_packages(data)
+    bundles = {
+        package_id: bundle
+        for bundle in screening.find_bundles(data)
+        for package_id in bundle
+    }
+    pinned_packages = collections.defaultdict(dict)
+    for package in data.packages.values():
+        if package.id in infeasible_packages:
+            continue
+        vehicle_ids = {
+            data.packages[package_id].vehicle_requirement.id
+            for package_id in bundles.get(package.id, [package.id])
+            if data.packages[package_id].vehicle_requirement
+        }
+        if len(vehicle_ids) == 1:
+            pinned_packages[vehicle_ids.pop()][package.id] = package
+
+    vehicle_ids = list(pinned_packages)
+    worker_count = min(len(vehicle_ids), os.cpu_count() or 1)
+    time_limit_seconds = None
     if data.settings.solver_time_limit_seconds:
-        search.time_limit.seconds = data.settings.solver_time_limit_seconds
-    if data.settings.solver_solution_limit:
-        search.solution_limit = data.settings.solver_solution_limit
-    search.log_search = data.settings.use_search_logging
+        time_limit_seconds = max(
+            int(
+                data.settings.solver_time_limit_seconds
+                * PINNED_TIME_LIMIT_SHARE
+                / math.ceil(len(vehicle_ids) / max(worker_count, 1)),
+            ),
+            1,
+        )
+
+    def create_subproblems(source: models.DataModel) -> list[models.DataModel]:
+        return [
+            create_pinned_subproblem(
+                source,
+                source.vehicles[vehicle_id],
+                {
+                    package_id: source.packages[package_id]
+                    for package_id in pinned_packages[vehicle_id]
+                },
+                time_limit_seconds,
+            )
+            for vehicle_id in vehicle_ids
+        ]
+
+    if worker_count > 1:
+        with (
+            data.share_matrices() as shared_data,
+            concurrent.futures.ProcessPoolExecutor(max_workers=worker_count) as executor,
+        ):
+            stops = list(
+                executor.map(solve_pinned_subproblem, create_subproblems(shared_data)),
+            )
+    else:
+        stops = [
+            solve_pinned_subproblem(subproblem)
+            for subproblem in create_subproblems(data)
+        ]
+
+    return dict(zip(vehicle_ids, stops))
+
+
+def solution_routes(
+    manager: pywrapcp.RoutingIndexManager,
+    solution: models.Solution,
+) -> list[list[int]]:
+    """Visited routing indices per vehicle of a solution for the same data."""
+    routes = sorted(solution.routes, key=lambda route: route.vehicle.index)
+    return [
+        [manager.NodeToIndex(node_index) for node_index in route.node_indices[1:-1].tolist()]
+        for route in routes
+    ]
+
+
+def read_routes(
+    router: pywrapcp.RoutingModel,
+    assignment: pywrapcp.Assignment,
+) -> list[list[int]]:
+    """Visited routing indices per vehicle, without starts and ends."""
+    routes = []
+    for vehicle_index in range(router.vehicles()):
+        index = router.Next(assignment, router.Start(vehicle_index))
+        route = []
+        while not router.IsEnd(index):
+            route.append(index)
+            index = router.Next(assignment, index)
+        routes.append(route)
+    return routes
+
+
+def create_pinned_subproblem(
+    data: models.DataModel,
+    vehicle: models.Vehicle,
+    packages: models.PackageDict,
+    time_limit_seconds: int | None,
+) -> models.DataModel:
+    shared_objects = {id(address): address for address in data.addresses.values()}
+    shared_objects |= {id(vehicle): vehicle for vehicle in data.vehicles.values()}
+    packages = copy.deepcopy(packages, shared_objects)
+    for package in packages.values():
+        package.vehicle_requirement = None
+    settings = dataclasses.replace(
+        data.settings,
+        solve_pinned_vehicles_first=False,
+        polish_routes=False,
+        report_optimality_gap=False,
+        solver_time_limit_seconds=time_limit_seconds,
+    )
+    return dataclasses.replace(
+        data,
+        vehicles={1: dataclasses.replace(vehicle, id=1)},
+        packages=packages,
+        nodes=models.Node.from_packages(packages, {1: vehicle}),
+        settings=settings,
+    )
+
+
+def solve_pinned_subproblem(data: models.DataModel) -> list[tuple[int, int]]:
+    """Stops of the single route as (package id, capacity impact) pairs."""
+    solution = solve_vehicle_routing_problem(data)
+    if solution is None:
+        return []
+    return [
+        (node.package.id, node.kind.capacity_impact)
+        for node in (
+            data.nodes[node_index]
+            for node_index in solution.routes[0].node_indices[1:-1].tolist()
+        )
+    ]
+
+
+def create_search_parameters(
+    settings: models.SearchSettings,
+) -> routing_parameters_pb2.RoutingSearchParameters:
+    search = pywrapcp.DefaultRoutingSearchParameters()
+    search.first_solution_strategy = settings.first_solution_strategy
+    search.local_search_metaheuristic = settings.local_search_metaheuristic
+    search.use_full_propagation = settings.use_full_propagation
+    if settings.solver_time_limit_seconds:
+        search.time_limit.seconds = settings.solver_time_limit_seconds
+    if settings.solver_solution_limit:
+        search.solution_limit = settings.solver_solution_limit
+    search.log_search = settings.use_search_logging
+    return search
+
+
+def replan_vehicle_routing_problem(
+    solution: models.Solution,
+    current_time: models.RoutingTime,
+    new_packages: Iterable[models.Package] = (),
+    time_limit_seconds: int = REPLAN_TIME_LIMIT_SECONDS,
+) -> models.Solution | None:
+    """Re-optimize what is left of the day, keeping every stop visited by now.
+
+    New packages get node indices after the existing ones, so the old routes
+    remain valid node sequences and seed the search.
+    """
+    data = copy.deepcopy(solution.data)
+    for package in data.packages.values():
+        package.shipped_time = None
+        package.delivered_time = None
+        package.vehicle_used = None
+    nodes = list(data.nodes)
+    packages = dict(data.packages)
+    for package in new_packages:
+        packages[package.id] = package
+        nodes.append(models.Node(models.NodeKind.PICKUP, package.origin_depot, package))
+        nodes.append(models.Node(models.NodeKind.DELIVERY, package.address.street, package))
+    data = dataclasses.replace(data, packages=packages, nodes=nodes)
+    data.settings.solver_time_limit_seconds = time_limit_seconds
+
+    # The old routes keep their arcs when successors are pruned, so the
+    # visited prefixes can be fixed below.
+    manager, router = create_routing_model(data, solution)
+    search = create_search_parameters(data.settings)
+
+    time_dimension = router.GetDimensionOrDie("Time")
+    now = max(current_time.duration_after(data.scenario.day_start), 0)
+    locked_indices = set()
+    warm_start_routes = []
+    for route in solution.routes:
+        vehicle_index = route.vehicle.index
+        node_indices = route.node_indices[1:-1].tolist()
+        visited_count = int(
+            np.count_nonzero(route.visit_seconds[1:-1] <= current_time.seconds),
+        )
+        previous_index = router.Start(vehicle_index)
+        if visited_count:
+            time_dimension.CumulVar(previous_index).SetValue(
+                int(route.visit_seconds[0]) - data.scenario.day_start.seconds,
+            )
+        for position, node_index in enumerate(node_indices[:visited_count], 1):
+            index = manager.NodeToIndex(node_index)
+            router.NextVar(previous_index).SetValue(index)
+            time_dimension.CumulVar(index).SetValue(
+                int(route.visit_seconds[position]) - data.scenario.day_start.seconds,
+            )
+            locked_indices.add(index)
+            previous_index = index
+        warm_start_routes.append(
+            [manager.NodeToIndex(node_index) for node_index in node_indices],
+        )
+
+    day_duration = data.scenario.day_start.duration_until(data.scenario.day_end)
+    dropped_indices = set()
+    for node_index, node in enumerate(data.nodes):
+        index = manager.NodeToIndex(node_index)
+        if not node.package or index in locked_indices:
+            continue
+        cumul = time_dimension.CumulVar(index)
+        if cumul.Max() >= now:
+            cumul.SetMin(now)
+        elif node.kind == models.NodeKind.DELIVERY and manager.NodeToIndex(
+            node.package.pickup_node_index(data.nodes),
+        ) in locked_indices:
+            cumul.SetRange(now, day_duration)
+        else:
+            dropped_indices.add(index)
+            dropped_indices.add(
+                manager.NodeToIndex(
+                    node.package.delivery_node_index(data.nodes)
+                    if node.kind == models.NodeKind.PICKUP
+                    else node.package.pickup_node_index(data.nodes),
+                ),
+            )
+    for index in dropped_indices:
+        router.ActiveVar(index).SetValue(0)
+    warm_start_routes = [
+        [index for index in indices if index not in dropped_indices]
+        for indices in warm_start_routes
+    ]
 
-    assignments = router.SolveWithParameters(search)
+    assignments = solve_from_routes(router, search, warm_start_routes)
 
     if assignments:
         return models.Solution.save_solution(
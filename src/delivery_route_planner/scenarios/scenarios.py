@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import concurrent.futures
+import copy
+import dataclasses
+import hashlib
+import itertools
+import os
+from dataclasses import dataclass
+from typing import Callable, NamedTuple
+
+import numpy as np
+
+from delivery_route_planner.construction import construction
+from delivery_route_planner.models import models
+from delivery_route_planner.routing import routing
+
+SCENARIO_TIME_LIMIT_SECONDS = 10
+
+_result_cache: dict[tuple[str, ScenarioVariant, int], ScenarioResult] = {}
+_worker_data: models.DataModel | None = None
+_worker_duration_maps: dict[float, models.TravelCostMap] = {}
+
+
+class ScenarioVariant(NamedTuple):
+    vehicle_count: int
+    vehicle_speed_mph: float
+    vehicle_capacity: int
+    optimization: models.OptimizationType
+
+    def __str__(self) -> str:
+        return (
+            f"{self.vehicle_count} vehicles at {self.vehicle_speed_mph:g} mph "
+            f"carrying {self.vehicle_capacity}, optimized for "
+            f"{self.optimization.value.lower()}"
+        )
+
+
+class ScenarioResult(NamedTuple):
+    variant: ScenarioVariant
+    mileage: float | None
+    end_time: models.RoutingTime | None
+    delivered_packages_count: int
+    missed_packages_count: int
+
+    @property
+    def is_solved(self) -> bool:
+        return self.mileage is not None
+
+
+@dataclass
+class ScenarioGrid:
+    vehicle_counts: list[int]
+    vehicle_speeds_mph: list[float]
+    vehicle_capacities: list[int]
+    optimizations: list[models.OptimizationType]
+    time_limit_seconds: int = SCENARIO_TIME_LIMIT_SECONDS
+
+    def variants(self) -> list[ScenarioVariant]:
+        return [
+            ScenarioVariant(*values)
+            for values in itertools.product(
+                self.vehicle_counts,
+                self.vehicle_speeds_mph,
+                self.vehicle_capacities,
+                self.optimizations,
+            )
+        ]
+
+
+def sweep_scenarios(
+    data: models.DataModel,
+    grid: ScenarioGrid,
+    max_workers: int | None = None,
+    progress: Callable[[int, int], None] | None = None,
+) -> list[ScenarioResult]:
+    """Solve every variant of the grid, reusing cached results of earlier sweeps.
+
+    Each worker process receives the delivery data once, with its matrices
+    in shared memory, and builds the variants from it; a variant only
+    changes the fleet and the objective.
+    """
+    fingerprint = data_fingerprint(data)
+    variants = grid.variants()
+    results = {
+        variant: _result_cache[fingerprint, variant, grid.time_limit_seconds]
+        for variant in variants
+        if (fingerprint, variant, grid.time_limit_seconds) in _result_cache
+    }
+    missing = [variant for variant in variants if variant not in results]
+    if progress:
+        progress(len(results), len(variants))
+
+    if missing:
+        worker_count = min(len(missing), max_workers or os.cpu_count() or 1)
+        with (
+            data.share_matrices() as shared_data,
+            concurrent.futures.ProcessPoolExecutor(
+                max_workers=worker_count,
+                initializer=_initialize_worker,
+                initargs=(shared_data,),
+            ) as executor,
+        ):
+            futures = [
+                executor.submit(_solve_variant, variant, grid.time_limit_seconds)
+                for variant in missing
+            ]
+            for future in concurrent.futures.as_completed(futures):
+                result = future.result()
+                results[result.variant] = result
+                _result_cache[fingerprint, result.variant, grid.time_limit_seconds] = (
+                    result
+                )
+                if progress:
+                    progress(len(results), len(variants))
+
+    return [results[variant] for variant in variants]
+
+
+def pareto_front(results: list[ScenarioResult]) -> list[ScenarioResult]:
+    """Solved results that no other result beats on mileage, finish time and misses."""
+    solved = [result for result in results if result.is_solved]
+    if not solved:
+        return []
+    values = np.array(
+        [
+            [result.mileage, result.end_time.seconds, result.missed_packages_count]
+            for result in solved
+        ],
+        dtype=np.float64,
+    )
+    no_worse = (values[np.newaxis, :, :] <= values[:, np.newaxis, :]).all(axis=2)
+    better = (values[np.newaxis, :, :] < values[:, np.newaxis, :]).any(axis=2)
+    dominated = (no_worse & better).any(axis=1)
+    return [result for result, is_dominated in zip(solved, dominated) if not is_dominated]
+
+
+def data_fingerprint(data: models.DataModel) -> str:
+    """Identify the packages, depots, addresses, day and settings a result depends on.
+
+    Addresses count by street and by a checksum of their distance matrix.
+    """
+    packages = [
+        (
+            package.id,
+            package.address.street,
+            str(package.shipping_availability),
+            str(package.delivery_deadline),
+            package.vehicle_requirement.id if package.vehicle_requirement else None,
+            sorted(bundled.id for bundled in package.bundled_packages),
+            package.origin_depot,
+        )
+        for package in sorted(data.packages.values(), key=lambda package: package.id)
+    ]
+    description = repr(
+        (
+            packages,
+            [vehicle.depot for vehicle in data.vehicles.values()],
+            list(data.addresses),
+            hashlib.sha256(data.distance_matrix_miles.tobytes()).hexdigest(),
+            data.is_sparse,
+            str(data.scenario.day_start),
+            str(data.scenario.day_end),
+            data.settings,
+        ),
+    )
+    return hashlib.sha256(description.encode()).hexdigest()
+
+
+def create_variant_data(
+    data: models.DataModel,
+    variant: ScenarioVariant,
+    duration_map: models.TravelCostMap | None = None,
+) -> models.DataModel:
+    """A copy of the data with a uniform fleet and objective from the variant.
+
+    New vehicles take turns between the depots of the old ones. Required
+    vehicles follow the new vehicle with the same id; packages that require
+    a vehicle beyond the fleet are screened out as infeasible.
+    """
+    vehicles = models.Vehicle.with_shared_attributes(
+        variant.vehicle_count,
+        variant.vehicle_speed_mph,
+        variant.vehicle_capacity,
+        duration_map
+        or models.TravelCostMap.with_duration(data.addresses, variant.vehicle_speed_mph),
+        [vehicle.depot for vehicle in data.vehicles.values()],
+    )
+    shared_objects = {id(address): address for address in data.addresses.values()}
+    shared_objects |= {
+        id(vehicle): vehicles.get(vehicle.id, vehicle)
+        for vehicle in data.vehicles.values()
+    }
+    packages = copy.deepcopy(data.packages, shared_objects)
+    return dataclasses.replace(
+        data,
+        vehicles=vehicles,
+        packages=packages,
+        nodes=models.Node.from_packages(packages, vehicles),
+        scenario=dataclasses.replace(
+            data.scenario,
+            vehicle_count=variant.vehicle_count,
+            vehicle_speed_mph=variant.vehicle_speed_mph,
+            vehicle_capacity=variant.vehicle_capacity,
+            optimization=variant.optimization,
+        ),
+        settings=copy.copy(data.settings),
+    )
+
+
+def _initialize_worker(data: models.DataModel) -> None:
+    global _worker_data
+    _worker_data = data
+    _worker_duration_maps.clear()
+
+
+def _solve_variant(variant: ScenarioVariant, time_limit_seconds: int) -> ScenarioResult:
+    speed_mph = variant.vehicle_speed_mph
+    if speed_mph not in _worker_duration_maps:
+        _worker_duration_maps[speed_mph] = models.TravelCostMap.with_duration(
+            _worker_data.addresses,
+            speed_mph,
+        )
+    data = create_variant_data(_worker_data, variant, _worker_duration_maps[speed_mph])
+    data.settings = dataclasses.replace(
+        data.settings,
+        solver_time_limit_seconds=time_limit_seconds,
+        solver_solution_limit=None,
+        solve_pinned_vehicles_first=False,
+        use_parallel_search=False,
+        report_optimality_gap=False,
+    )
+    solution = routing.solve_vehicle_routing_problem(
+        data,
+        construction.build_initial_solution(data),
+    )
+    if solution is None:
+        return ScenarioResult(variant, None, None, 0, len(data.packages))
+    return ScenarioResult(
+        variant,
+        solution.mileage,
+        solution.end_time,
+        solution.delivered_packages_count,
+        solution.missed_packages_count,
+    )
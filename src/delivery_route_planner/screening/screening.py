@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+from collections.abc import Hashable, Iterable
+from typing import NamedTuple
+
+from delivery_route_planner.models import models
+
+
+class PackageWindow(NamedTuple):
+    """Time bounds of a package's stops in seconds after the day start."""
+
+    earliest_pickup: int
+    latest_pickup: int
+    earliest_delivery: int
+    latest_delivery: int
+    requested_seconds: int
+
+    @property
+    def is_feasible(self) -> bool:
+        return self.earliest_delivery <= self.latest_delivery
+
+
+def compute_package_windows(data: models.DataModel) -> dict[int, PackageWindow]:
+    """Bound each stop by a direct trip from its origin depot and back to a home depot.
+
+    Pickups happen at the origin depot, so a delivery cannot arrive before
+    the package is available plus the fastest allowed direct drive, and the
+    vehicle still has to get back to its depot before the day ends.
+    """
+    day_start = data.scenario.day_start
+    day_duration = day_start.duration_until(data.scenario.day_end)
+    windows = {}
+    for package in data.packages.values():
+        vehicles = (
+            [package.vehicle_requirement]
+            if package.vehicle_requirement
+            else list(data.vehicles.values())
+        )
+        street = package.address.street
+        drive_out = min(
+            (
+                vehicle.duration_map.cost_map[package.origin_depot][street]
+                for vehicle in vehicles
+            ),
+            default=0,
+        )
+        drive_back = min(
+            (
+                vehicle.duration_map.cost_map[street][vehicle.depot]
+                for vehicle in vehicles
+            ),
+            default=0,
+        )
+        available = (
+            max(package.shipping_availability.duration_after(day_start), 0)
+            if package.shipping_availability
+            else 0
+        )
+        deadline = (
+            min(package.delivery_deadline.duration_after(day_start), day_duration)
+            if package.delivery_deadline
+            else day_duration
+        )
+        latest_delivery = min(deadline, day_duration - drive_back)
+        windows[package.id] = PackageWindow(
+            earliest_pickup=available,
+            latest_pickup=latest_delivery - drive_out,
+            earliest_delivery=available + drive_out,
+            latest_delivery=latest_delivery,
+            requested_seconds=deadline - available,
+        )
+    return windows
+
+
+def find_infeasible_packages(
+    data: models.DataModel,
+    windows: dict[int, PackageWindow] | None = None,
+) -> dict[int, str]:
+    """Explain why each package that no route can deliver is left out."""
+    windows = windows if windows is not None else compute_package_windows(data)
+    day_start = data.scenario.day_start
+    vehicle_ids = {vehicle.id for vehicle in data.vehicles.values()}
+    reasons = {}
+    for package in data.packages.values():
+        window = windows[package.id]
+        if (
+            package.vehicle_requirement
+            and package.vehicle_requirement.id not in vehicle_ids
+        ):
+            reasons[package.id] = (
+                f"requires vehicle {package.vehicle_requirement.id}, "
+                "which is not in the fleet"
+            )
+        elif window.is_feasible:
+            continue
+        elif (
+            package.delivery_deadline
+            and window.earliest_delivery
+            > package.delivery_deadline.duration_after(day_start)
+        ):
+            arrival = models.RoutingTime.from_seconds(
+                day_start.seconds + window.earliest_delivery,
+            )
+            reasons[package.id] = (
+                f"deadline {package.delivery_deadline} is before the earliest "
+                f"possible arrival at {arrival}"
+            )
+        else:
+            reasons[package.id] = "cannot be delivered and returned before the day ends"
+
+    for bundle in find_bundles(data):
+        pinned_ids = find_pinned_vehicle_ids(data, bundle)
+        if len(pinned_ids) > 1:
+            for package_id in bundle:
+                reasons[package_id] = (
+                    "is linked to packages that require vehicles "
+                    f"{join_vehicle_ids(pinned_ids)}"
+                )
+            continue
+        infeasible_ids = [package_id for package_id in bundle if package_id in reasons]
+        if infeasible_ids:
+            for package_id in bundle:
+                reasons.setdefault(
+                    package_id,
+                    f"is linked to package {infeasible_ids[0]}, which "
+                    f"{reasons[infeasible_ids[0]]}",
+                )
+    return reasons
+
+
+def find_pinned_vehicle_ids(data: models.DataModel, bundle: list[int]) -> list[int]:
+    """Sorted ids of the vehicles that packages of the bundle require."""
+    return sorted(
+        {
+            data.packages[package_id].vehicle_requirement.id
+            for package_id in bundle
+            if data.packages[package_id].vehicle_requirement
+        },
+    )
+
+
+def find_pin_conflicts(data: models.DataModel) -> list[tuple[list[int], list[int]]]:
+    """Linked groups whose packages require different vehicles, with those vehicles."""
+    conflicts = []
+    for bundle in find_bundles(data):
+        pinned_ids = find_pinned_vehicle_ids(data, bundle)
+        if len(pinned_ids) > 1:
+            conflicts.append((bundle, pinned_ids))
+    return conflicts
+
+
+def join_vehicle_ids(vehicle_ids: list[int]) -> str:
+    return f"{', '.join(map(str, vehicle_ids[:-1]))} and {vehicle_ids[-1]}"
+
+
+class DisjointSet:
+    """Union-find with path halving, for grouping linked packages."""
+
+    def __init__(self, items: Iterable[Hashable]) -> None:
+        self.parents = {item: item for item in items}
+
+    def find(self, item: Hashable) -> Hashable:
+        parents = self.parents
+        while parents[item] != item:
+            parents[item] = parents[parents[item]]
+            item = parents[item]
+        return item
+
+    def union(self, first: Hashable, second: Hashable) -> None:
+        first_root, second_root = self.find(first), self.find(second)
+        if first_root != second_root:
+            self.parents[second_root] = first_root
+
+    def groups(self) -> list[list[Hashable]]:
+        groups: dict[Hashable, list[Hashable]] = {}
+        for item in self.parents:
+            groups.setdefault(self.find(item), []).append(item)
+        return list(groups.values())
+
+
+def find_bundles(data: models.DataModel) -> list[list[int]]:
+    """Package ids that must share a vehicle, one sorted list per linked group."""
+    linked_packages = DisjointSet(data.packages)
+    for package in data.packages.values():
+        for bundled_package in package.bundled_packages:
+            if bundled_package.id in data.packages:
+                linked_packages.union(package.id, bundled_package.id)
+    return [
+        sorted(bundle) for bundle in linked_packages.groups() if len(bundle) > 1
+    ]
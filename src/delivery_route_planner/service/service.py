@@ -0,0 +1,749 @@
+from __future__ import annotations
+
+import contextlib
+import copy
+import dataclasses
+import http.server
+import json
+import logging
+import math
+import multiprocessing
+import sqlite3
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections.abc import Iterator
+from dataclasses import dataclass
+from enum import Enum
+from pathlib import Path
+from typing import Any, Callable
+
+from delivery_route_planner.models import models
+
+DEFAULT_PORT = 8765
+DISPATCH_INTERVAL_SECONDS = 0.2
+STREAM_POLL_SECONDS = 0.5
+INCUMBENT_INTERVAL_SECONDS = 1.0
+MAX_REQUEST_BYTES = 64 * 2**20
+MAX_JOB_TIME_LIMIT_SECONDS = 600
+# Inclusive ranges of the numeric settings a client may send. The time limit
+# is required, so no job runs without one.
+SETTING_RANGES = {
+    "max_mileage_per_vehicle": (1, 10_000),
+    "distance_span_cost_coefficient": (0, 10_000),
+    "base_penalty": (0, 10**7),
+    "penalty_scale_req_vehicle": (0, 1_000),
+    "penalty_scale_pickups": (0, 1_000),
+    "solver_time_limit_seconds": (1, MAX_JOB_TIME_LIMIT_SECONDS),
+    "solver_solution_limit": (1, 10**7),
+    "candidate_neighbor_count": (1, 1_000),
+    "target_optimality_gap": (0.0, 1.0),
+}
+OPTIONAL_SETTINGS = {
+    "solver_solution_limit",
+    "candidate_neighbor_count",
+    "target_optimality_gap",
+}
+
+JsonObject = dict[str, Any]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    priority INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    submitted_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    day TEXT NOT NULL,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_by_status ON jobs (status, priority DESC, id);
+CREATE TABLE IF NOT EXISTS incumbents (
+    job_id INTEGER NOT NULL REFERENCES jobs (id),
+    sequence INTEGER NOT NULL,
+    found_at REAL NOT NULL,
+    incumbent TEXT NOT NULL,
+    PRIMARY KEY (job_id, sequence)
+);
+"""
+
+
+class JobStatus(Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    @property
+    def is_finished(self) -> bool:
+        return self not in (JobStatus.QUEUED, JobStatus.RUNNING)
+
+
+@dataclass(frozen=True)
+class JobQueue:
+    """Solve jobs and their incumbents in a SQLite file, which outlives the service.
+
+    Every call opens its own connection, so the queue may be used from the
+    request threads and the job processes at the same time.
+    """
+
+    path: Path
+
+    @contextlib.contextmanager
+    def connect(self) -> Iterator[sqlite3.Connection]:
+        connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        connection.row_factory = sqlite3.Row
+        try:
+            yield connection
+        finally:
+            connection.close()
+
+    def create(self) -> None:
+        """Create the tables and requeue the jobs a stopped service left running."""
+        with self.connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SCHEMA)
+            connection.execute(
+                "DELETE FROM incumbents WHERE job_id IN "
+                "(SELECT id FROM jobs WHERE status = ?)",
+                (JobStatus.RUNNING.value,),
+            )
+            connection.execute(
+                "UPDATE jobs SET status = ?, started_at = NULL WHERE status = ?",
+                (JobStatus.QUEUED.value, JobStatus.RUNNING.value),
+            )
+
+    def submit(self, day: JsonObject, priority: int) -> int:
+        with self.connect() as connection:
+            cursor = connection.execute(
+                "INSERT INTO jobs (priority, status, submitted_at, day) "
+                "VALUES (?, ?, ?, ?)",
+                (priority, JobStatus.QUEUED.value, time.time(), json.dumps(day)),
+            )
+            return cursor.lastrowid
+
+    def claim_next(self) -> int | None:
+        """Mark the queued job with the highest priority as running."""
+        with self.connect() as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            row = connection.execute(
+                "SELECT id FROM jobs WHERE status = ? "
+                "ORDER BY priority DESC, id LIMIT 1",
+                (JobStatus.QUEUED.value,),
+            ).fetchone()
+            if row:
+                connection.execute(
+                    "UPDATE jobs SET status = ?, started_at = ? WHERE id = ?",
+                    (JobStatus.RUNNING.value, time.time(), row["id"]),
+                )
+            connection.execute("COMMIT")
+        return row["id"] if row else None
+
+    def job(self, job_id: int) -> JsonObject | None:
+        jobs = self.jobs(job_id)
+        return jobs[0] if jobs else None
+
+    def jobs(self, job_id: int | None = None) -> list[JsonObject]:
+        """Job states without their days and results, newest first."""
+        with self.connect() as connection:
+            rows = connection.execute(
+                "SELECT id, priority, status, submitted_at, started_at, finished_at, "
+                "error, "
+                "(SELECT COUNT(*) FROM incumbents WHERE job_id = jobs.id) "
+                "AS incumbent_count, "
+                "(SELECT COUNT(*) FROM jobs AS ahead WHERE ahead.status = jobs.status "
+                "AND (ahead.priority > jobs.priority OR "
+                "(ahead.priority = jobs.priority AND ahead.id < jobs.id))) "
+                "AS jobs_ahead "
+                "FROM jobs WHERE ? IS NULL OR id = ? ORDER BY id DESC",
+                (job_id, job_id),
+            ).fetchall()
+        jobs = [dict(row) for row in rows]
+        for job in jobs:
+            if job["status"] != JobStatus.QUEUED.value:
+                job["jobs_ahead"] = 0
+        return jobs
+
+    def day(self, job_id: int) -> JsonObject:
+        with self.connect() as connection:
+            row = connection.execute(
+                "SELECT day FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        return json.loads(row["day"])
+
+    def result(self, job_id: int) -> JsonObject | None:
+        with self.connect() as connection:
+            row = connection.execute(
+                "SELECT result FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        return json.loads(row["result"]) if row and row["result"] else None
+
+    def cancel(self, job_id: int) -> None:
+        """Cancel a queued or running job; the service stops its process."""
+        with self.connect() as connection:
+            connection.execute(
+                "UPDATE jobs SET status = ?, finished_at = ? "
+                "WHERE id = ? AND status IN (?, ?)",
+                (
+                    JobStatus.CANCELLED.value,
+                    time.time(),
+                    job_id,
+                    JobStatus.QUEUED.value,
+                    JobStatus.RUNNING.value,
+                ),
+            )
+
+    def finish(
+        self,
+        job_id: int,
+        status: JobStatus,
+        result: JsonObject | None = None,
+        error: str | None = None,
+    ) -> None:
+        """Record the outcome of a running job, unless it was cancelled meanwhile."""
+        with self.connect() as connection:
+            connection.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, result = ?, error = ? "
+                "WHERE id = ? AND status = ?",
+                (
+                    status.value,
+                    time.time(),
+                    json.dumps(result) if result is not None else None,
+                    error,
+                    job_id,
+                    JobStatus.RUNNING.value,
+                ),
+            )
+
+    def add_incumbent(self, job_id: int, incumbent: JsonObject) -> None:
+        with self.connect() as connection:
+            connection.execute(
+                "INSERT INTO incumbents (job_id, sequence, found_at, incumbent) "
+                "SELECT ?, COALESCE(MAX(sequence), 0) + 1, ?, ? "
+                "FROM incumbents WHERE job_id = ?",
+                (job_id, time.time(), json.dumps(incumbent), job_id),
+            )
+
+    def incumbents(self, job_id: int, after_sequence: int = 0) -> list[JsonObject]:
+        with self.connect() as connection:
+            rows = connection.execute(
+                "SELECT sequence, found_at, incumbent FROM incumbents "
+                "WHERE job_id = ? AND sequence > ? ORDER BY sequence",
+                (job_id, after_sequence),
+            ).fetchall()
+        return [
+            {"sequence": row["sequence"], "found_at": row["found_at"]}
+            | json.loads(row["incumbent"])
+            for row in rows
+        ]
+
+
+class SolveServer(http.server.ThreadingHTTPServer):
+    """HTTP front of the job queue, starting at most max_workers job processes.
+
+    Each job runs in its own process, so cancelling a running job stops its
+    process. The address matrix is the server's own and is shared with the
+    job processes; a job only sends its packages, fleet and settings.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        server_address: tuple[str, int],
+        queue: JobQueue,
+        base_data: models.DataModel,
+        max_workers: int,
+    ) -> None:
+        super().__init__(server_address, _RequestHandler)
+        self.queue = queue
+        self.base_data = base_data
+        self.max_workers = max_workers
+        self.processes: dict[int, multiprocessing.Process] = {}
+        self.stopped = threading.Event()
+
+    def serve(self) -> None:
+        dispatcher = threading.Thread(target=self.dispatch_jobs, daemon=True)
+        dispatcher.start()
+        try:
+            self.serve_forever()
+        finally:
+            self.stopped.set()
+            dispatcher.join()
+            for process in self.processes.values():
+                process.terminate()
+                process.join()
+
+    def dispatch_jobs(self) -> None:
+        while not self.stopped.wait(DISPATCH_INTERVAL_SECONDS):
+            try:
+                self.update_processes()
+            except Exception as e:
+                if isinstance(e, (KeyboardInterrupt, SystemExit)):
+                    raise
+                logging.exception("Solve jobs could not be dispatched.")
+
+    def update_processes(self) -> None:
+        for job_id, process in list(self.processes.items()):
+            job = self.queue.job(job_id)
+            if not process.is_alive():
+                process.join()
+                del self.processes[job_id]
+                self.queue.finish(
+                    job_id,
+                    JobStatus.FAILED,
+                    error=f"The job process exited with code {process.exitcode}.",
+                )
+            elif job is None or job["status"] == JobStatus.CANCELLED.value:
+                process.terminate()
+                process.join()
+                del self.processes[job_id]
+        while len(self.processes) < self.max_workers:
+            job_id = self.queue.claim_next()
+            if job_id is None:
+                break
+            process = multiprocessing.Process(
+                target=run_job,
+                args=(self.queue, job_id, self.base_data),
+            )
+            process.start()
+            self.processes[job_id] = process
+
+
+class _RequestHandler(http.server.BaseHTTPRequestHandler):
+    server: SolveServer
+
+    def do_GET(self) -> None:
+        parts = urllib.parse.urlsplit(self.path).path.strip("/").split("/")
+        if parts == ["jobs"]:
+            self.send_json(200, {"jobs": self.server.queue.jobs()})
+            return
+        job = self.find_job(parts)
+        if job is None:
+            self.send_json(404, {"error": "No such job."})
+        elif len(parts) == 2:
+            self.send_json(200, job)
+        elif parts[2] == "incumbents":
+            self.stream_incumbents(job["id"])
+        elif parts[2] == "result" and job["status"] == JobStatus.DONE.value:
+            self.send_json(200, self.server.queue.result(job["id"]) or {"routes": None})
+        elif parts[2] == "result":
+            self.send_json(409, {"error": f"The job is {job['status']}."})
+        else:
+            self.send_json(404, {"error": "Not found."})
+
+    def do_POST(self) -> None:
+        parts = urllib.parse.urlsplit(self.path).path.strip("/").split("/")
+        if parts == ["jobs"]:
+            self.submit_job()
+            return
+        job = self.find_job(parts)
+        if job is None or parts[2:] != ["cancel"]:
+            self.send_json(404, {"error": "No such job."})
+            return
+        self.server.queue.cancel(job["id"])
+        self.send_json(200, self.server.queue.job(job["id"]))
+
+    def submit_job(self) -> None:
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            if length > MAX_REQUEST_BYTES:
+                raise ValueError("The job is too large.")
+            request = json.loads(self.rfile.read(length))
+            priority = int(request.get("priority", 0))
+            # Reject days the job process could not rebuild before queuing them.
+            data_from_json(request["day"], self.server.base_data)
+        except (KeyError, TypeError, ValueError) as e:
+            self.send_json(400, {"error": f"Invalid job: {e}"})
+            return
+        job_id = self.server.queue.submit(request["day"], priority)
+        self.send_json(201, self.server.queue.job(job_id))
+
+    def find_job(self, parts: list[str]) -> JsonObject | None:
+        if len(parts) < 2 or parts[0] != "jobs" or not parts[1].isdigit():
+            return None
+        return self.server.queue.job(int(parts[1]))
+
+    def stream_incumbents(self, job_id: int) -> None:
+        """Send incumbents as JSON lines until the job has finished."""
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        sequence = 0
+        try:
+            while True:
+                # Read the status first, so no incumbent recorded before the job
+                # finished is missed.
+                job = self.server.queue.job(job_id)
+                for incumbent in self.server.queue.incumbents(job_id, sequence):
+                    self.wfile.write(json.dumps(incumbent).encode() + b"\n")
+                    sequence = incumbent["sequence"]
+                self.wfile.flush()
+                if job is None or JobStatus(job["status"]).is_finished:
+                    return
+                time.sleep(STREAM_POLL_SECONDS)
+        except (BrokenPipeError, ConnectionResetError):
+            return
+
+    def send_json(self, status: int, body: JsonObject | None) -> None:
+        content = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, message_format: str, *args: Any) -> None:
+        logging.info("%s %s", self.address_string(), message_format % args)
+
+
+def run_job(queue: JobQueue, job_id: int, base_data: models.DataModel) -> None:
+    """Solve one job in its own process, recording incumbents as they improve."""
+    from delivery_route_planner.construction import construction
+    from delivery_route_planner.routing import routing
+
+    data = data_from_json(queue.day(job_id), base_data)
+    best_objective = math.inf
+    last_recorded = 0.0
+
+    def record_incumbent(objective: int, routes: list[list[int]]) -> None:
+        nonlocal best_objective, last_recorded
+        now = time.monotonic()
+        if objective >= best_objective or now - last_recorded < INCUMBENT_INTERVAL_SECONDS:
+            return
+        best_objective, last_recorded = objective, now
+        queue.add_incumbent(job_id, incumbent_to_json(data, objective, routes))
+
+    try:
+        solution = routing.solve_vehicle_routing_problem(
+            data,
+            construction.build_initial_solution(data),
+            record_incumbent,
+        )
+    except Exception as e:
+        if isinstance(e, (KeyboardInterrupt, SystemExit)):
+            raise
+        logging.exception("An unexpected error occurred with Google OR-Tools.")
+        queue.finish(job_id, JobStatus.FAILED, error=str(e))
+        return
+    queue.finish(
+        job_id,
+        JobStatus.DONE,
+        result=solution_to_json(solution) if solution else None,
+    )
+
+
+def data_to_json(data: models.DataModel) -> JsonObject:
+    """The packages, fleet and settings of a day; addresses are sent by street."""
+
+    def seconds_or_none(routing_time: models.RoutingTime | None) -> int | None:
+        return routing_time.seconds if routing_time else None
+
+    scenario = dataclasses.asdict(data.scenario)
+    scenario |= {
+        "day_start": data.scenario.day_start.seconds,
+        "day_end": data.scenario.day_end.seconds,
+        "optimization": data.scenario.optimization.value,
+    }
+    return {
+        "vehicles": [
+            {
+                "id": vehicle.id,
+                "speed_mph": vehicle.speed_mph,
+                "package_capacity": vehicle.package_capacity,
+                "depot": vehicle.depot,
+            }
+            for vehicle in data.vehicles.values()
+        ],
+        "packages": [
+            {
+                "id": package.id,
+                "street": package.address.street,
+                "weight_kg": package.weight_kg,
+                "shipping_availability": seconds_or_none(package.shipping_availability),
+                "delivery_deadline": seconds_or_none(package.delivery_deadline),
+                "vehicle_requirement": (
+                    package.vehicle_requirement.id if package.vehicle_requirement else None
+                ),
+                "bundled_packages": [bundled.id for bundled in package.bundled_packages],
+                "origin_depot": package.origin_depot,
+            }
+            for package in data.packages.values()
+        ],
+        "scenario": scenario,
+        "settings": dataclasses.asdict(data.settings) | {"solve_service_url": None},
+    }
+
+
+def data_from_json(day: JsonObject, base_data: models.DataModel) -> models.DataModel:
+    """Rebuild a day on the server's addresses, keeping the order of its packages."""
+
+    def time_or_none(seconds: int | None) -> models.RoutingTime | None:
+        return models.RoutingTime(int(seconds)) if seconds is not None else None
+
+    duration_maps = {
+        vehicle.speed_mph: vehicle.duration_map for vehicle in base_data.vehicles.values()
+    }
+
+    def create_vehicle(
+        vehicle_id: int,
+        speed_mph: float,
+        capacity: int,
+        depot: str,
+    ) -> models.Vehicle:
+        if speed_mph <= 0 or capacity <= 0:
+            raise ValueError(f"vehicle {vehicle_id} needs a positive speed and capacity")
+        if speed_mph not in duration_maps:
+            duration_maps[speed_mph] = models.TravelCostMap.with_duration(
+                base_data.addresses,
+                speed_mph,
+            )
+        return models.Vehicle(
+            vehicle_id,
+            speed_mph,
+            capacity,
+            duration_maps[speed_mph],
+            depot,
+        )
+
+    streets = {row.get("depot", models.DEPOT_ADDRESS) for row in day["vehicles"]}
+    for row in day["packages"]:
+        streets.update((row["street"], row.get("origin_depot", models.DEPOT_ADDRESS)))
+    unknown_streets = sorted(streets - base_data.addresses.keys())
+    if unknown_streets:
+        raise ValueError(f"unknown addresses {', '.join(unknown_streets)}")
+    vehicles = {
+        int(row["id"]): create_vehicle(
+            int(row["id"]),
+            float(row["speed_mph"]),
+            int(row["package_capacity"]),
+            row.get("depot", models.DEPOT_ADDRESS),
+        )
+        for row in day["vehicles"]
+    }
+    if not vehicles:
+        raise ValueError("the day has no vehicles")
+
+    packages = {}
+    for row in day["packages"]:
+        requirement_id = row["vehicle_requirement"]
+        requirement = None
+        if requirement_id is not None:
+            # A required vehicle outside the fleet keeps the package unroutable.
+            last_vehicle = vehicles[max(vehicles)]
+            requirement = vehicles.get(requirement_id) or dataclasses.replace(
+                last_vehicle,
+                id=int(requirement_id),
+            )
+        packages[int(row["id"])] = models.Package(
+            id=int(row["id"]),
+            address=base_data.addresses[row["street"]],
+            weight_kg=row["weight_kg"],
+            shipping_availability=time_or_none(row["shipping_availability"]),
+            delivery_deadline=time_or_none(row["delivery_deadline"]),
+            vehicle_requirement=requirement,
+            origin_depot=row.get("origin_depot", models.DEPOT_ADDRESS),
+        )
+    for row in day["packages"]:
+        packages[int(row["id"])].bundled_packages = [
+            packages[int(package_id)] for package_id in row["bundled_packages"]
+        ]
+
+    scenario = dict(day["scenario"])
+    return models.DataModel(
+        addresses=base_data.addresses,
+        distance_map=base_data.distance_map,
+        vehicles=vehicles,
+        packages=packages,
+        nodes=models.Node.from_packages(packages, vehicles),
+        scenario=models.RoutingScenario(
+            day_start=models.RoutingTime(int(scenario.pop("day_start"))),
+            day_end=models.RoutingTime(int(scenario.pop("day_end"))),
+            constraints=models.Constraints(**scenario.pop("constraints")),
+            optimization=models.OptimizationType(scenario.pop("optimization")),
+            **scenario,
+        ),
+        settings=settings_from_json(day["settings"]),
+    )
+
+
+def settings_from_json(settings: JsonObject) -> models.SearchSettings:
+    """Search settings a client sent, if every field is known and within limits.
+
+    Jobs run on the service's processors, so the time limit is capped at
+    MAX_JOB_TIME_LIMIT_SECONDS. The service never forwards jobs elsewhere.
+    """
+    defaults = models.SearchSettings()
+    unknown_names = sorted(settings.keys() - dataclasses.asdict(defaults).keys())
+    if unknown_names:
+        raise ValueError(f"unknown settings {', '.join(unknown_names)}")
+    values = dataclasses.asdict(defaults) | settings | {"solve_service_url": None}
+    for name, value in values.items():
+        default = getattr(defaults, name)
+        if value is None and name in OPTIONAL_SETTINGS | {"solve_service_url"}:
+            continue
+        if isinstance(default, bool):
+            if not isinstance(value, bool):
+                raise ValueError(f"setting {name} must be true or false")
+        elif name in SETTING_RANGES:
+            minimum, maximum = SETTING_RANGES[name]
+            if (
+                isinstance(value, bool)
+                or not isinstance(value, type(minimum) | int)
+                or not minimum <= value <= maximum
+            ):
+                raise ValueError(f"setting {name} must be from {minimum} to {maximum}")
+    try:
+        models.FSS.Value.Name(values["first_solution_strategy"])
+        models.LSM.Value.Name(values["local_search_metaheuristic"])
+    except (TypeError, ValueError):
+        raise ValueError("unknown first solution strategy or metaheuristic") from None
+    return models.SearchSettings(**values)
+
+
+def incumbent_to_json(
+    data: models.DataModel,
+    objective: int,
+    routes: list[list[int]],
+) -> JsonObject:
+    miles = 0.0
+    for vehicle, route in zip(data.vehicles.values(), routes):
+        streets = [vehicle.depot]
+        streets += [data.nodes[node_index].address for node_index in route]
+        streets.append(vehicle.depot)
+        miles += sum(
+            data.addresses[start].distance_map_miles[end]
+            for start, end in zip(streets, streets[1:])
+        )
+    return {
+        "objective": objective,
+        "mileage": miles,
+        "delivered_packages_count": sum(
+            data.nodes[node_index].kind == models.NodeKind.DELIVERY
+            for route in routes
+            for node_index in route
+        ),
+        "routes": routes,
+    }
+
+
+def solution_to_json(solution: models.Solution) -> JsonObject:
+    return {
+        "routes": [
+            {
+                "vehicle_id": route.vehicle.id,
+                "node_indices": route.node_indices.tolist(),
+                "visit_seconds": route.visit_seconds.tolist(),
+                "mileages": route.mileages.tolist(),
+            }
+            for route in solution.routes
+        ],
+        "search_report": solution.search_report
+        and {
+            "time_budget_seconds": solution.search_report.time_budget_seconds,
+            "elapsed_seconds": solution.search_report.elapsed_seconds,
+            "stop_reason": solution.search_report.stop_reason.name,
+            "lower_bound_miles": solution.search_report.lower_bound_miles,
+            "bounded_package_count": solution.search_report.bounded_package_count,
+        },
+    }
+
+
+def solution_from_json(result: JsonObject, data: models.DataModel) -> models.Solution:
+    """The solution for the day that was submitted, on a copy of it like save_solution."""
+    new_data = copy.deepcopy(data)
+    routes = []
+    for row in result["routes"]:
+        route = models.Route.from_columns(
+            new_data.vehicles[row["vehicle_id"]],
+            new_data,
+            row["node_indices"],
+            row["visit_seconds"],
+            row["mileages"],
+        )
+        route.record_package_visits()
+        routes.append(route)
+    search_report = result.get("search_report")
+    return models.Solution(
+        new_data,
+        routes,
+        search_report
+        and models.SearchReport(
+            search_report["time_budget_seconds"],
+            search_report["elapsed_seconds"],
+            models.StopReason[search_report["stop_reason"]],
+            search_report.get("lower_bound_miles"),
+            search_report.get("bounded_package_count", 0),
+        ),
+    )
+
+
+@dataclass
+class ServiceClient:
+    url: str
+    timeout_seconds: float = 30
+
+    def submit(self, data: models.DataModel, priority: int = 0) -> int:
+        job = self.request("POST", "jobs", {"priority": priority, "day": data_to_json(data)})
+        return job["id"]
+
+    def job(self, job_id: int) -> JsonObject:
+        return self.request("GET", f"jobs/{job_id}")
+
+    def cancel(self, job_id: int) -> JsonObject:
+        return self.request("POST", f"jobs/{job_id}/cancel")
+
+    def incumbents(self, job_id: int) -> Iterator[JsonObject]:
+        """Incumbents as the server finds them, until the job has finished."""
+        with urllib.request.urlopen(
+            f"{self.url.rstrip('/')}/jobs/{job_id}/incumbents",
+            timeout=None,
+        ) as response:
+            for line in response:
+                yield json.loads(line)
+
+    def result(self, job_id: int, data: models.DataModel) -> models.Solution | None:
+        result = self.request("GET", f"jobs/{job_id}/result")
+        return solution_from_json(result, data) if result["routes"] else None
+
+    def solve(
+        self,
+        data: models.DataModel,
+        priority: int = 0,
+        incumbent_callback: Callable[[JsonObject], None] | None = None,
+    ) -> models.Solution | None:
+        """Submit the day, follow its incumbents and return the routes, if any."""
+        job_id = self.submit(data, priority)
+        for incumbent in self.incumbents(job_id):
+            if incumbent_callback:
+                incumbent_callback(incumbent)
+        job = self.job(job_id)
+        if job["status"] != JobStatus.DONE.value:
+            raise RuntimeError(
+                f"Solve job {job_id} is {job['status']}: {job['error'] or 'no routes'}",
+            )
+        return self.result(job_id, data)
+
+    def request(self, method: str, path: str, body: JsonObject | None = None) -> Any:
+        request = urllib.request.Request(
+            f"{self.url.rstrip('/')}/{path}",
+            data=json.dumps(body).encode() if body is not None else None,
+            headers={"Content-Type": "application/json"},
+            method=method,
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout_seconds) as response:
+                return json.load(response)
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.load(e)["error"]
+            except (KeyError, TypeError, ValueError):
+                message = e.reason
+            raise RuntimeError(f"The solve service refused the request: {message}") from e
@@ -0,0 +1,408 @@
+from __future__ import annotations
+
+import concurrent.futures
+import dataclasses
+import json
+import math
+import os
+import time
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, NamedTuple
+
+import numpy as np
+
+from delivery_route_planner.construction import construction
+from delivery_route_planner.models import models
+from delivery_route_planner.routing import routing
+
+TRIAL_TIME_LIMIT_SECONDS = 10
+# Missed packages outweigh any mileage saved by dropping them.
+MISSED_PACKAGE_MILES = 100.0
+# A search has converged once it is within this share of its final objective.
+CONVERGED_SHARE = 0.01
+# The strategies offered on the Settings page.
+FIRST_SOLUTION_STRATEGIES = (
+    "BEST_INSERTION",
+    "PARALLEL_CHEAPEST_INSERTION",
+    "LOCAL_CHEAPEST_INSERTION",
+)
+LOCAL_SEARCH_METAHEURISTICS = (
+    "GREEDY_DESCENT",
+    "GUIDED_LOCAL_SEARCH",
+    "SIMULATED_ANNEALING",
+    "TABU_SEARCH",
+    "GENERIC_TABU_SEARCH",
+)
+TUNED_FIELDS = (
+    "base_penalty",
+    "penalty_scale_req_vehicle",
+    "penalty_scale_pickups",
+    "distance_span_cost_coefficient",
+    "first_solution_strategy",
+    "local_search_metaheuristic",
+)
+
+_worker_data: models.DataModel | None = None
+
+
+class SizeBucket(NamedTuple):
+    name: str
+    min_packages: int
+    max_packages: int
+
+
+SIZE_BUCKETS = (
+    SizeBucket("small", 1, 50),
+    SizeBucket("medium", 51, 150),
+    SizeBucket("large", 151, 400),
+)
+
+
+class TrialResult(NamedTuple):
+    bucket: str
+    trial: int
+    instance: int
+    objective: float
+    converged_seconds: float
+
+
+@dataclass
+class BucketProfile:
+    bucket: SizeBucket
+    settings: dict[str, Any]
+    default_objective: float
+    tuned_objective: float
+    default_seconds: float
+    tuned_seconds: float
+    trial_count: int
+
+    @property
+    def objective_change(self) -> float:
+        return self.tuned_objective / self.default_objective - 1
+
+    @property
+    def seconds_change(self) -> float:
+        return self.tuned_seconds / max(self.default_seconds, 0.001) - 1
+
+    def summary_line(self) -> str:
+        return (
+            f"{self.bucket.name} days ({self.bucket.min_packages}-"
+            f"{self.bucket.max_packages} packages): objective "
+            f"{self.default_objective:.1f} -> {self.tuned_objective:.1f} "
+            f"({self.objective_change:+.1%}), time to converge "
+            f"{self.default_seconds:.1f} -> {self.tuned_seconds:.1f} s "
+            f"({self.seconds_change:+.1%}) over {self.trial_count} trials"
+        )
+
+
+@dataclass
+class TuningProfile:
+    buckets: list[BucketProfile]
+
+    def bucket_for(self, package_count: int) -> BucketProfile | None:
+        """The profile of the bucket the day falls in, or the closest one."""
+        if not self.buckets:
+            return None
+        return min(
+            self.buckets,
+            key=lambda profile: max(
+                profile.bucket.min_packages - package_count,
+                package_count - profile.bucket.max_packages,
+                0,
+            ),
+        )
+
+    def apply(self, data: models.DataModel) -> BucketProfile | None:
+        """Replace the day's tuned settings with its bucket's values."""
+        profile = self.bucket_for(len(data.packages))
+        if profile is not None:
+            data.settings = dataclasses.replace(
+                data.settings,
+                **settings_from_json(profile.settings),
+            )
+        return profile
+
+    def save(self, path: Path) -> None:
+        path.write_text(
+            json.dumps(
+                {
+                    "buckets": [
+                        {
+                            "name": profile.bucket.name,
+                            "min_packages": profile.bucket.min_packages,
+                            "max_packages": profile.bucket.max_packages,
+                            "settings": profile.settings,
+                            "default_objective": profile.default_objective,
+                            "tuned_objective": profile.tuned_objective,
+                            "default_seconds": profile.default_seconds,
+                            "tuned_seconds": profile.tuned_seconds,
+                            "trial_count": profile.trial_count,
+                        }
+                        for profile in self.buckets
+                    ],
+                },
+                indent=2,
+            ),
+            encoding="utf-8",
+        )
+
+    @classmethod
+    def load(cls, path: Path) -> TuningProfile:
+        content = json.loads(path.read_text(encoding="utf-8"))
+        return cls(
+            [
+                BucketProfile(
+                    SizeBucket(row["name"], row["min_packages"], row["max_packages"]),
+                    row["settings"],
+                    row["default_objective"],
+                    row["tuned_objective"],
+                    row["default_seconds"],
+                    row["tuned_seconds"],
+                    row["trial_count"],
+                )
+                for row in content["buckets"]
+            ],
+        )
+
+
+def settings_to_json(settings: models.SearchSettings) -> dict[str, Any]:
+    """The tuned fields, with strategies by name."""
+    values = {name: getattr(settings, name) for name in TUNED_FIELDS}
+    values["first_solution_strategy"] = models.FSS.Value.Name(
+        values["first_solution_strategy"],
+    )
+    values["local_search_metaheuristic"] = models.LSM.Value.Name(
+        values["local_search_metaheuristic"],
+    )
+    return values
+
+
+def settings_from_json(values: dict[str, Any]) -> dict[str, Any]:
+    """SearchSettings fields from a profile; unknown fields are ignored."""
+    fields = {name: values[name] for name in TUNED_FIELDS if name in values}
+    if "first_solution_strategy" in fields:
+        fields["first_solution_strategy"] = models.FSS.Value.Value(
+            fields["first_solution_strategy"],
+        )
+    if "local_search_metaheuristic" in fields:
+        fields["local_search_metaheuristic"] = models.LSM.Value.Value(
+            fields["local_search_metaheuristic"],
+        )
+    return fields
+
+
+def sample_settings(generator: np.random.Generator) -> dict[str, Any]:
+    """Random tuned fields; penalties and the span coefficient are log-uniform."""
+    return {
+        "base_penalty": int(10 ** generator.uniform(2, 5)),
+        "penalty_scale_req_vehicle": int(generator.integers(1, 11)),
+        "penalty_scale_pickups": int(generator.integers(1, 11)),
+        "distance_span_cost_coefficient": (
+            0 if generator.random() < 0.3 else int(10 ** generator.uniform(0, 3))
+        ),
+        "first_solution_strategy": str(generator.choice(FIRST_SOLUTION_STRATEGIES)),
+        "local_search_metaheuristic": str(
+            generator.choice(LOCAL_SEARCH_METAHEURISTICS),
+        ),
+    }
+
+
+def generate_day(
+    data: models.DataModel,
+    package_count: int,
+    seed: int,
+) -> models.DataModel:
+    """A delivery day of random packages over the known addresses.
+
+    A third of the packages get a deadline and a tenth require a vehicle.
+    """
+    generator = np.random.default_rng(seed)
+    vehicle_count = max(2, math.ceil(package_count / 25))
+    vehicles = models.Vehicle.with_shared_attributes(
+        vehicle_count,
+        data.scenario.vehicle_speed_mph,
+        data.scenario.vehicle_capacity,
+        next(iter(data.vehicles.values())).duration_map,
+    )
+    streets = [street for street in data.addresses if street != models.DEPOT_ADDRESS]
+    packages = {}
+    for package_id in range(1, package_count + 1):
+        packages[package_id] = models.Package(
+            id=package_id,
+            address=data.addresses[streets[generator.integers(len(streets))]],
+            delivery_deadline=(
+                models.RoutingTime.from_seconds(
+                    int(generator.integers(10, 17)) * models.SECONDS_PER_HOUR,
+                )
+                if generator.random() < 1 / 3
+                else None
+            ),
+            vehicle_requirement=(
+                vehicles[int(generator.integers(1, vehicle_count + 1))]
+                if generator.random() < 0.1
+                else None
+            ),
+        )
+    return dataclasses.replace(
+        data,
+        vehicles=vehicles,
+        packages=packages,
+        nodes=models.Node.from_packages(packages, vehicles),
+        scenario=dataclasses.replace(data.scenario, vehicle_count=vehicle_count),
+        settings=dataclasses.replace(data.settings),
+    )
+
+
+def tune_settings(
+    data: models.DataModel,
+    trial_count: int = 20,
+    instance_count: int = 3,
+    time_limit_seconds: int = TRIAL_TIME_LIMIT_SECONDS,
+    buckets: Sequence[SizeBucket] = SIZE_BUCKETS,
+    seed: int = 0,
+    max_workers: int | None = None,
+    progress: Callable[[int, int], None] | None = None,
+) -> TuningProfile:
+    """Random search over the tuned settings on generated days of each bucket.
+
+    Trial 0 of each bucket runs the current settings as the baseline. Every
+    trial solves the same days, and trials are ranked by their objective
+    relative to the baseline, averaged over the days. The objective is the
+    mileage plus MISSED_PACKAGE_MILES per missed package, because the
+    solver's own objective changes with the penalties being tuned.
+    """
+    generator = np.random.default_rng(seed)
+    trials = {
+        bucket.name: [settings_to_json(data.settings)]
+        + [sample_settings(generator) for _ in range(trial_count)]
+        for bucket in buckets
+    }
+    package_counts = {
+        bucket.name: [
+            int(generator.integers(bucket.min_packages, bucket.max_packages + 1))
+            for _ in range(instance_count)
+        ]
+        for bucket in buckets
+    }
+    tasks = [
+        (
+            bucket.name,
+            trial,
+            instance,
+            package_counts[bucket.name][instance],
+            seed + instance,
+            settings,
+            time_limit_seconds,
+        )
+        for bucket in buckets
+        for trial, settings in enumerate(trials[bucket.name])
+        for instance in range(instance_count)
+    ]
+    results: list[TrialResult] = []
+    if progress:
+        progress(0, len(tasks))
+    with (
+        data.share_matrices() as shared_data,
+        concurrent.futures.ProcessPoolExecutor(
+            max_workers=min(len(tasks), max_workers or os.cpu_count() or 1),
+            initializer=_initialize_worker,
+            initargs=(shared_data,),
+        ) as executor,
+    ):
+        futures = [executor.submit(_evaluate_trial, task) for task in tasks]
+        for future in concurrent.futures.as_completed(futures):
+            results.append(future.result())
+            if progress:
+                progress(len(results), len(tasks))
+
+    return TuningProfile(
+        [
+            best_bucket_profile(
+                bucket,
+                trials[bucket.name],
+                [result for result in results if result.bucket == bucket.name],
+            )
+            for bucket in buckets
+        ],
+    )
+
+
+def best_bucket_profile(
+    bucket: SizeBucket,
+    trial_settings: list[dict[str, Any]],
+    results: list[TrialResult],
+) -> BucketProfile:
+    """The trial with the lowest mean objective relative to trial 0."""
+    instance_count = max(result.instance for result in results) + 1
+    objectives = np.zeros((len(trial_settings), instance_count))
+    seconds = np.zeros((len(trial_settings), instance_count))
+    for result in results:
+        objectives[result.trial, result.instance] = result.objective
+        seconds[result.trial, result.instance] = result.converged_seconds
+    relative = objectives / np.maximum(objectives[0], 1e-9)
+    best_trial = int(np.argmin(relative.mean(axis=1)))
+    return BucketProfile(
+        bucket,
+        trial_settings[best_trial],
+        float(objectives[0].mean()),
+        float(objectives[best_trial].mean()),
+        float(seconds[0].mean()),
+        float(seconds[best_trial].mean()),
+        len(trial_settings) - 1,
+    )
+
+
+def _initialize_worker(data: models.DataModel) -> None:
+    global _worker_data
+    _worker_data = data
+
+
+def _evaluate_trial(
+    task: tuple[str, int, int, int, int, dict[str, Any], int],
+) -> TrialResult:
+    bucket, trial, instance, package_count, seed, settings, time_limit_seconds = task
+    data = generate_day(_worker_data, package_count, seed)
+    data.settings = dataclasses.replace(
+        data.settings,
+        **settings_from_json(settings),
+        solver_time_limit_seconds=time_limit_seconds,
+        solver_solution_limit=None,
+        use_parallel_search=False,
+        use_adaptive_time_limit=False,
+        report_optimality_gap=False,
+        solve_service_url=None,
+    )
+    incumbents: list[tuple[float, int]] = []
+    started = time.monotonic()
+    solution = routing.solve_vehicle_routing_problem(
+        data,
+        construction.build_initial_solution(data),
+        lambda objective, _routes: incumbents.append(
+            (time.monotonic() - started, objective),
+        ),
+    )
+    if solution is None:
+        return TrialResult(
+            bucket,
+            trial,
+            instance,
+            MISSED_PACKAGE_MILES * len(data.packages),
+            float(time_limit_seconds),
+        )
+    converged_seconds = 0.0
+    if incumbents:
+        final_objective = min(objective for _, objective in incumbents)
+        converged_seconds = next(
+            elapsed
+            for elapsed, objective in incumbents
+            if objective <= final_objective * (1 + CONVERGED_SHARE)
+        )
+    return TrialResult(
+        bucket,
+        trial,
+        instance,
+        solution.mileage + MISSED_PACKAGE_MILES * solution.missed_packages_count,
+        converged_seconds,
+    )
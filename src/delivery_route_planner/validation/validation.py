@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import NamedTuple
+
+import numpy as np
+
+from delivery_route_planner.models import models
+from delivery_route_planner.screening import screening
+
+
+class ViolationKind(Enum):
+    CAPACITY = "Vehicle capacity exceeded"
+    PAIRING = "Pickup and delivery do not match"
+    AVAILABILITY = "Shipped before availability"
+    DEADLINE = "Delivered after deadline"
+    VEHICLE_REQUIREMENT = "Delivered by the wrong vehicle"
+    BUNDLE = "Linked packages split up"
+    DAY_END = "Route ends after the day end"
+
+
+@dataclass
+class Violation:
+    kind: ViolationKind
+    package_id: int | None = None
+    vehicle_id: int | None = None
+
+    def __str__(self) -> str:
+        subject = (
+            f"package {self.package_id}"
+            if self.package_id is not None
+            else f"vehicle {self.vehicle_id}"
+        )
+        return f"{self.kind.value}: {subject}"
+
+
+@dataclass
+class SolutionKpis:
+    mileage: float
+    delivered_packages_count: int
+    missed_packages_count: int
+    vehicles_used: int
+    end_time: models.RoutingTime
+    time_used_seconds: int
+    peak_load_ratio: float
+
+    @property
+    def delivery_success_rate(self) -> float:
+        total = self.delivered_packages_count + self.missed_packages_count
+        return self.delivered_packages_count / total if total else 0.0
+
+
+@dataclass
+class ValidationReport:
+    violations: list[Violation]
+    kpis: SolutionKpis
+    infeasible_packages: dict[int, str] = field(default_factory=dict)
+
+    @property
+    def is_valid(self) -> bool:
+        return not self.violations
+
+    def summary_lines(self) -> list[str]:
+        lines = [
+            f"Total mileage: {round(self.kpis.mileage, 1)} miles",
+            f"Packages delivered: {self.kpis.delivered_packages_count}",
+            f"Packages missed: {self.kpis.missed_packages_count}",
+            f"Vehicles used: {self.kpis.vehicles_used}",
+            f"Day finished: {self.kpis.end_time}",
+            f"Peak load: {round(self.kpis.peak_load_ratio * 100, 1)}% of capacity",
+            f"Constraint violations: {len(self.violations)}",
+        ]
+        lines.extend(f"  {violation}" for violation in self.violations)
+        if self.infeasible_packages:
+            lines.append(
+                f"Packages left out as infeasible: {len(self.infeasible_packages)}",
+            )
+            lines.extend(
+                f"  Package {package_id} {reason}"
+                for package_id, reason in self.infeasible_packages.items()
+            )
+        return lines
+
+
+class _StopColumns(NamedTuple):
+    vehicle_ids: np.ndarray
+    capacities: np.ndarray
+    kinds: np.ndarray
+    package_ids: np.ndarray
+    loads: np.ndarray
+    visit_seconds: np.ndarray
+
+
+def _concatenate_routes(solution: models.Solution) -> _StopColumns:
+    routes = solution.routes
+    lengths = [len(route.node_indices) for route in routes]
+    node_indices = np.concatenate(
+        [route.node_indices for route in routes] or [np.empty(0, np.int32)],
+    )
+    return _StopColumns(
+        vehicle_ids=np.repeat([route.vehicle.id for route in routes], lengths),
+        capacities=np.repeat(
+            [route.vehicle.package_capacity for route in routes],
+            lengths,
+        ),
+        kinds=solution.data.node_kind_codes[node_indices],
+        package_ids=solution.data.node_package_ids[node_indices],
+        loads=np.concatenate(
+            [route.vehicle_loads for route in routes] or [np.empty(0, np.int32)],
+        ),
+        visit_seconds=np.concatenate(
+            [route.visit_seconds for route in routes] or [np.empty(0, np.int64)],
+        ),
+    )
+
+
+def _first_visits(
+    stops: _StopColumns,
+    kind: models.NodeKind,
+    package_ids: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Count visits of one kind per package and keep the first visit's details."""
+    positions = np.flatnonzero(stops.kinds == kind.capacity_impact)
+    package_indices = np.searchsorted(package_ids, stops.package_ids[positions])
+    counts = np.bincount(package_indices, minlength=len(package_ids))
+    vehicles = np.full(len(package_ids), -1, dtype=np.int64)
+    times = np.zeros(len(package_ids), dtype=np.int64)
+    orders = np.full(len(package_ids), -1, dtype=np.int64)
+    # Assign in reverse so the earliest visit is the one written last.
+    positions, package_indices = positions[::-1], package_indices[::-1]
+    vehicles[package_indices] = stops.vehicle_ids[positions]
+    times[package_indices] = stops.visit_seconds[positions]
+    orders[package_indices] = positions
+    return counts, vehicles, times, orders
+
+
+def validate_solution(solution: models.Solution) -> ValidationReport:
+    data = solution.data
+    packages = data.package_columns
+    stops = _concatenate_routes(solution)
+    violations = []
+
+    def add_vehicle_violations(kind: ViolationKind, mask: np.ndarray) -> None:
+        violations.extend(
+            Violation(kind, vehicle_id=vehicle_id)
+            for vehicle_id in np.unique(stops.vehicle_ids[mask]).tolist()
+        )
+
+    def add_package_violations(kind: ViolationKind, mask: np.ndarray) -> None:
+        violations.extend(
+            Violation(kind, package_id=package_id)
+            for package_id in packages.ids[mask].tolist()
+        )
+
+    add_vehicle_violations(ViolationKind.CAPACITY, stops.loads > stops.capacities)
+    add_vehicle_violations(
+        ViolationKind.DAY_END,
+        stops.visit_seconds > data.scenario.day_end.seconds,
+    )
+
+    pickup_counts, pickup_vehicles, pickup_times, pickup_orders = _first_visits(
+        stops,
+        models.NodeKind.PICKUP,
+        packages.ids,
+    )
+    delivery_counts, delivery_vehicles, delivery_times, delivery_orders = (
+        _first_visits(stops, models.NodeKind.DELIVERY, packages.ids)
+    )
+    delivered = delivery_counts > 0
+
+    add_package_violations(
+        ViolationKind.PAIRING,
+        (pickup_counts != delivery_counts)
+        | (pickup_counts > 1)
+        | (
+            delivered
+            & (
+                (pickup_vehicles != delivery_vehicles)
+                | (delivery_orders < pickup_orders)
+            )
+        ),
+    )
+    add_package_violations(
+        ViolationKind.AVAILABILITY,
+        (pickup_counts > 0) & (pickup_times < packages.availability_seconds),
+    )
+    add_package_violations(
+        ViolationKind.DEADLINE,
+        delivered & (delivery_times > packages.deadline_seconds),
+    )
+    add_package_violations(
+        ViolationKind.VEHICLE_REQUIREMENT,
+        delivered
+        & (packages.required_vehicle_ids >= 0)
+        & (delivery_vehicles != packages.required_vehicle_ids),
+    )
+
+    first, second = (
+        np.searchsorted(packages.ids, packages.bundle_pairs[:, column])
+        for column in (0, 1)
+    )
+    split_bundles = (delivered[first] != delivered[second]) | (
+        delivered[first] & (delivery_vehicles[first] != delivery_vehicles[second])
+    )
+    violations.extend(
+        Violation(ViolationKind.BUNDLE, package_id=package_id)
+        for package_id in np.unique(packages.bundle_pairs[split_bundles, 0]).tolist()
+    )
+
+    delivered_count = int(np.count_nonzero(delivered))
+    kpis = SolutionKpis(
+        mileage=solution.mileage,
+        delivered_packages_count=delivered_count,
+        missed_packages_count=len(packages.ids) - delivered_count,
+        vehicles_used=sum(len(route.node_indices) > 2 for route in solution.routes),
+        end_time=solution.end_time,
+        time_used_seconds=solution.time_used_seconds,
+        peak_load_ratio=(
+            float(np.max(stops.loads / stops.capacities)) if len(stops.loads) else 0.0
+        ),
+    )
+    return ValidationReport(
+        violations,
+        kpis,
+        screening.find_infeasible_packages(data),
+    )
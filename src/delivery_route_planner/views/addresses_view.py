@@ -4,13 +4,14 @@ from delivery_route_planner.models import models
 
 
 class AddressesView:
+    title = "Addresses"
+    icon = ft.icons.LOCATION_ON_OUTLINED
+    selected_icon = ft.icons.LOCATION_ON
+    disabled = False
+
     def __init__(self, page: ft.Page, data: models.DataModel) -> None:
         self.page = page
         self.data = data
-        self.title = "Addresses"
-        self.icon = ft.icons.LOCATION_ON_OUTLINED
-        self.selected_icon = ft.icons.LOCATION_ON
-        self.disabled = False
 
     def render(self) -> ft.Column:
         title = ft.Text(self.title, style=ft.TextThemeStyle.HEADLINE_SMALL)
@@ -1,35 +1,56 @@
 import flet as ft
 
+from delivery_route_planner import components
+from delivery_route_planner.charts import charts
 from delivery_route_planner.models import models
 
 
+def vehicle_color(vehicle_id: int | None) -> str:
+    if vehicle_id is None:
+        return ft.colors.OUTLINE
+    if vehicle_id == 1:
+        return ft.colors.PRIMARY
+    if vehicle_id == 2:
+        return ft.colors.TERTIARY
+    return ft.colors.SECONDARY
+
+
 class ChartsView:
+    title = "Charts"
+    icon = ft.icons.INSERT_CHART_OUTLINED_ROUNDED
+    selected_icon = ft.icons.INSERT_CHART_ROUNDED
+    disabled = True
+
     def __init__(self, page: ft.Page) -> None:
         self.page = page
         self.solution = None
-        self.title = "Charts"
-        self.icon = ft.icons.INSERT_CHART_OUTLINED_ROUNDED
-        self.selected_icon = ft.icons.INSERT_CHART_ROUNDED
-        self.disabled = True
+        self.chart_data = None
+        self.charts = None
+        self.export_manager = components.ExportManager(
+            page,
+            dialog_title="Save charts as file",
+            file_name="charts.png",
+            export_callback=lambda path, progress: charts.export_charts(
+                self.solution,
+                path,
+                progress,
+            ),
+            allowed_extensions=charts.RENDER_FORMATS,
+            item_name="charts",
+        )
 
     def render(self) -> ft.Column:
         title = ft.Text(self.title, style=ft.TextThemeStyle.HEADLINE_SMALL)
-        save_as_file_dialog = ft.AlertDialog(
-            icon=ft.Icon(ft.icons.SAVE_AS_ROUNDED),
-            title=ft.Text("Save charts as file", text_align=ft.TextAlign.CENTER),
-            actions_alignment=ft.MainAxisAlignment.END,
-            content=ft.Text("This feature is not yet available."),
-            actions=[
-                ft.TextButton(
-                    "Close",
-                    on_click=lambda _: self.page.close(save_as_file_dialog),
-                ),
-            ],
-        )
         save_as_file_button = ft.FilledTonalButton(
             "Save as file",
             ft.icons.SAVE_AS_OUTLINED,
-            on_click=lambda _: self.page.open(save_as_file_dialog),
+            on_click=lambda _: self.export_manager.open(),
+            disabled=not charts.is_rendering_available(),
+            tooltip=(
+                None
+                if charts.is_rendering_available()
+                else "Install matplotlib to save charts"
+            ),
         )
         header = ft.Container(
             ft.Row(
@@ -38,13 +59,15 @@ class ChartsView:
             ),
             padding=30,
         )
-        body = ft.Column(
-            controls=[
+        if self.charts is None:
+            self.charts = [
                 self.build_pie_charts(),
                 self.build_bar_charts(),
                 self.build_line_chart(),
                 ft.Container(),
-            ],
+            ]
+        body = ft.Column(
+            controls=self.charts,
             spacing=30,
             scroll=ft.ScrollMode.AUTO,
             expand=True,
@@ -57,63 +80,42 @@ class ChartsView:
 
     def set_solution(self, solution: models.Solution) -> None:
         self.solution = solution
+        self.chart_data = charts.build_chart_data(solution)
+        self.charts = None
 
     def build_pie_charts(self) -> ft.Container:
-        if not self.solution:
+        if not self.chart_data:
             return ft.Container()
 
         mileage_pie = ft.PieChart(
             sections=[
                 ft.PieChartSection(
-                    (route.mileage / self.solution.mileage * 100),
-                    title=f"Vehicle {route.vehicle.id}\n"
-                    f"{round(route.mileage / self.solution.mileage * 100, 1)}%\n"
-                    f"{round(route.mileage, 1)} miles",
+                    pie_slice.share * 100,
+                    title=f"{pie_slice.label}\n"
+                    f"{round(pie_slice.share * 100, 1)}%\n"
+                    f"{round(pie_slice.value, 1)} miles",
                     title_style=ft.TextStyle(color=ft.colors.ON_PRIMARY),
-                    color=(
-                        ft.colors.PRIMARY
-                        if route.vehicle.id == 1
-                        else (
-                            ft.colors.TERTIARY
-                            if route.vehicle.id == 2
-                            else ft.colors.SECONDARY
-                        )
-                    ),
+                    color=vehicle_color(pie_slice.vehicle_id),
                     radius=150,
                 )
-                for route in self.solution.routes
+                for pie_slice in self.chart_data.mileage_slices
             ],
             center_space_radius=0,
             start_degree_offset=180,
         )
 
-        def time_label(seconds: int) -> str:
-            hours = seconds // 3600
-            minutes = (seconds % 3600) // 60
-            hour_str = "hour" if hours == 1 else "hours"
-            minute_str = "minute" if minutes == 1 else "minutes"
-            return f"{hours} {hour_str} and\n{minutes} {minute_str}"
-
         time_pie = ft.PieChart(
             sections=[
                 ft.PieChartSection(
-                    (route.time_used_seconds / self.solution.time_used_seconds * 100),
-                    title=f"Vehicle {route.vehicle.id}\n"
-                    f"{round(route.time_used_seconds / self.solution.time_used_seconds * 100, 1)}%\n"
-                    f"{time_label(route.time_used_seconds)}",
+                    pie_slice.share * 100,
+                    title=f"{pie_slice.label}\n"
+                    f"{round(pie_slice.share * 100, 1)}%\n"
+                    f"{charts.duration_label(int(pie_slice.value))}",
                     title_style=ft.TextStyle(color=ft.colors.ON_PRIMARY),
-                    color=(
-                        ft.colors.PRIMARY
-                        if route.vehicle.id == 1
-                        else (
-                            ft.colors.TERTIARY
-                            if route.vehicle.id == 2
-                            else ft.colors.SECONDARY
-                        )
-                    ),
+                    color=vehicle_color(pie_slice.vehicle_id),
                     radius=150,
                 )
-                for route in self.solution.routes
+                for pie_slice in self.chart_data.time_slices
             ],
             center_space_radius=0,
             start_degree_offset=180,
@@ -160,6 +162,7 @@ class ChartsView:
                 [
                     mileage_pie_card,
                     time_pie_card,
+                    *self.build_gap_cards(),
                 ],
                 scroll=ft.ScrollMode.AUTO,
                 spacing=30,
@@ -169,13 +172,67 @@ class ChartsView:
             padding=ft.padding.only(30, 0, 0, 0),
         )
 
+    def build_gap_cards(self) -> list[ft.Card]:
+        gap = self.solution.optimality_gap
+        if gap is None:
+            return []
+        lower_bound_miles = self.solution.search_report.lower_bound_miles
+        return [
+            ft.Card(
+                content=ft.Container(
+                    ft.Column(
+                        [
+                            ft.Text(
+                                "Mileage vs Lower Bound",
+                                style=ft.TextThemeStyle.TITLE_MEDIUM,
+                            ),
+                            ft.Text(
+                                f"≤ {gap:.1%}",
+                                theme_style=ft.TextThemeStyle.DISPLAY_SMALL,
+                                style=ft.TextStyle(font_family="Outfit-Bold"),
+                            ),
+                            ft.ProgressBar(
+                                value=1 - gap,
+                                bar_height=20,
+                                border_radius=5,
+                            ),
+                            ft.Text(
+                                f"{round(self.solution.mileage, 1)} miles driven; no "
+                                "routes deliver every deliverable package in fewer "
+                                f"than {round(lower_bound_miles, 1)} miles.",
+                            ),
+                        ],
+                        spacing=20,
+                    ),
+                    padding=20,
+                    width=400,
+                ),
+                variant=ft.CardVariant.FILLED,
+            ),
+        ]
+
     def build_bar_charts(self) -> ft.Container:
-        if not self.solution:
+        if not self.chart_data:
             return ft.Container()
 
         capacity_charts = []
-        for route in self.solution.routes:
-            bars = []
+        for series in self.chart_data.load_series:
+            capacity = self.chart_data.capacities[series.vehicle_id]
+            bars = [
+                ft.BarChartGroup(
+                    x=step,
+                    bar_rods=[
+                        ft.BarChartRod(
+                            from_y=0,
+                            to_y=load,
+                            color=vehicle_color(series.vehicle_id),
+                            width=25,
+                            border_radius=5,
+                        ),
+                    ],
+                )
+                for step, load in zip(series.x.tolist(), series.y.tolist())
+            ]
             capacity_chart = ft.BarChart(
                 bar_groups=bars,
                 left_axis=ft.ChartAxis(
@@ -192,54 +249,21 @@ class ChartsView:
                     show_labels=True,
                 ),
                 horizontal_grid_lines=ft.ChartGridLines(
-                    interval=route.vehicle.package_capacity,
+                    interval=capacity,
                     color=ft.colors.ERROR,
                     dash_pattern=[3, 3],
                 ),
-                max_y=route.vehicle.package_capacity + 2,
+                max_y=capacity + 2,
                 tooltip_bgcolor=ft.colors.SURFACE,
+                width=max(300, (len(bars) + 1) * 30),
             )
 
-            step = 1
-            for this_stop, next_stop in zip(route.stops[1:], route.stops[2:]):
-                if (
-                    next_stop
-                    and this_stop.node.kind == next_stop.node.kind
-                    and this_stop.node.address == next_stop.node.address
-                ):
-                    continue
-                bars.append(
-                    ft.BarChartGroup(
-                        x=step,
-                        bar_rods=[
-                            ft.BarChartRod(
-                                from_y=0,
-                                to_y=this_stop.vehicle_load,
-                                color=(
-                                    ft.colors.PRIMARY
-                                    if route.vehicle.id == 1
-                                    else (
-                                        ft.colors.TERTIARY
-                                        if route.vehicle.id == 2
-                                        else ft.colors.SECONDARY
-                                    )
-                                ),
-                                width=25,
-                                border_radius=5,
-                            ),
-                        ],
-                    ),
-                )
-                step = step + 1
-
-            capacity_chart.width = max(300, (step * 30))
-
             capacity_chart_card = ft.Card(
                 content=ft.Container(
                     ft.Column(
                         [
                             ft.Text(
-                                f"Load vs Capacity: Vehicle {route.vehicle.id}",
+                                f"Load vs Capacity: Vehicle {series.vehicle_id}",
                                 style=ft.TextThemeStyle.TITLE_MEDIUM,
                             ),
                             capacity_chart,
@@ -268,43 +292,26 @@ class ChartsView:
         )
 
     def build_line_chart(self) -> ft.Container:
-        if not self.solution:
+        if not self.chart_data:
             return ft.Container()
 
         data_series = []
-        for route in self.solution.routes:
-            data_points = []
-            step = 1
-            for this_stop, next_stop in zip(route.stops[1:], route.stops[2:] + [None]):
-                if (
-                    next_stop
-                    and this_stop.node.kind == next_stop.node.kind
-                    and this_stop.node.address == next_stop.node.address
-                ):
-                    continue
-                data_points.append(
-                    ft.LineChartDataPoint(
-                        x=this_stop.visit_time.seconds,
-                        y=round(this_stop.mileage, 1),
-                        point=ft.ChartCirclePoint(radius=5),
-                    ),
+        for series in self.chart_data.mileage_series:
+            data_points = [
+                ft.LineChartDataPoint(
+                    x=seconds,
+                    y=round(mileage, 1),
+                    point=ft.ChartCirclePoint(radius=5),
                 )
-                step = step + 1
+                for seconds, mileage in zip(series.x.tolist(), series.y.tolist())
+            ]
             data_series.append(
                 ft.LineChartData(
                     data_points=data_points,
                     stroke_width=5,
                     stroke_cap_round=True,
                     curved=True,
-                    color=(
-                        ft.colors.PRIMARY
-                        if route.vehicle.id == 1
-                        else (
-                            ft.colors.TERTIARY
-                            if route.vehicle.id == 2
-                            else ft.colors.SECONDARY
-                        )
-                    ),
+                    color=vehicle_color(series.vehicle_id),
                 ),
             )
 
@@ -328,37 +335,27 @@ class ChartsView:
                         label=ft.Text(models.RoutingTime.from_seconds(i).short_str),
                     )
                     for i in range(
-                        self.solution.data.scenario.day_start.seconds,
-                        self.solution.end_time.seconds,
+                        self.chart_data.day_start_seconds,
+                        self.chart_data.end_seconds,
                         1800,
                     )
                 ],
             ),
-            width=1200,
+            width=charts.LINE_CHART_WIDTH,
             tooltip_bgcolor=ft.colors.SURFACE,
             horizontal_grid_lines=ft.ChartGridLines(10),
             vertical_grid_lines=ft.ChartGridLines(900),
-            max_y=round(
-                (max(route.mileage for route in self.solution.routes) * 1.1), 0
-            ),
+            max_y=round((self.chart_data.max_mileage * 1.1), 0),
         )
 
         vehicle_labels = ft.Column(
             [
                 ft.Text(
-                    f"Vehicle {route.vehicle.id}",
-                    color=(
-                        ft.colors.PRIMARY
-                        if route.vehicle.id == 1
-                        else (
-                            ft.colors.TERTIARY
-                            if route.vehicle.id == 2
-                            else ft.colors.SECONDARY
-                        )
-                    ),
+                    f"Vehicle {series.vehicle_id}",
+                    color=vehicle_color(series.vehicle_id),
                     font_family="Outfit-Bold",
                 )
-                for route in self.solution.routes
+                for series in self.chart_data.mileage_series
             ],
         )
 
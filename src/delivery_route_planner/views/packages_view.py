@@ -4,13 +4,14 @@ from delivery_route_planner.models import models
 
 
 class PackagesView:
+    title = "Packages"
+    icon = ft.icons.INVENTORY_2_OUTLINED
+    selected_icon = ft.icons.INVENTORY_2_ROUNDED
+    disabled = False
+
     def __init__(self, page: ft.Page, data: models.DataModel) -> None:
         self.page = page
         self.data = data
-        self.title = "Packages"
-        self.icon = ft.icons.INVENTORY_2_OUTLINED
-        self.selected_icon = ft.icons.INVENTORY_2_ROUNDED
-        self.disabled = False
 
     def render(self) -> ft.Column:
         title = ft.Text(self.title, style=ft.TextThemeStyle.HEADLINE_SMALL)
@@ -62,6 +63,7 @@ class PackagesView:
                 ft.DataColumn(label=ft.Text("Deadline")),
                 ft.DataColumn(label=ft.Text("Vehicle ID"), numeric=True),
                 ft.DataColumn(label=ft.Text("Linked packages")),
+                ft.DataColumn(label=ft.Text("Depot")),
             ],
             rows=package_rows,
             border_radius=15,
@@ -107,6 +109,7 @@ class PackagesView:
                             ft.Text(str(bundled_packages)),
                             placeholder=bundled_packages is None,
                         ),
+                        ft.DataCell(ft.Text(package.origin_depot)),
                     ],
                     on_select_changed=row_selected,
                     selected=True,
@@ -1,35 +1,36 @@
 import flet as ft
 
+from delivery_route_planner import components
+from delivery_route_planner.export import export
 from delivery_route_planner.models import models
 
 
 class RoutesView:
+    title = "Routes"
+    icon = ft.icons.ROUTE_OUTLINED
+    selected_icon = ft.icons.ROUTE_ROUNDED
+    disabled = True
+
     def __init__(self, page: ft.Page) -> None:
         self.page = page
         self.solution = None
-        self.title = "Routes"
-        self.icon = ft.icons.ROUTE_OUTLINED
-        self.selected_icon = ft.icons.ROUTE_ROUNDED
-        self.disabled = True
+        self.export_manager = components.ExportManager(
+            page,
+            dialog_title="Save routes as file",
+            file_name="routes.csv",
+            export_callback=lambda path, progress: export.export_routes(
+                self.solution,
+                path,
+                progress,
+            ),
+        )
 
     def render(self) -> ft.Column:
         title = ft.Text(self.title, style=ft.TextThemeStyle.HEADLINE_SMALL)
-        save_as_file_dialog = ft.AlertDialog(
-            icon=ft.Icon(ft.icons.SAVE_AS_ROUNDED),
-            title=ft.Text("Save routes as file", text_align=ft.TextAlign.CENTER),
-            actions_alignment=ft.MainAxisAlignment.END,
-            content=ft.Text("This feature is not yet available."),
-            actions=[
-                ft.TextButton(
-                    "Close",
-                    on_click=lambda _: self.page.close(save_as_file_dialog),
-                ),
-            ],
-        )
         save_as_file_button = ft.FilledTonalButton(
             "Save as file",
             ft.icons.SAVE_AS_OUTLINED,
-            on_click=lambda _: self.page.open(save_as_file_dialog),
+            on_click=lambda _: self.export_manager.open(),
         )
         header = ft.Container(
             ft.Row(
@@ -76,17 +77,7 @@ class RoutesView:
                 clip_behavior=ft.ClipBehavior.ANTI_ALIAS,
             )
 
-            step = 1
-            packages = []
-            for this_stop, next_stop in zip(route.stops[1:], route.stops[2:] + [None]):
-                if this_stop.node.package:
-                    packages.append(this_stop.node.package.id)
-                if (
-                    next_stop
-                    and this_stop.node.kind == next_stop.node.kind
-                    and this_stop.node.address == next_stop.node.address
-                ):
-                    continue
+            for step, (this_stop, packages) in enumerate(route.stop_groups(), 1):
                 activity = (
                     this_stop.node.kind.description
                     if this_stop.node.kind != models.NodeKind.ORIGIN
@@ -112,8 +103,6 @@ class RoutesView:
                         selected=this_stop.node.kind == models.NodeKind.DELIVERY,
                     ),
                 )
-                step = step + 1
-                packages.clear()
 
             unused_vehicle_message = ft.Card(
                 ft.Container(
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
-from typing import Callable
+import logging
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable
 
 import flet as ft
 from ortools.constraint_solver.routing_enums_pb2 import (
@@ -10,11 +12,19 @@ from ortools.constraint_solver.routing_enums_pb2 import (
 
 from delivery_route_planner.models import models
 
+if TYPE_CHECKING:
+    from delivery_route_planner.scenarios import scenarios
+
 TIME_LIMIT_WARNING_THRESHOLD = 60
 SOLUTION_LIMIT_WARNING_THRESHOLD = 1000
 
 
 class SettingsView:
+    title = "Settings"
+    icon = ft.icons.SETTINGS_OUTLINED
+    selected_icon = ft.icons.SETTINGS_ROUNDED
+    disabled = False
+
     def __init__(
         self,
         page: ft.Page,
@@ -25,17 +35,20 @@ class SettingsView:
         self.page = page
         self.data = data
         self.rerender = navigation_callback
-        self.title = "Settings"
-        self.icon = ft.icons.SETTINGS_OUTLINED
-        self.selected_icon = ft.icons.SETTINGS_ROUNDED
-        self.disabled = False
         self.start_time_card = self.create_start_time_card()
         self.time_limit_card = self.create_time_limit_card()
+        self.adaptive_time_limit_card = self.create_adaptive_time_limit_card()
+        self.target_gap_card = self.create_target_gap_card()
         self.solution_limit_card = self.create_solution_limit_card()
         self.search_logging_card = self.create_search_logging_card()
+        self.solve_service_card = self.create_solve_service_card()
+        self.depots_card = self.create_depots_card()
+        self.tuned_profile_card = self.create_tuned_profile_card()
         self.first_solution_card = self.create_first_solution_strategy_card()
         self.metaheuristic_card = self.create_local_search_metaheuristic_card()
         self.requirements_card = self.create_requirements_card()
+        self.scenario_results = []
+        self.scenarios_card = self.create_scenarios_card()
 
     def render(self) -> ft.Column:
         title = ft.Text(self.title, style=ft.TextThemeStyle.HEADLINE_SMALL)
@@ -87,8 +100,13 @@ class SettingsView:
                     self.packages_card,
                     self.start_time_card,
                     self.time_limit_card,
+                    self.adaptive_time_limit_card,
+                    self.target_gap_card,
                     self.solution_limit_card,
                     self.search_logging_card,
+                    self.solve_service_card,
+                    self.depots_card,
+                    self.tuned_profile_card,
                 ],
                 spacing=30,
                 run_spacing=30,
@@ -109,10 +127,15 @@ class SettingsView:
             ),
             padding=ft.padding.only(30, 0, 30, 30),
         )
+        scenarios_row = ft.Container(
+            ft.ResponsiveRow([self.scenarios_card]),
+            padding=ft.padding.only(30, 0, 30, 30),
+        )
         body = ft.Column(
             controls=[
                 settings_row,
                 algorithms_row,
+                scenarios_row,
             ],
             expand=True,
             spacing=0,
@@ -137,15 +160,25 @@ class SettingsView:
                     self.data.scenario.vehicle_speed_mph,
                 ),
             )
+            self.data.nodes = models.Node.from_packages(
+                self.data.packages,
+                self.data.vehicles,
+            )
         self.page.close(self.reset_defaults_dialog)
 
         self.start_time_card = self.create_start_time_card()
         self.time_limit_card = self.create_time_limit_card()
+        self.adaptive_time_limit_card = self.create_adaptive_time_limit_card()
+        self.target_gap_card = self.create_target_gap_card()
         self.solution_limit_card = self.create_solution_limit_card()
         self.search_logging_card = self.create_search_logging_card()
+        self.solve_service_card = self.create_solve_service_card()
+        self.depots_card = self.create_depots_card()
+        self.tuned_profile_card = self.create_tuned_profile_card()
         self.first_solution_card = self.create_first_solution_strategy_card()
         self.metaheuristic_card = self.create_local_search_metaheuristic_card()
         self.requirements_card = self.create_requirements_card()
+        self.scenarios_card = self.create_scenarios_card()
 
         self.rerender("settings")
         self.page.update()
@@ -387,6 +420,218 @@ class SettingsView:
             ),
         )
 
+    def create_adaptive_time_limit_card(self) -> ft.Card:
+
+        def adaptive_switch_change(e: ft.ControlEvent) -> None:
+            self.data.settings.use_adaptive_time_limit = e.control.value
+
+        adaptive_header = ft.ListTile(
+            leading=ft.Icon(ft.icons.AUTO_MODE_ROUNDED),
+            title=ft.Text("Adaptive time limit"),
+            subtitle=ft.Text(
+                "Search as long as days of this size need, up to the time limit, "
+                "and stop once routes stop improving. Ignores the solution limit.",
+            ),
+        )
+        adaptive_switch = ft.Container(
+            ft.Switch(
+                value=self.data.settings.use_adaptive_time_limit,
+                on_change=adaptive_switch_change,
+            ),
+            padding=ft.padding.only(0, 0, 20, 10),
+        )
+        return SettingsCard(
+            ft.Column(
+                [
+                    adaptive_header,
+                    adaptive_switch,
+                ],
+                horizontal_alignment=ft.CrossAxisAlignment.END,
+            ),
+        )
+
+    def create_target_gap_card(self) -> ft.Card:
+
+        def target_gap_label(percent: int) -> str:
+            return f"{percent}%" if percent else "Off"
+
+        def target_gap_change(e: ft.ControlEvent) -> None:
+            percent = int(e.control.value)
+            target_gap_callout.value = target_gap_label(percent)
+            e.control.label = f" {target_gap_label(percent)} "
+            self.data.settings.target_optimality_gap = percent / 100 if percent else None
+            self.page.update()
+
+        target_percent = round((self.data.settings.target_optimality_gap or 0) * 100)
+        target_gap_callout = ft.Text(
+            target_gap_label(target_percent),
+            theme_style=ft.TextThemeStyle.TITLE_MEDIUM,
+            style=ft.TextStyle(weight=ft.FontWeight.BOLD),
+        )
+        target_gap_header = ft.ListTile(
+            leading=ft.Icon(ft.icons.SPORTS_SCORE_ROUNDED),
+            title=ft.Text("Target gap"),
+            subtitle=ft.Text(
+                "Stop once the routes are at most this far above the mileage "
+                "lower bound. Time windows keep the gap from reaching zero.",
+            ),
+            trailing=target_gap_callout,
+        )
+        target_gap_slider = ft.Slider(
+            value=target_percent,
+            min=0,
+            max=50,
+            divisions=10,
+            inactive_color=ft.colors.OUTLINE_VARIANT,
+            on_change=target_gap_change,
+        )
+        return SettingsCard(
+            ft.Column(
+                [
+                    target_gap_header,
+                    target_gap_slider,
+                ],
+            ),
+        )
+
+    def create_depots_card(self) -> ft.Card:
+
+        def depots_switch_change(e: ft.ControlEvent) -> None:
+            self.data.settings.solve_depots_separately = e.control.value
+
+        depots_header = ft.ListTile(
+            leading=ft.Icon(ft.icons.WAREHOUSE_OUTLINED),
+            title=ft.Text("Solve depots separately"),
+            subtitle=ft.Text(
+                "Depots that share no vehicles or packages are planned at the "
+                "same time on separate CPU cores.",
+            ),
+        )
+        depots_switch = ft.Container(
+            ft.Switch(
+                value=self.data.settings.solve_depots_separately,
+                on_change=depots_switch_change,
+            ),
+            padding=ft.padding.only(0, 0, 20, 10),
+        )
+        return SettingsCard(
+            ft.Column(
+                [
+                    depots_header,
+                    depots_switch,
+                ],
+                horizontal_alignment=ft.CrossAxisAlignment.END,
+            ),
+        )
+
+    def create_solve_service_card(self) -> ft.Card:
+
+        def service_url_change(e: ft.ControlEvent) -> None:
+            self.data.settings.solve_service_url = e.control.value.strip() or None
+
+        service_header = ft.ListTile(
+            leading=ft.Icon(ft.icons.DNS_OUTLINED),
+            title=ft.Text("Solve service"),
+            subtitle=ft.Text(
+                "Queue solves on a shared machine running solve_service.py. "
+                "Leave empty to solve on this computer.",
+            ),
+        )
+        service_url_entry = ft.Container(
+            ft.TextField(
+                value=self.data.settings.solve_service_url or "",
+                label="Service address",
+                hint_text="http://192.168.1.20:8765",
+                on_change=service_url_change,
+            ),
+            padding=ft.padding.only(16, 0, 16, 16),
+        )
+        return SettingsCard(
+            ft.Column(
+                [
+                    service_header,
+                    service_url_entry,
+                ],
+            ),
+        )
+
+    def create_tuned_profile_card(
+        self,
+        callout: str = "",
+        summary: str | None = None,
+    ) -> ft.Card:
+
+        def open_profile(_e: ft.ControlEvent) -> None:
+            if profile_picker not in self.page.overlay:
+                self.page.overlay.append(profile_picker)
+                self.page.update()
+            profile_picker.pick_files(
+                dialog_title="Load tuned profile",
+                allowed_extensions=["json"],
+            )
+
+        def profile_selected(e: ft.FilePickerResultEvent) -> None:
+            if not e.files:
+                return
+            from delivery_route_planner.tuning import tuning
+
+            try:
+                profile = tuning.TuningProfile.load(Path(e.files[0].path))
+                bucket_profile = profile.apply(self.data)
+            except Exception as e:
+                if isinstance(e, (KeyboardInterrupt, SystemExit)):
+                    raise
+                logging.exception("The tuned profile could not be loaded.")
+                profile_callout.value = "Failed"
+                self.page.update()
+                return
+            if bucket_profile is None:
+                profile_callout.value = "Empty"
+                self.page.update()
+                return
+            self.first_solution_card = self.create_first_solution_strategy_card()
+            self.metaheuristic_card = self.create_local_search_metaheuristic_card()
+            self.tuned_profile_card = self.create_tuned_profile_card(
+                f"Loaded {bucket_profile.bucket.name}",
+                bucket_profile.summary_line(),
+            )
+            self.rerender("settings")
+            self.page.update()
+
+        profile_picker = ft.FilePicker(on_result=profile_selected)
+        profile_callout = ft.Text(
+            callout,
+            theme_style=ft.TextThemeStyle.TITLE_MEDIUM,
+            style=ft.TextStyle(weight=ft.FontWeight.BOLD),
+        )
+        profile_header = ft.ListTile(
+            leading=ft.Icon(ft.icons.TUNE_ROUNDED),
+            title=ft.Text("Tuned profile"),
+            subtitle=ft.Text(
+                summary
+                or "Load penalties, span cost and algorithms tuned with "
+                "tune_settings.py for days of this size.",
+            ),
+            trailing=profile_callout,
+        )
+        profile_button = ft.Container(
+            ft.TextButton(
+                text="Load profile",
+                icon=ft.icons.FILE_OPEN_OUTLINED,
+                on_click=open_profile,
+            ),
+            padding=ft.padding.only(0, 0, 20, 10),
+        )
+        return SettingsCard(
+            ft.Column(
+                [
+                    profile_header,
+                    profile_button,
+                ],
+                horizontal_alignment=ft.CrossAxisAlignment.END,
+            ),
+        )
+
     def create_first_solution_strategy_card(self) -> ft.Card:
 
         def first_solution_change(_e: ft.ControlEvent) -> None:
@@ -405,7 +650,9 @@ class SettingsView:
             ),
         )
         first_solution_strategy_radio_group = ft.RadioGroup(
-            value="LOCAL_CHEAPEST_INSERTION",
+            value=FirstSolutionStrategy.Value.Name(
+                self.data.settings.first_solution_strategy,
+            ),
             on_change=first_solution_change,
             content=ft.Column(
                 [
@@ -477,7 +724,9 @@ class SettingsView:
             ),
         )
         local_search_metaheuristic_radio_group = ft.RadioGroup(
-            value="GUIDED_LOCAL_SEARCH",
+            value=LocalSearchMetaheuristic.Value.Name(
+                self.data.settings.local_search_metaheuristic,
+            ),
             on_change=local_search_metaheuristic_change,
             content=ft.Column(
                 [
@@ -611,6 +860,228 @@ class SettingsView:
             ),
         )
 
+    def create_scenarios_card(self) -> ft.Card:
+
+        def parse_values(entry: ft.TextField, value_type: type) -> list | None:
+            try:
+                values = [
+                    value_type(value)
+                    for value in (entry.value or "").split(",")
+                    if value.strip()
+                ]
+            except ValueError:
+                values = []
+            if not values or min(values) <= 0:
+                entry.error_text = "Enter positive numbers separated by commas"
+                return None
+            entry.error_text = None
+            return sorted(set(values))
+
+        def run_scenarios(_e: ft.ControlEvent) -> None:
+            from delivery_route_planner.scenarios import scenarios
+
+            vehicle_counts = parse_values(vehicle_count_entry, int)
+            speeds = parse_values(speed_entry, float)
+            capacities = parse_values(capacity_entry, int)
+            time_limits = parse_values(time_limit_entry, int)
+            if time_limits and len(time_limits) > 1:
+                # Every scenario gets the same search time, so they compare fairly.
+                time_limit_entry.error_text = "Enter one positive number"
+                time_limits = None
+            optimizations = [
+                checkbox.data for checkbox in optimization_checkboxes if checkbox.value
+            ]
+            if not optimizations:
+                scenarios_callout.value = "Choose an objective"
+            if not (
+                vehicle_counts and speeds and capacities and time_limits and optimizations
+            ):
+                self.page.update()
+                return
+            grid = scenarios.ScenarioGrid(
+                vehicle_counts,
+                speeds,
+                capacities,
+                optimizations,
+                time_limit_seconds=time_limits[0],
+            )
+            run_button.disabled = True
+            scenarios_progress.value = 0
+            scenarios_progress.visible = True
+            scenarios_callout.value = f"{len(grid.variants())} scenarios"
+            self.page.update()
+            self.page.run_thread(sweep, grid)
+
+        def sweep(grid: scenarios.ScenarioGrid) -> None:
+            from delivery_route_planner.scenarios import scenarios
+
+            def update_progress(done_count: int, total_count: int) -> None:
+                scenarios_progress.value = done_count / total_count
+                self.page.update()
+
+            try:
+                self.scenario_results = scenarios.sweep_scenarios(
+                    self.data,
+                    grid,
+                    progress=update_progress,
+                )
+            except Exception as e:
+                if isinstance(e, (KeyboardInterrupt, SystemExit)):
+                    raise
+                logging.exception("The scenarios could not be solved.")
+                scenarios_callout.value = "Failed"
+            fill_table()
+            run_button.disabled = False
+            scenarios_progress.visible = False
+            self.page.update()
+
+        def fill_table() -> None:
+            from delivery_route_planner.scenarios import scenarios
+
+            front = scenarios.pareto_front(self.scenario_results)
+            results_table.rows = [
+                ft.DataRow(
+                    cells=[
+                        ft.DataCell(
+                            ft.Icon(
+                                ft.icons.STAR_RATE_ROUNDED,
+                                color=ft.colors.PRIMARY,
+                            )
+                            if result in front
+                            else ft.Text(""),
+                        ),
+                        ft.DataCell(ft.Text(str(result.variant.vehicle_count))),
+                        ft.DataCell(ft.Text(f"{result.variant.vehicle_speed_mph:g}")),
+                        ft.DataCell(ft.Text(str(result.variant.vehicle_capacity))),
+                        ft.DataCell(ft.Text(result.variant.optimization.value)),
+                        ft.DataCell(
+                            ft.Text(
+                                str(round(result.mileage, 1))
+                                if result.is_solved
+                                else "No routes",
+                            ),
+                        ),
+                        ft.DataCell(
+                            ft.Text(
+                                result.end_time.short_str if result.is_solved else "",
+                            ),
+                        ),
+                        ft.DataCell(ft.Text(str(result.missed_packages_count))),
+                    ],
+                    selected=result in front,
+                )
+                for result in sorted(
+                    self.scenario_results,
+                    key=lambda result: (
+                        not result.is_solved,
+                        result.missed_packages_count,
+                        result.mileage or 0,
+                    ),
+                )
+            ]
+            results_table.visible = bool(self.scenario_results)
+
+        scenarios_callout = ft.Text(
+            "",
+            theme_style=ft.TextThemeStyle.TITLE_MEDIUM,
+            style=ft.TextStyle(weight=ft.FontWeight.BOLD),
+        )
+        scenarios_header = ft.ListTile(
+            leading=ft.Icon(ft.icons.COMPARE_ARROWS_ROUNDED),
+            title=ft.Text("What-if scenarios"),
+            subtitle=ft.Text(
+                "Solve every combination of fleet size, speed, capacity and "
+                "objective with short searches. Starred results are not beaten by "
+                "another one on mileage, finish time and missed packages at once.",
+            ),
+            trailing=scenarios_callout,
+        )
+        vehicle_count = self.data.scenario.vehicle_count
+        vehicle_count_entry = ft.TextField(
+            value=", ".join(
+                str(count)
+                for count in sorted(
+                    {max(vehicle_count - 1, 1), vehicle_count, vehicle_count + 1},
+                )
+            ),
+            label="Vehicle counts",
+            col={"sm": 6, "md": 3},
+        )
+        speed_entry = ft.TextField(
+            value=f"{self.data.scenario.vehicle_speed_mph:g}",
+            label="Speeds (mph)",
+            col={"sm": 6, "md": 3},
+        )
+        capacity_entry = ft.TextField(
+            value=str(self.data.scenario.vehicle_capacity),
+            label="Package capacities",
+            col={"sm": 6, "md": 3},
+        )
+        time_limit_entry = ft.TextField(
+            value="10",
+            label="Seconds per scenario",
+            col={"sm": 6, "md": 3},
+        )
+        optimization_checkboxes = [
+            ft.Checkbox(
+                label=f"Optimize {optimization.value.lower()}",
+                value=True,
+                data=optimization,
+            )
+            for optimization in models.OptimizationType
+        ]
+        run_button = ft.ElevatedButton(
+            text="Solve scenarios",
+            icon=ft.icons.PLAY_ARROW_ROUNDED,
+            on_click=run_scenarios,
+        )
+        scenarios_progress = ft.ProgressBar(value=0, border_radius=5, visible=False)
+        results_table = ft.DataTable(
+            columns=[
+                ft.DataColumn(label=ft.Text("")),
+                ft.DataColumn(label=ft.Text("Vehicles"), numeric=True),
+                ft.DataColumn(label=ft.Text("Speed (mph)"), numeric=True),
+                ft.DataColumn(label=ft.Text("Capacity"), numeric=True),
+                ft.DataColumn(label=ft.Text("Optimized for")),
+                ft.DataColumn(label=ft.Text("Mileage"), numeric=True),
+                ft.DataColumn(label=ft.Text("Finish time")),
+                ft.DataColumn(label=ft.Text("Missed"), numeric=True),
+            ],
+            border_radius=15,
+            border=ft.border.all(2, ft.colors.OUTLINE_VARIANT),
+            vertical_lines=ft.BorderSide(1, ft.colors.OUTLINE_VARIANT),
+            clip_behavior=ft.ClipBehavior.ANTI_ALIAS,
+        )
+        if self.scenario_results:
+            fill_table()
+        else:
+            results_table.visible = False
+
+        scenarios_controls = ft.Container(
+            ft.Column(
+                [
+                    ft.ResponsiveRow(
+                        [
+                            vehicle_count_entry,
+                            speed_entry,
+                            capacity_entry,
+                            time_limit_entry,
+                        ],
+                    ),
+                    ft.Row(
+                        [ft.Row(optimization_checkboxes), run_button],
+                        alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
+                    ),
+                    scenarios_progress,
+                    ft.Row([results_table], scroll=ft.ScrollMode.AUTO),
+                ],
+            ),
+            padding=ft.padding.only(10, 0, 10, 10),
+        )
+        card = SettingsCard(ft.Column([scenarios_header, scenarios_controls]))
+        card.col = {"sm": 12}
+        return card
+
 
 class SettingsCard(ft.Card):
     def __init__(self, content: ft.Control) -> None:
@@ -1,35 +1,40 @@
 import flet as ft
 
+from delivery_route_planner import components
+from delivery_route_planner.export import export
 from delivery_route_planner.models import models
+from delivery_route_planner.validation import validation
+
+MAX_LISTED_VIOLATIONS = 10
 
 
 class ValidationView:
+    title = "Validation"
+    icon = ft.icons.CHECK_CIRCLE_OUTLINE_ROUNDED
+    selected_icon = ft.icons.CHECK_CIRCLE_ROUNDED
+    disabled = True
+
     def __init__(self, page: ft.Page) -> None:
         self.page = page
         self.solution = None
-        self.title = "Validation"
-        self.icon = ft.icons.CHECK_CIRCLE_OUTLINE_ROUNDED
-        self.selected_icon = ft.icons.CHECK_CIRCLE_ROUNDED
-        self.disabled = True
+        self.export_manager = components.ExportManager(
+            page,
+            dialog_title="Save validation as file",
+            file_name="validation.csv",
+            export_callback=lambda path, progress: export.export_validation(
+                self.solution,
+                path,
+                progress,
+            ),
+        )
+        self.report = None
 
     def render(self) -> ft.Column:
         title = ft.Text(self.title, style=ft.TextThemeStyle.HEADLINE_SMALL)
-        save_as_file_dialog = ft.AlertDialog(
-            icon=ft.Icon(ft.icons.SAVE_AS_ROUNDED),
-            title=ft.Text("Save as file", text_align=ft.TextAlign.CENTER),
-            actions_alignment=ft.MainAxisAlignment.END,
-            content=ft.Text("This feature is not yet available."),
-            actions=[
-                ft.TextButton(
-                    "Close",
-                    on_click=lambda _: self.page.close(save_as_file_dialog),
-                ),
-            ],
-        )
         save_as_file_button = ft.FilledTonalButton(
             "Save as file",
             ft.icons.SAVE_AS_OUTLINED,
-            on_click=lambda _: self.page.open(save_as_file_dialog),
+            on_click=lambda _: self.export_manager.open(),
         )
         header = ft.Container(
             ft.Row(
@@ -51,6 +56,7 @@ class ValidationView:
 
     def set_solution(self, solution: models.Solution) -> None:
         self.solution = solution
+        self.report = validation.validate_solution(solution)
 
     def build_validation_table(self) -> ft.Container:
         if not self.solution:
@@ -86,9 +92,13 @@ class ValidationView:
                 else None
             )
             vehicle_used = package.vehicle_used.id if package.vehicle_used else None
+            infeasible_reason = self.report.infeasible_packages.get(package.id)
             if package.delivered_time:
                 status = "Delivered"
                 status_color = ft.colors.PRIMARY
+            elif infeasible_reason:
+                status = "Infeasible"
+                status_color = ft.colors.ERROR
             else:
                 status = "Missed"
                 status_color = ft.colors.ERROR
@@ -101,6 +111,11 @@ class ValidationView:
                                 status,
                                 color=status_color,
                                 font_family="Outfit-Bold",
+                                tooltip=(
+                                    f"Package {package.id} {infeasible_reason}"
+                                    if infeasible_reason
+                                    else None
+                                ),
                             ),
                         ),
                         ft.DataCell(
@@ -163,9 +178,130 @@ class ValidationView:
             )
 
         return ft.Container(
-            content=ft.Row(
-                [package_table, ft.Container(width=30)],
-                scroll=ft.ScrollMode.AUTO,
+            content=ft.Column(
+                [
+                    ft.Row(
+                        [
+                            self.build_constraint_check_card(),
+                            *self.build_search_cards(),
+                        ],
+                        wrap=True,
+                        spacing=30,
+                        vertical_alignment=ft.CrossAxisAlignment.START,
+                    ),
+                    ft.Row(
+                        [package_table, ft.Container(width=30)],
+                        scroll=ft.ScrollMode.AUTO,
+                    ),
+                ],
+                spacing=30,
             ),
             padding=ft.padding.only(30, 0, 0, 30),
         )
+
+    def build_constraint_check_card(self) -> ft.Card:
+        violations = self.report.violations
+        listed_violations = [
+            ft.Text(str(violation)) for violation in violations[:MAX_LISTED_VIOLATIONS]
+        ]
+        if len(violations) > MAX_LISTED_VIOLATIONS:
+            listed_violations.append(
+                ft.Text(f"...and {len(violations) - MAX_LISTED_VIOLATIONS} more"),
+            )
+        return ft.Card(
+            ft.Container(
+                ft.ListTile(
+                    leading=ft.Icon(
+                        (
+                            ft.icons.VERIFIED_OUTLINED
+                            if self.report.is_valid
+                            else ft.icons.ERROR_OUTLINE_ROUNDED
+                        ),
+                        color=None if self.report.is_valid else ft.colors.ERROR,
+                    ),
+                    title=ft.Text("Constraint check"),
+                    subtitle=ft.Column(
+                        [
+                            ft.Text(
+                                "Capacities, shipping delays, deadlines, "
+                                "vehicle requirements and linked packages.",
+                            ),
+                            *listed_violations,
+                        ],
+                        spacing=0,
+                    ),
+                    trailing=ft.Text(
+                        (
+                            "Passed"
+                            if self.report.is_valid
+                            else f"{len(violations)} violations"
+                        ),
+                        style=ft.TextThemeStyle.TITLE_LARGE,
+                        color=None if self.report.is_valid else ft.colors.ERROR,
+                    ),
+                ),
+                padding=10,
+            ),
+            variant=ft.CardVariant.FILLED,
+            width=650,
+        )
+
+    def build_search_cards(self) -> list[ft.Card]:
+        search_report = self.solution.search_report
+        if search_report is None:
+            return []
+        return [
+            ft.Card(
+                ft.Container(
+                    ft.ListTile(
+                        leading=ft.Icon(ft.icons.TIMER_OUTLINED),
+                        title=ft.Text("Search"),
+                        subtitle=ft.Text(
+                            f"Stopped because {search_report.stop_reason.value}.",
+                        ),
+                        trailing=ft.Text(
+                            (
+                                f"{search_report.elapsed_seconds:.0f} of "
+                                f"{search_report.time_budget_seconds} s"
+                                if search_report.time_budget_seconds
+                                else f"{search_report.elapsed_seconds:.0f} s"
+                            ),
+                            style=ft.TextThemeStyle.TITLE_LARGE,
+                        ),
+                    ),
+                    padding=10,
+                ),
+                variant=ft.CardVariant.FILLED,
+                width=400,
+            ),
+            *self.build_gap_cards(),
+        ]
+
+    def build_gap_cards(self) -> list[ft.Card]:
+        search_report = self.solution.search_report
+        if search_report.lower_bound_miles is None:
+            return []
+        gap = self.solution.optimality_gap
+        return [
+            ft.Card(
+                ft.Container(
+                    ft.ListTile(
+                        leading=ft.Icon(ft.icons.SPORTS_SCORE_ROUNDED),
+                        title=ft.Text("Optimality gap"),
+                        subtitle=ft.Text(
+                            "No routes can deliver every deliverable package in "
+                            f"fewer than {search_report.lower_bound_miles:.1f} miles."
+                            if gap is not None
+                            else "Unknown, because packages were missed.",
+                        ),
+                        trailing=ft.Text(
+                            f"≤ {gap:.1%}" if gap is not None else "–",
+                            style=ft.TextThemeStyle.TITLE_LARGE,
+                        ),
+                    ),
+                    padding=10,
+                ),
+                variant=ft.CardVariant.FILLED,
+                width=400,
+            ),
+        ]
@@ -8,6 +8,11 @@ RESERVED_VEHICLE_IDS = 2
 
 
 class VehiclesView:
+    title = "Vehicles"
+    icon = ft.icons.LOCAL_SHIPPING_OUTLINED
+    selected_icon = ft.icons.LOCAL_SHIPPING_ROUNDED
+    disabled = False
+
     def __init__(
         self,
         page: ft.Page,
@@ -17,10 +22,6 @@ class VehiclesView:
         self.page = page
         self.data = data
         self.rerender = navigation_callback
-        self.title = "Vehicles"
-        self.icon = ft.icons.LOCAL_SHIPPING_OUTLINED
-        self.selected_icon = ft.icons.LOCAL_SHIPPING_ROUNDED
-        self.disabled = False
         self.new_vehicle_dialog = self.create_new_vehicle_dialog()
 
     def render(self) -> ft.Column:
@@ -56,6 +57,7 @@ class VehiclesView:
                 ft.DataColumn(label=ft.Text("Vehicle ID"), numeric=True),
                 ft.DataColumn(label=ft.Text("Speed (mph)")),
                 ft.DataColumn(label=ft.Text("Package capacity")),
+                ft.DataColumn(label=ft.Text("Home depot")),
                 ft.DataColumn(label=ft.Text("Delete")),
             ],
             rows=vehicle_rows,
@@ -86,6 +88,12 @@ class VehiclesView:
                         on_tap=self.capacity_cell_selected,
                         data=vehicle,
                     ),
+                    ft.DataCell(
+                        content=ft.Text(vehicle.depot),
+                        show_edit_icon=True,
+                        on_tap=self.depot_cell_selected,
+                        data=vehicle,
+                    ),
                     ft.DataCell(
                         content=ft.Icon(
                             ft.icons.DELETE_OUTLINE_ROUNDED,
@@ -132,6 +140,7 @@ class VehiclesView:
                 else:
                     rebuilt_vehicle_dict[key] = vehicle
             self.data.vehicles = rebuilt_vehicle_dict
+            self.update_depot_nodes()
             self.page.close(delete_vehicle_dialog)
             self.rerender("vehicles")
             self.page.update()
@@ -241,6 +250,53 @@ class VehiclesView:
         )
         self.page.open(edit_capacity_dialog)
 
+    def depot_cell_selected(self, e: ft.ControlEvent) -> None:
+
+        def save_new_depot(_e: ft.ControlEvent) -> None:
+            vehicle = e.control.data
+            e.control.content.value = depot_dropdown.value
+            vehicle.depot = depot_dropdown.value
+            self.update_depot_nodes()
+            self.page.close(edit_depot_dialog)
+            self.page.update()
+
+        depot_dropdown = self.create_depot_dropdown(e.control.data.depot)
+        edit_depot_dialog = ft.AlertDialog(
+            icon=ft.Icon(ft.icons.WAREHOUSE_ROUNDED),
+            actions_alignment=ft.MainAxisAlignment.END,
+            content=ft.Column(
+                [
+                    depot_dropdown,
+                ],
+                tight=True,
+            ),
+            actions=[
+                ft.TextButton(
+                    text="Cancel",
+                    on_click=lambda _: self.page.close(edit_depot_dialog),
+                ),
+                ft.FilledTonalButton(
+                    text="Save",
+                    on_click=save_new_depot,
+                ),
+            ],
+        )
+        self.page.open(edit_depot_dialog)
+
+    def create_depot_dropdown(self, depot: str) -> ft.Dropdown:
+        return ft.Dropdown(
+            value=depot,
+            label="Home depot",
+            options=[ft.dropdown.Option(street) for street in self.data.addresses],
+        )
+
+    def update_depot_nodes(self) -> None:
+        """Give every home depot its route start and end node."""
+        self.data.nodes = models.Node.from_packages(
+            self.data.packages,
+            self.data.vehicles,
+        )
+
     def is_speed_valid(self, value: str) -> bool:
         try:
             self.new_vehicle_speed = float(value)
@@ -288,7 +344,9 @@ class VehiclesView:
                 vehicle_id=next_id,
                 speed_mph=float(speed_entry.value.strip()),
                 package_capacity=int(capacity_entry.value.strip()),
+                depot=depot_dropdown.value,
             )
+            self.update_depot_nodes()
             self.page.close(self.new_vehicle_dialog)
             self.rerender("vehicles")
             self.page.update()
@@ -307,6 +365,9 @@ class VehiclesView:
             on_change=self.validate_capacity_input,
         )
 
+        depot_dropdown = self.create_depot_dropdown(models.DEPOT_ADDRESS)
+        depot_dropdown.icon = ft.icons.WAREHOUSE_ROUNDED
+
         return ft.AlertDialog(
             icon=ft.Icon(ft.icons.LOCAL_SHIPPING_ROUNDED),
             title=ft.Text("Enter vehicle details", text_align=ft.TextAlign.CENTER),
@@ -315,6 +376,7 @@ class VehiclesView:
                 [
                     speed_entry,
                     capacity_entry,
+                    depot_dropdown,
                 ],
                 tight=True,
             ),
@@ -0,0 +1,223 @@
+import argparse
+import importlib.util
+import logging
+import sys
+from pathlib import Path
+
+from delivery_route_planner.charts import charts
+from delivery_route_planner.construction import construction
+from delivery_route_planner.export import export
+from delivery_route_planner.fleet import fleet
+from delivery_route_planner.models import models
+from delivery_route_planner.routing import routing
+from delivery_route_planner.validation import validation
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Plan delivery routes without the desktop interface. "
+        "Exits with status 1 when packages are missed or constraints are violated.",
+    )
+    parser.add_argument("--time-limit", type=int, help="solver time limit in seconds")
+    parser.add_argument("--solution-limit", type=int, help="solver solution limit")
+    parser.add_argument(
+        "--adaptive-time-limit",
+        action="store_true",
+        help="choose a time budget from the size of the day, capped by --time-limit, "
+        "and stop early once improvements stall",
+    )
+    parser.add_argument(
+        "--profile",
+        type=Path,
+        metavar="PATH",
+        help="use the settings tuned with tune_settings.py for days of this size",
+    )
+    parser.add_argument(
+        "--target-gap",
+        type=float,
+        metavar="PERCENT",
+        help="stop once the routes are at most this many percent above the "
+        "mileage lower bound",
+    )
+    parser.add_argument(
+        "--vehicles",
+        type=int,
+        help="number of vehicles with the default speed and capacity",
+    )
+    parser.add_argument(
+        "--depots",
+        nargs="+",
+        metavar="STREET",
+        help="home depots that the vehicles take turns between; packages leave "
+        "from the depot in their file's optional depot column",
+    )
+    parser.add_argument(
+        "--solve-depots-separately",
+        action="store_true",
+        help="solve depots that share no vehicles or packages in parallel "
+        "and merge their routes",
+    )
+    parser.add_argument(
+        "--neighbors",
+        type=int,
+        metavar="K",
+        help="keep exact distances only to each address's K nearest neighbors "
+        "and estimate the rest, for very large address lists",
+    )
+    parser.add_argument(
+        "--parallel-search",
+        action="store_true",
+        help="improve the routes with ruin and recreate rounds on every CPU core",
+    )
+    parser.add_argument(
+        "--minimize-fleet",
+        action="store_true",
+        help="find the smallest number of vehicles that delivers every package",
+    )
+    parser.add_argument(
+        "--service",
+        metavar="URL",
+        help="solve on a solve service started with solve_service.py",
+    )
+    parser.add_argument(
+        "--priority",
+        type=int,
+        default=0,
+        help="queue priority of the job on the solve service; higher runs first "
+        "(default: 0)",
+    )
+    parser.add_argument(
+        "--export-routes",
+        type=Path,
+        metavar="PATH",
+        help="write route steps to a .csv, .ndjson or .parquet file",
+    )
+    parser.add_argument(
+        "--export-validation",
+        type=Path,
+        metavar="PATH",
+        help="write package validation rows to a .csv, .ndjson or .parquet file",
+    )
+    parser.add_argument(
+        "--export-charts",
+        type=Path,
+        metavar="PATH",
+        help="draw the charts into a .png or .svg file (requires matplotlib)",
+    )
+    arguments = parser.parse_args()
+    # Check the export files up front, so a bad path does not waste the solve.
+    for option, path in (
+        ("--export-routes", arguments.export_routes),
+        ("--export-validation", arguments.export_validation),
+    ):
+        if path is None:
+            continue
+        try:
+            export_format = export.ExportFormat.from_path(path)
+        except ValueError:
+            parser.error(
+                f"{option}: {path.name} is not a .csv, .ndjson or .parquet file",
+            )
+        if not export_format.is_available:
+            parser.error(f"{option}: writing {path.name} requires pyarrow")
+    if arguments.export_charts:
+        path = arguments.export_charts
+        if path.suffix.lstrip(".").lower() not in charts.RENDER_FORMATS:
+            parser.error(f"--export-charts: {path.name} is not a .png or .svg file")
+        if importlib.util.find_spec("matplotlib") is None:
+            parser.error(f"--export-charts: drawing {path.name} requires matplotlib")
+    return arguments
+
+
+def create_data(arguments: argparse.Namespace) -> models.DataModel:
+    data = models.DataModel.with_defaults(arguments.neighbors)
+    if arguments.time_limit:
+        data.settings.solver_time_limit_seconds = arguments.time_limit
+    if arguments.solution_limit:
+        data.settings.solver_solution_limit = arguments.solution_limit
+    if arguments.adaptive_time_limit:
+        data.settings.use_adaptive_time_limit = True
+    if arguments.target_gap is not None:
+        data.settings.target_optimality_gap = arguments.target_gap / 100
+    if arguments.parallel_search:
+        data.settings.use_parallel_search = True
+    if arguments.solve_depots_separately:
+        data.settings.solve_depots_separately = True
+    if arguments.vehicles or arguments.depots:
+        unknown_depots = [
+            street for street in arguments.depots or () if street not in data.addresses
+        ]
+        if unknown_depots:
+            sys.exit(f"Unknown depot addresses: {', '.join(unknown_depots)}")
+        data.scenario.vehicle_count = arguments.vehicles or data.scenario.vehicle_count
+        data.vehicles = models.Vehicle.with_shared_attributes(
+            data.scenario.vehicle_count,
+            data.scenario.vehicle_speed_mph,
+            data.scenario.vehicle_capacity,
+            models.TravelCostMap.with_duration(
+                data.addresses,
+                data.scenario.vehicle_speed_mph,
+            ),
+            arguments.depots or (models.DEPOT_ADDRESS,),
+        )
+        data.nodes = models.Node.from_packages(data.packages, data.vehicles)
+    if arguments.profile:
+        from delivery_route_planner.tuning import tuning
+
+        try:
+            tuning.TuningProfile.load(arguments.profile).apply(data)
+        except (OSError, ValueError, KeyError) as e:
+            sys.exit(f"Could not load the profile {arguments.profile}: {e}")
+    return data
+
+
+def main() -> int:
+    arguments = parse_arguments()
+    data = create_data(arguments)
+    try:
+        if arguments.minimize_fleet:
+            fleet_size = fleet.minimize_fleet(data)
+            print("\n".join(fleet_size.summary_lines()))
+            solution = fleet_size.solution
+        elif arguments.service:
+            from delivery_route_planner.service import service
+
+            solution = service.ServiceClient(arguments.service).solve(
+                data,
+                arguments.priority,
+            )
+        else:
+            solution = routing.solve_vehicle_routing_problem(
+                data,
+                construction.build_initial_solution(data),
+            )
+    except ValueError as e:
+        print(f"Routes could not be created: {e}.")
+        return 1
+    except Exception:
+        logging.exception("An unexpected error occurred with Google OR-Tools.")
+        return 1
+    if solution is None:
+        print("Routes could not be created.")
+        return 1
+
+    report = validation.validate_solution(solution)
+    print("\n".join(report.summary_lines()))
+    if solution.search_report:
+        print(solution.search_report)
+    if solution.optimality_gap is not None:
+        print(
+            f"Optimality gap: at most {solution.optimality_gap:.1%} above the lower "
+            f"bound of {solution.search_report.lower_bound_miles:.1f} miles",
+        )
+    if arguments.export_routes:
+        export.export_routes(solution, arguments.export_routes)
+    if arguments.export_validation:
+        export.export_validation(solution, arguments.export_validation)
+    if arguments.export_charts:
+        charts.export_charts(solution, arguments.export_charts)
+    return 0 if report.is_valid and report.kpis.missed_packages_count == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,51 +2,126 @@ import logging
 
 import flet as ft
 
-from delivery_route_planner import components, views
+from delivery_route_planner import components
 from delivery_route_planner.models import models
-from delivery_route_planner.routing import routing
 
 
 class DeliveryRoutePlanner:
 
     def __init__(self, page: ft.Page) -> None:
         self.page = page
-        self.data = models.DataModel.with_defaults()
+        self.data = None
         self.solution = None
+        self.preview = None
+        self.views = {}
         self.window_manager = components.WindowManager(page)
         self.title_bar = components.TitleBar(page)
+        self.navigation_manager = None
+        self.body = ft.Container(content=self.build_skeleton(), expand=True)
+        self.render_gui()
+        self.page.run_thread(self.load_data)
+
+    def render_gui(self) -> None:
+        self.page.add(self.title_bar.render())
+        self.page.add(self.body)
+
+    def build_skeleton(self) -> ft.Row:
+        return ft.Row(
+            controls=[
+                ft.Container(width=100),
+                ft.Container(
+                    ft.ProgressRing(),
+                    margin=ft.margin.only(0, 0, 24, 24),
+                    bgcolor=ft.colors.SURFACE,
+                    border_radius=15,
+                    border=ft.border.all(1, ft.colors.SURFACE_VARIANT),
+                    alignment=ft.alignment.center,
+                    expand=True,
+                ),
+            ],
+            expand=True,
+            spacing=0,
+        )
+
+    def load_data(self) -> None:
+        from delivery_route_planner import views
+
+        try:
+            self.data = models.DataModel.with_defaults()
+        except Exception as e:
+            if isinstance(e, (KeyboardInterrupt, SystemExit)):
+                raise
+            logging.exception("Delivery data could not be loaded.")
+            self.body.content = ft.Container(
+                ft.Text("Delivery data could not be loaded.", color=ft.colors.ERROR),
+                alignment=ft.alignment.center,
+            )
+            self.page.update()
+            return
+
         self.navigation_manager = components.NavigationManager(
-            page,
+            self.page,
             self.data,
             solution_callback=self.create_solution,
+            preview_callback=self.create_preview,
         )
         self.views = {
-            "settings": views.SettingsView(
-                page,
+            "settings": components.LazyView(
+                views.SettingsView,
+                self.page,
                 self.data,
                 self.navigation_manager.navigate_from_view_name,
             ),
-            "packages": views.PackagesView(page, self.data),
-            "vehicles": views.VehiclesView(
-                page,
+            "packages": components.LazyView(views.PackagesView, self.page, self.data),
+            "vehicles": components.LazyView(
+                views.VehiclesView,
+                self.page,
                 self.data,
                 self.navigation_manager.navigate_from_view_name,
             ),
-            "addresses": views.AddressesView(page, self.data),
-            "routes": views.RoutesView(page),
-            "validation": views.ValidationView(page),
-            "charts": views.ChartsView(page),
+            "addresses": components.LazyView(
+                views.AddressesView,
+                self.page,
+                self.data,
+            ),
+            "routes": components.LazyView(views.RoutesView, self.page),
+            "validation": components.LazyView(views.ValidationView, self.page),
+            "charts": components.LazyView(views.ChartsView, self.page),
         }
         self.navigation_manager.set_views(self.views)
-        self.render_gui()
+        self.body.content = self.navigation_manager.render()
+        self.page.update()
+        components.navigation_manager.load_lottie_base64()
 
-    def render_gui(self) -> None:
-        self.page.add(self.title_bar.render())
-        self.page.add(self.navigation_manager.render())
+    def create_preview(self) -> bool:
+        from delivery_route_planner.construction import construction
+
+        self.preview = None
+        try:
+            preview = construction.build_initial_solution(self.data)
+        except Exception as e:
+            if isinstance(e, (KeyboardInterrupt, SystemExit)):
+                raise
+            logging.exception("Preview routes could not be created.")
+            return False
+        if preview.delivered_packages_count == 0:
+            return False
+        self.preview = preview
+        self.views["routes"].set_solution(preview)
+        return True
 
     def create_solution(self) -> bool:
+        from delivery_route_planner.routing import routing
+
         try:
-            solution = routing.solve_vehicle_routing_problem(self.data)
+            if self.data.settings.solve_service_url:
+                solution = self.request_solution(self.data.settings.solve_service_url)
+            else:
+                solution = routing.solve_vehicle_routing_problem(self.data, self.preview)
+        except ValueError as e:
+            logging.warning("Routes could not be created: %s", e)
+            self.navigation_manager.show_solver_failure(str(e))
+            return False
         except Exception as e:
             if isinstance(e, (KeyboardInterrupt, SystemExit)):
                 raise
@@ -61,6 +136,22 @@ class DeliveryRoutePlanner:
             self.views["charts"].set_solution(self.solution)
             return True
 
+    def request_solution(self, url: str) -> models.Solution | None:
+        """Solve on a shared solve service, showing its best routes so far."""
+        from delivery_route_planner.service import service
+
+        def show_incumbent(incumbent: dict) -> None:
+            self.navigation_manager.show_solver_status(
+                f"Best routes so far on the solve service: "
+                f"{incumbent['delivered_packages_count']} packages delivered "
+                f"in {round(incumbent['mileage'], 1)} miles...",
+            )
+
+        return service.ServiceClient(url).solve(
+            self.data,
+            incumbent_callback=show_incumbent,
+        )
+
 
 def main(page: ft.Page) -> None:
     DeliveryRoutePlanner(page)
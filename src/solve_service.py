@@ -0,0 +1,74 @@
+import argparse
+import logging
+import os
+import sys
+from pathlib import Path
+
+from delivery_route_planner.models import models
+from delivery_route_planner.service import service
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Solve delivery days for several planners on this machine. "
+        "Jobs are queued by priority in a SQLite file and solved in worker processes.",
+    )
+    parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="address to listen on; use 0.0.0.0 to serve the local network "
+        "(default: 127.0.0.1)",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=service.DEFAULT_PORT,
+        help=f"port to listen on (default: {service.DEFAULT_PORT})",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="number of jobs solved at once (default: number of CPU cores)",
+    )
+    parser.add_argument(
+        "--database",
+        type=Path,
+        default=Path("solve_jobs.sqlite3"),
+        metavar="PATH",
+        help="job queue file, kept between runs (default: solve_jobs.sqlite3)",
+    )
+    parser.add_argument(
+        "--neighbors",
+        type=int,
+        metavar="K",
+        help="keep exact distances only to each address's K nearest neighbors "
+        "and estimate the rest, for very large address lists",
+    )
+    return parser.parse_args()
+
+
+def main() -> int:
+    arguments = parse_arguments()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    queue = service.JobQueue(arguments.database)
+    queue.create()
+    data = models.DataModel.with_defaults(arguments.neighbors)
+    with data.share_matrices() as base_data:
+        server = service.SolveServer(
+            (arguments.host, arguments.port),
+            queue,
+            base_data,
+            arguments.workers or os.cpu_count() or 1,
+        )
+        print(f"Serving solve jobs on http://{arguments.host}:{arguments.port}")
+        try:
+            server.serve()
+        except KeyboardInterrupt:
+            print("\nStopped. Unfinished jobs will be solved on the next start.")
+        finally:
+            server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
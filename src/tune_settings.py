@@ -0,0 +1,86 @@
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+from delivery_route_planner.models import models
+from delivery_route_planner.tuning import tuning
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Tune penalties, the span cost coefficient, the first solution "
+        "strategy and the metaheuristic by random search on generated days, and "
+        "save the best settings per day size as a profile for the Settings page.",
+    )
+    parser.add_argument(
+        "--trials",
+        type=int,
+        default=20,
+        help="random settings tried per day size (default: 20)",
+    )
+    parser.add_argument(
+        "--instances",
+        type=int,
+        default=3,
+        help="generated days each trial is solved on (default: 3)",
+    )
+    parser.add_argument(
+        "--seconds",
+        type=int,
+        default=tuning.TRIAL_TIME_LIMIT_SECONDS,
+        help=f"time limit of each solve (default: {tuning.TRIAL_TIME_LIMIT_SECONDS})",
+    )
+    parser.add_argument(
+        "--buckets",
+        nargs="+",
+        choices=[bucket.name for bucket in tuning.SIZE_BUCKETS],
+        default=[bucket.name for bucket in tuning.SIZE_BUCKETS],
+        help="day sizes to tune (default: all)",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="random seed (default: 0)")
+    parser.add_argument("--workers", type=int, help="number of worker processes")
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=Path("tuned_profile.json"),
+        metavar="PATH",
+        help="where to write the profile (default: tuned_profile.json)",
+    )
+    return parser.parse_args()
+
+
+def main() -> int:
+    arguments = parse_arguments()
+    data = models.DataModel.with_defaults()
+    buckets = [
+        bucket for bucket in tuning.SIZE_BUCKETS if bucket.name in arguments.buckets
+    ]
+
+    def show_progress(done_count: int, total_count: int) -> None:
+        print(f"\rSolved {done_count} of {total_count}", end="", flush=True)
+
+    try:
+        profile = tuning.tune_settings(
+            data,
+            arguments.trials,
+            arguments.instances,
+            arguments.seconds,
+            buckets,
+            arguments.seed,
+            arguments.workers,
+            show_progress,
+        )
+    except Exception:
+        logging.exception("The settings could not be tuned.")
+        return 1
+    print()
+    profile.save(arguments.output)
+    for bucket_profile in profile.buckets:
+        print(bucket_profile.summary_line())
+    print(f"Saved the profile to {arguments.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,34 @@
+import numpy as np
+
+from delivery_route_planner.models import models
+from delivery_route_planner.routing import routing
+
+
+def test_replanning_keeps_visited_stops_with_candidate_arcs() -> None:
+    data = models.DataModel.with_defaults(None)
+    data.settings.candidate_neighbor_count = 3
+    data.settings.solver_time_limit_seconds = 2
+    data.settings.solver_solution_limit = None
+    solution = routing.solve_vehicle_routing_problem(data)
+    assert solution is not None
+
+    visit_seconds = np.concatenate(
+        [route.visit_seconds[1:-1] for route in solution.routes],
+    )
+    current_time = models.RoutingTime.from_seconds(int(np.median(visit_seconds)))
+    replanned = routing.replan_vehicle_routing_problem(
+        solution,
+        current_time,
+        time_limit_seconds=1,
+    )
+
+    assert replanned is not None
+    routes = {route.vehicle.id: route for route in replanned.routes}
+    for route in solution.routes:
+        visited_count = int(
+            np.count_nonzero(route.visit_seconds[1:-1] <= current_time.seconds),
+        )
+        assert (
+            routes[route.vehicle.id].node_indices[1 : visited_count + 1].tolist()
+            == route.node_indices[1 : visited_count + 1].tolist()
+        )